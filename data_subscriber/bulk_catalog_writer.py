@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from elasticsearch import TransportError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL_SECONDS = 5
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_INITIAL_BACKOFF_SECONDS = 2
+MAX_BACKOFF_SECONDS = 60
+
+
+class BulkCatalogWriter:
+    """
+    Buffers product catalog upserts (see `HLSProductCatalog.process_url` and `SLCProductCatalog.process_url`) and
+    writes them in batches.
+
+    On each flush, the target indices of all buffered docs are resolved with a single query, and the upserts are sent
+    with a single `_bulk` request. Docs rejected by ES with 429 (Too Many Requests) are retried with exponential
+    backoff.
+
+    Drop-in replacement for a product catalog in `query.update_url_index`. Callers must call `close()` (or use the
+    writer as a context manager) to write any remaining docs.
+    """
+    def __init__(
+            self,
+            catalog,
+            /,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+            max_retries: int = DEFAULT_MAX_RETRIES,
+            initial_backoff_seconds: float = DEFAULT_INITIAL_BACKOFF_SECONDS
+    ):
+        """
+        :param catalog: the product catalog to write to. e.g. HLSProductCatalog or SLCProductCatalog
+        :param batch_size: the number of docs to buffer before flushing.
+        :param flush_interval_seconds: the max age of buffered docs before flushing.
+        :param max_retries: the number of times to retry docs rejected with 429.
+        :param initial_backoff_seconds: the delay before the first retry. Doubles with each subsequent retry.
+        """
+        self.catalog = catalog
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_retries = max_retries
+        self.initial_backoff_seconds = initial_backoff_seconds
+
+        self._docs: dict[str, dict] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+
+        self.docs_written = 0
+        self.docs_failed = 0
+        self.bulk_rejections = 0
+        self.bulk_requests = 0
+        self.elapsed_seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def process_url(
+            self,
+            urls: list[str],
+            granule_id: str,
+            job_id: str,
+            query_dt: datetime,
+            temporal_extent_beginning_dt: datetime,
+            revision_date_dt: datetime,
+            *args,
+            **kwargs
+    ):
+        doc = self.catalog._to_url_doc(urls, granule_id, job_id, query_dt, temporal_extent_beginning_dt,
+                                       revision_date_dt, **kwargs)
+        with self._lock:
+            if doc["id"] in self._docs:
+                self._docs[doc["id"]].update(doc)
+            else:
+                self._docs[doc["id"]] = doc
+
+            if len(self._docs) >= self.batch_size \
+                    or time.monotonic() - self._last_flush >= self.flush_interval_seconds:
+                self.flush()
+        return True
+
+    def flush(self):
+        """Writes all buffered docs."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._docs:
+                return
+
+            docs, self._docs = self._docs, {}
+            t0 = time.perf_counter()
+            index_names = self.catalog._get_index_names_for(list(docs))
+            actions = [(index_names[_id], _id, doc) for _id, doc in docs.items()]
+            self._bulk_upsert(actions)
+            self.elapsed_seconds += time.perf_counter() - t0
+
+    def close(self):
+        """Writes all buffered docs and logs write metrics."""
+        self.flush()
+        docs_per_sec = self.docs_written / self.elapsed_seconds if self.elapsed_seconds else 0.0
+        logger.info(f"{self.docs_written=}, {self.docs_failed=}, {self.bulk_rejections=}, {self.bulk_requests=}, "
+                    f"docs/sec={docs_per_sec:,.1f}")
+
+    def _bulk_upsert(self, actions: list[tuple[str, str, dict]]):
+        result = bulk_write(
+            self.catalog.es.es, "update", actions,
+            max_retries=self.max_retries, initial_backoff_seconds=self.initial_backoff_seconds
+        )
+        # the locations of new docs are only known (and cached) once ES has written them
+        self.catalog.index_cache.put_many(result.locations)
+        self.docs_written += result.written
+        self.docs_failed += result.failed
+        self.bulk_rejections += result.rejections
+        self.bulk_requests += result.requests
+
+
+@dataclass
+class BulkWriteResult:
+    written: int = 0
+    """Number of docs written"""
+    conflicts: int = 0
+    """Number of docs skipped as they already exist. Only applies to the "create" op type"""
+    failed: int = 0
+    """Number of docs that could not be written"""
+    rejections: int = 0
+    """Number of times a doc was rejected with 429 (Too Many Requests)"""
+    requests: int = 0
+    """Number of _bulk requests sent"""
+    locations: dict[str, str] = field(default_factory=dict)
+    """Index of each written doc, by _id"""
+
+
+def bulk_write(
+        es,
+        op_type: str,
+        actions: list[tuple[str, str, dict]],
+        *,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        initial_backoff_seconds: float = DEFAULT_INITIAL_BACKOFF_SECONDS
+) -> BulkWriteResult:
+    """Writes the given docs with `_bulk` requests, retrying docs rejected with 429 with exponential backoff.
+
+    :param es: the Elasticsearch client.
+    :param op_type: "update" to upsert the docs, or "create" to write only the docs that do not exist yet.
+    :param actions: the (index, _id, doc) tuples to write.
+    :param max_retries: the number of times to retry rejected docs.
+    :param initial_backoff_seconds: the delay before the first retry. Doubles with each subsequent retry.
+    """
+    result = BulkWriteResult()
+    for attempt in range(max_retries + 1):
+        if attempt:
+            backoff_seconds = min(initial_backoff_seconds * 2 ** (attempt - 1), MAX_BACKOFF_SECONDS)
+            logger.warning(f"Retrying {len(actions)} rejected doc(s) in {backoff_seconds}s. {attempt=}")
+            time.sleep(backoff_seconds)
+
+        actions = _try_bulk_write(es, op_type, actions, result)
+        if not actions:
+            return result
+
+    logger.error(f"Giving up on {len(actions)} doc(s) rejected by ES after {max_retries} retries")
+    result.failed += len(actions)
+    return result
+
+
+def _try_bulk_write(es, op_type: str, actions: list[tuple[str, str, dict]], result: BulkWriteResult):
+    """Sends the given docs in a single `_bulk` request, returning the ones to retry."""
+    body = []
+    for index, _id, doc in actions:
+        body.append({op_type: {"_index": index, "_id": _id}})
+        body.append({"doc_as_upsert": True, "doc": doc} if op_type == "update" else doc)
+
+    result.requests += 1
+    try:
+        response = es.bulk(body=body)
+    except TransportError as e:
+        if e.status_code == 429:  # the whole request was rejected
+            result.rejections += len(actions)
+            return actions
+        raise
+
+    rejected = []
+    for action, item in zip(actions, response["items"]):
+        item_result = item[op_type]
+        if item_result.get("status") == 429:
+            rejected.append(action)
+        elif item_result.get("status") == 409 and op_type == "create":
+            result.conflicts += 1
+        elif "error" in item_result:
+            logger.error(f"Failed to write doc. _id={action[1]}, error={item_result['error']}")
+            result.failed += 1
+        else:
+            result.written += 1
+            result.locations[action[1]] = item_result.get("_index", action[0])
+    result.rejections += len(rejected)
+    return rejected
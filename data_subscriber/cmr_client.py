@@ -0,0 +1,283 @@
+import asyncio
+import contextlib
+import json
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import aiohttp
+import backoff
+import dateutil.parser
+
+logger = logging.getLogger(__name__)
+
+CMR_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+DEFAULT_PAGE_SIZE = 2000  # CMR max
+DEFAULT_MAX_CONCURRENCY = 3  # CMR recommends 2-5 concurrent requests
+DEFAULT_MAX_PAGES_PER_WINDOW = 4
+DEFAULT_MIN_WINDOW = timedelta(minutes=1)
+DEFAULT_MAX_BUFFERED_PAGES = 4
+MAX_SPLITS = 64
+
+_END = object()
+"""Marks the end of a streamed search"""
+
+
+async def async_search(
+        request_url: str,
+        params: dict,
+        *,
+        range_param: str,
+        parse: Optional[Callable[[bytes], tuple[list, int]]] = None,
+        decode: Callable[[list[dict]], list] = lambda items: items,
+        key: Callable[[object], str] = lambda item: item["umm"]["GranuleUR"],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_pages_per_window: int = DEFAULT_MAX_PAGES_PER_WINDOW,
+        min_window: timedelta = DEFAULT_MIN_WINDOW,
+        session: Optional[aiohttp.ClientSession] = None
+) -> list:
+    """Searches CMR, fetching the results of the given search concurrently.
+
+    The datetime range in `params[range_param]` (e.g. "revision_date" or "temporal") is split into sub-windows
+    adaptively: a window whose first page reports more than `max_pages_per_window` pages of hits is split into
+    enough equal sub-windows to hold them, and each sub-window is searched (and split) independently. Sub-windows
+    expected to be split again are probed for their hits (`page_size=0`) rather than fetching a page of items. Windows
+    are paged concurrently over a single keep-alive connection pool with at most `max_concurrency` requests in flight.
+
+    :param request_url: the CMR search URL. e.g. https://cmr.earthdata.nasa.gov/search/granules.umm_json
+    :param params: the CMR search query parameters.
+    :param range_param: the name of the query parameter holding the "start,end" datetime range to split.
+    :param parse: parses the body of a search response into its (items, hits). Defaults to plain JSON decoding.
+                  See `cmr_umm.parse_search_results` for a lean, typed alternative.
+    :param decode: maps the parsed items of a page to the returned records.
+    :param key: maps a returned record to its unique identifier. Records are de-duplicated using this value, as
+                adjacent windows share their (inclusive) boundaries.
+    :param max_concurrency: the maximum number of concurrent requests to CMR.
+    :param max_pages_per_window: the number of pages a window may span before it is split.
+    :param min_window: windows are never split into sub-windows narrower than this.
+    :param session: an optional session to issue requests with. A pooled session is created when not provided.
+    :return: the de-duplicated records.
+    """
+    records = []
+    pages = async_iter_search(
+        request_url, params,
+        range_param=range_param, parse=parse, decode=decode, key=key,
+        max_concurrency=max_concurrency, max_pages_per_window=max_pages_per_window, min_window=min_window,
+        session=session
+    )
+    async for page in pages:
+        records.extend(page)
+    return records
+
+
+async def async_iter_search(
+        request_url: str,
+        params: dict,
+        *,
+        range_param: str,
+        parse: Optional[Callable[[bytes], tuple[list, int]]] = None,
+        decode: Callable[[list[dict]], list] = lambda items: items,
+        key: Callable[[object], str] = lambda item: item["umm"]["GranuleUR"],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_pages_per_window: int = DEFAULT_MAX_PAGES_PER_WINDOW,
+        min_window: timedelta = DEFAULT_MIN_WINDOW,
+        max_buffered_pages: int = DEFAULT_MAX_BUFFERED_PAGES,
+        session: Optional[aiohttp.ClientSession] = None
+) -> AsyncIterator[list]:
+    """Streaming variant of `async_search`. Yields the de-duplicated records of each page as soon as it is fetched.
+
+    Pages are fetched in the background while the caller processes the yielded records. At most
+    `max_buffered_pages` fetched pages are held before fetching pauses, so memory use is bounded by the consumer's
+    pace rather than the size of the search. Records are yielded in page arrival order, not in CMR sort order.
+
+    Closing the iterator early (e.g. breaking out of the loop and calling `aclose()`) cancels any outstanding requests.
+
+    See `async_search` for the remaining parameters.
+
+    :param max_buffered_pages: the maximum number of fetched pages waiting to be consumed.
+    """
+    if session is None:
+        connector = aiohttp.TCPConnector(limit=max_concurrency)
+        async with aiohttp.ClientSession(connector=connector, headers=_default_headers()) as session:
+            pages = async_iter_search(
+                request_url, params,
+                range_param=range_param, parse=parse, decode=decode, key=key,
+                max_concurrency=max_concurrency, max_pages_per_window=max_pages_per_window, min_window=min_window,
+                max_buffered_pages=max_buffered_pages, session=session
+            )
+            try:
+                async for page in pages:
+                    yield page
+            finally:
+                await pages.aclose()
+        return
+
+    queue = asyncio.Queue(maxsize=max_buffered_pages)
+    search = _WindowedSearch(
+        session, asyncio.Semaphore(max_concurrency), request_url, params, range_param, parse or parse_json,
+        decode, max_pages_per_window, min_window, on_page=queue.put
+    )
+    start, end = _parse_range(params[range_param])
+
+    async def produce():
+        try:
+            await search.search_window(start, end)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_END)
+
+    producer = asyncio.ensure_future(produce())
+    seen = set()
+    try:
+        while (page := await queue.get()) is not _END:
+            if isinstance(page, Exception):
+                raise page
+
+            # adjacent windows share their (inclusive) boundaries
+            deduped = []
+            for record in page:
+                record_key = key(record)
+                if record_key not in seen:
+                    seen.add(record_key)
+                    deduped.append(record)
+            if deduped:
+                yield deduped
+        logger.info(f"{search.pages_fetched=}, {search.windows_searched=}")
+    finally:
+        if not producer.done():
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
+
+
+class _WindowedSearch:
+    def __init__(self, session, semaphore, request_url, params, range_param, parse, decode, max_pages_per_window,
+                 min_window, on_page: Callable[[list], Awaitable]):
+        self.session = session
+        self.semaphore = semaphore
+        self.request_url = request_url
+        self.params = params
+        self.range_param = range_param
+        self.parse = parse
+        self.decode = decode
+        self.page_size = int(params.get("page_size", DEFAULT_PAGE_SIZE))
+        self.max_pages_per_window = max_pages_per_window
+        self.min_window = min_window
+        self.on_page = on_page
+
+        self.pages_fetched = 0
+        self.windows_searched = 0
+
+    async def search_window(self, start: datetime, end: datetime, expected_hits: Optional[float] = None):
+        """
+        :param expected_hits: the number of hits expected in the window, estimated from its parent window. Windows
+                              expected to be split are probed for their hits without fetching a page of items.
+        """
+        self.windows_searched += 1
+        window_params = {**self.params, self.range_param: _format_range(start, end)}
+
+        max_window_hits = self.page_size * self.max_pages_per_window
+        splittable = end - start >= 2 * self.min_window
+        if splittable and expected_hits is not None and expected_hits > max_window_hits:
+            items, search_after = None, None
+            _, hits, _ = await self.fetch_page({**window_params, "page_size": 0})
+        else:
+            items, hits, search_after = await self.fetch_page(window_params)
+
+        if hits > max_window_hits and splittable:
+            # too many pages to walk with a single cursor. split the window and search each part concurrently.
+            if items:
+                # deliver the page already fetched. the sub-windows fetch it again, and the repeats are de-duplicated
+                await self.on_page(self.decode(items))
+            sub_ranges = _split_range(start, end, min(math.ceil(hits / max_window_hits), MAX_SPLITS), self.min_window)
+            logger.debug(f"Splitting window. {hits=}, splits={len(sub_ranges)}, {start=!s}, {end=!s}")
+            await _gather_or_cancel([
+                self.search_window(sub_start, sub_end, expected_hits=hits / len(sub_ranges))
+                for sub_start, sub_end in sub_ranges
+            ])
+            return
+
+        if items is None:  # probed, but fits in a single cursor after all
+            items, hits, search_after = await self.fetch_page(window_params)
+        await self.on_page(self.decode(items))
+        while search_after and len(items) == self.page_size:
+            items, _, search_after = await self.fetch_page(window_params, search_after)
+            await self.on_page(self.decode(items))
+
+    async def fetch_page(self, params: dict, search_after: Optional[str] = None):
+        async with self.semaphore:
+            self.pages_fetched += 1
+            return await _fetch_page(self.session, self.request_url, params, self.parse, search_after)
+
+
+async def _gather_or_cancel(coros: list[Awaitable]):
+    """Like `asyncio.gather`, but cancels the remaining awaitables when one of them fails."""
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _giveup_cmr_requests(e):
+    if isinstance(e, aiohttp.ClientResponseError):
+        if e.status in (400, 401, 403, 404, 413):  # client errors. give up
+            return True
+    return False
+
+
+@backoff.on_exception(
+    backoff.expo,
+    exception=(aiohttp.ClientResponseError, aiohttp.ClientOSError, asyncio.TimeoutError),
+    max_tries=3,
+    jitter=None,
+    giveup=_giveup_cmr_requests
+)
+async def _fetch_page(session: aiohttp.ClientSession, request_url, params: dict,
+                      parse: Callable[[bytes], tuple[list, int]], search_after: Optional[str] = None):
+    headers = {"CMR-Search-After": search_after} if search_after else {}
+    async with session.get(request_url, params=_to_query_params(params), headers=headers,
+                           raise_for_status=True) as response:
+        items, hits = parse(await response.read())
+        hits = int(response.headers.get("CMR-Hits", hits))
+        return items, hits, response.headers.get("CMR-Search-After")
+
+
+def parse_json(body: bytes) -> tuple[list[dict], int]:
+    """Parses the body of a CMR search response into its raw (items, hits)."""
+    body = json.loads(body)
+    items = body.get("items") or []
+    return items, body.get("hits", len(items))
+
+
+def _split_range(start: datetime, end: datetime, splits: int, min_window: timedelta) -> list[tuple[datetime, datetime]]:
+    """Splits the given range into (at most) `splits` adjacent sub-ranges, each no narrower than `min_window`."""
+    splits = max(2, min(splits, int((end - start) / min_window)))
+    step = (end - start) / splits
+    bounds = [(start + step * i).replace(microsecond=0) for i in range(splits)] + [end]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _to_query_params(params: dict) -> dict[str, str]:
+    return {k: str(v) for k, v in params.items()}
+
+
+def _parse_range(range_str: str) -> tuple[datetime, datetime]:
+    start_str, end_str = range_str.split(",")
+    return dateutil.parser.isoparse(start_str), dateutil.parser.isoparse(end_str)
+
+
+def _format_range(start: datetime, end: datetime) -> str:
+    return f"{start.strftime(CMR_DATETIME_FORMAT)},{end.strftime(CMR_DATETIME_FORMAT)}"
+
+
+def _default_headers() -> dict[str, str]:
+    return {"Client-Id": "nasa.jpl.opera.sds.pcm.data_subscriber"}
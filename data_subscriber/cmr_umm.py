@@ -0,0 +1,218 @@
+"""
+Lean decoding of CMR UMM-JSON granule search results (`/search/granules.umm_json`).
+
+Search results are decoded straight from the response bytes against a typed schema which only declares the
+fields the data subscriber and CMR audit tools use. All other UMM fields are skipped by the decoder without being
+materialized as Python objects.
+"""
+
+from typing import Iterable, Optional
+
+import msgspec
+
+
+class _Meta(msgspec.Struct):
+    native_id: str = msgspec.field(name="native-id", default="")
+    provider_id: str = msgspec.field(name="provider-id", default="")
+    revision_id: Optional[int] = msgspec.field(name="revision-id", default=None)
+    revision_date: str = msgspec.field(name="revision-date", default="")
+
+
+class _Point(msgspec.Struct):
+    Longitude: float
+    Latitude: float
+
+
+class _Boundary(msgspec.Struct):
+    Points: list[_Point] = []
+
+
+class _GPolygon(msgspec.Struct):
+    Boundary: _Boundary
+
+
+class _Geometry(msgspec.Struct):
+    GPolygons: list[_GPolygon] = []
+
+
+class _HorizontalSpatialDomain(msgspec.Struct):
+    Geometry: Optional[_Geometry] = None
+
+
+class _SpatialExtent(msgspec.Struct):
+    HorizontalSpatialDomain: Optional[_HorizontalSpatialDomain] = None
+
+
+class _RangeDateTime(msgspec.Struct):
+    BeginningDateTime: Optional[str] = None
+
+
+class _TemporalExtent(msgspec.Struct):
+    RangeDateTime: Optional[_RangeDateTime] = None
+
+
+class _ArchiveAndDistributionInformation(msgspec.Struct):
+    Name: Optional[str] = None
+    SizeInBytes: Optional[int] = None
+    Size: Optional[float] = None
+    SizeUnit: Optional[str] = None
+
+
+class _DataGranule(msgspec.Struct):
+    ProductionDateTime: Optional[str] = None
+    ArchiveAndDistributionInformation: list[_ArchiveAndDistributionInformation] = []
+
+
+class _Platform(msgspec.Struct):
+    ShortName: Optional[str] = None
+
+
+class _RelatedUrl(msgspec.Struct):
+    URL: str
+    Size: Optional[float] = None
+    SizeUnit: Optional[str] = None
+
+
+class _AdditionalAttribute(msgspec.Struct):
+    Name: str
+    Values: list[str] = []
+
+
+class _Umm(msgspec.Struct):
+    GranuleUR: str
+    DataGranule: Optional[_DataGranule] = None
+    TemporalExtent: Optional[_TemporalExtent] = None
+    Platforms: list[_Platform] = []
+    SpatialExtent: Optional[_SpatialExtent] = None
+    RelatedUrls: list[_RelatedUrl] = []
+    AdditionalAttributes: list[_AdditionalAttribute] = []
+
+
+class UmmItem(msgspec.Struct):
+    """A granule item of a UMM-JSON search result, limited to the fields of interest."""
+    meta: _Meta
+    umm: _Umm
+
+
+class UmmSearchResults(msgspec.Struct):
+    hits: int = 0
+    items: list[UmmItem] = []
+
+
+class CmrGranule(msgspec.Struct):
+    """
+    Compact record of the fields of a CMR granule used for querying, cataloging, and auditing.
+
+    Supports item access (e.g. `granule["granule_id"]`, `granule.get("filtered_urls")`) so that it can be used
+    where granule dicts are expected.
+    """
+    granule_id: str
+    native_id: str
+    provider: str
+    production_datetime: Optional[str]
+    temporal_extent_beginning_datetime: Optional[str]
+    revision_date: str
+    revision_id: Optional[int]
+    short_name: Optional[str]
+    bounding_box: list[dict]
+    related_urls: list[str]
+    additional_attributes: dict[str, list[str]]
+    """The retained additional attributes. See `to_cmr_granule`"""
+    file_sizes: dict[str, int]
+    """Sizes (in bytes) of the granule's files, by file name, as reported by CMR"""
+    identifier: Optional[str] = None
+    filtered_urls: list[str] = []
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key: str):
+        return key in self.__struct_fields__
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+
+_search_results_decoder = msgspec.json.Decoder(UmmSearchResults)
+
+_SIZE_UNIT_BYTES = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+
+def decode_search_results(body: bytes) -> UmmSearchResults:
+    """Decodes the body of a UMM-JSON granule search response."""
+    return _search_results_decoder.decode(body)
+
+
+def parse_search_results(body: bytes) -> tuple[list[UmmItem], int]:
+    """Parses the body of a UMM-JSON granule search response into its (items, hits). See `cmr_client.parse_json`."""
+    results = decode_search_results(body)
+    return results.items, results.hits
+
+
+def to_cmr_granule(
+        item: UmmItem,
+        identifier_attribute: Optional[str] = None,
+        additional_attributes: Iterable[str] = ()
+) -> CmrGranule:
+    """
+    :param item: the decoded UMM-JSON granule item.
+    :param identifier_attribute: the name of the additional attribute holding the granule's product identifier.
+                                 e.g. "PRODUCT_URI"
+    :param additional_attributes: the names of the additional attributes to retain in the record. e.g. "SENSING_TIME"
+    """
+    umm = item.umm
+
+    geometry = umm.SpatialExtent and umm.SpatialExtent.HorizontalSpatialDomain \
+        and umm.SpatialExtent.HorizontalSpatialDomain.Geometry
+    points = geometry.GPolygons[0].Boundary.Points if geometry and geometry.GPolygons else []
+
+    identifier_values = None
+    retained_attributes = {}
+    for attribute in umm.AdditionalAttributes:
+        if attribute.Name == identifier_attribute:
+            identifier_values = attribute.Values
+        if attribute.Name in additional_attributes:
+            retained_attributes[attribute.Name] = attribute.Values
+
+    return CmrGranule(
+        granule_id=umm.GranuleUR,
+        native_id=item.meta.native_id,
+        provider=item.meta.provider_id,
+        production_datetime=umm.DataGranule.ProductionDateTime if umm.DataGranule else None,
+        temporal_extent_beginning_datetime=umm.TemporalExtent.RangeDateTime.BeginningDateTime
+        if umm.TemporalExtent and umm.TemporalExtent.RangeDateTime else None,
+        revision_date=item.meta.revision_date,
+        revision_id=item.meta.revision_id,
+        short_name=umm.Platforms[0].ShortName if umm.Platforms else None,
+        bounding_box=[{"lat": point.Latitude, "lon": point.Longitude} for point in points],
+        related_urls=[related_url.URL for related_url in umm.RelatedUrls],
+        additional_attributes=retained_attributes,
+        file_sizes=_to_file_sizes(umm),
+        identifier=identifier_values[0] if identifier_values else None
+    )
+
+
+def _to_file_sizes(umm: _Umm) -> dict[str, int]:
+    file_sizes = {}
+    for related_url in umm.RelatedUrls:
+        if related_url.Size is not None:
+            file_sizes[related_url.URL.rsplit("/", 1)[-1]] = _to_bytes(related_url.Size, related_url.SizeUnit)
+
+    for info in umm.DataGranule.ArchiveAndDistributionInformation if umm.DataGranule else []:
+        if not info.Name:
+            continue
+        if info.SizeInBytes is not None:
+            file_sizes[info.Name] = info.SizeInBytes
+        elif info.Size is not None:
+            file_sizes[info.Name] = _to_bytes(info.Size, info.SizeUnit)
+    return file_sizes
+
+
+def _to_bytes(size: float, size_unit: Optional[str]) -> int:
+    return int(size * _SIZE_UNIT_BYTES.get((size_unit or "B").upper(), 1))
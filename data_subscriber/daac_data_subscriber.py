@@ -13,8 +13,10 @@ from urllib.parse import urlparse
 
 from smart_open import open
 
+from data_subscriber import index_location_cache
 from data_subscriber.download import run_download
 from data_subscriber.hls.hls_catalog_connection import get_hls_catalog_connection
+from data_subscriber.index_location_cache import IndexLocationCache
 from data_subscriber.query import update_url_index, run_query
 from data_subscriber.survey import run_survey
 from data_subscriber.slc.slc_catalog_connection import get_slc_catalog_connection
@@ -41,10 +43,11 @@ async def run(argv: list[str]):
     netloc = urlparse(f"https://{edl}").netloc
     provider = PRODUCT_PROVIDER_MAP[args.collection] if hasattr(args, "collection") else args.provider
 
+    index_cache = create_index_location_cache(settings, provider)
     if provider == "LPCLOUD":
-        es_conn = get_hls_catalog_connection(logging.getLogger(__name__))
+        es_conn = get_hls_catalog_connection(logging.getLogger(__name__), index_cache=index_cache)
     elif provider == "ASF":
-        es_conn = get_slc_catalog_connection(logging.getLogger(__name__))
+        es_conn = get_slc_catalog_connection(logging.getLogger(__name__), index_cache=index_cache)
     else:
         raise Exception("Unreachable")
 
@@ -80,7 +83,7 @@ async def run(argv: list[str]):
 
     results = {}
     if args.subparser_name == "survey":
-        run_survey(args, token, cmr, settings)
+        await run_survey(args, token, cmr, settings)
     if args.subparser_name == "query" or args.subparser_name == "full":
         results["query"] = await run_query(args, token, es_conn, cmr, job_id, settings)
     if args.subparser_name == "download" or args.subparser_name == "full":
@@ -92,6 +95,16 @@ async def run(argv: list[str]):
     return results
 
 
+def create_index_location_cache(settings, provider):
+    cache_settings = settings.get("INDEX_LOCATION_CACHE", {})
+    cache_dir = cache_settings.get("DIR")
+    return IndexLocationCache(
+        max_size=cache_settings.get("MAX_SIZE", index_location_cache.DEFAULT_MAX_SIZE),
+        path=Path(cache_dir, f"{provider.lower()}_catalog_index_locations.sqlite3") if cache_dir else None,
+        max_age_seconds=cache_settings.get("MAX_AGE_HOURS", 24) * 60 * 60
+    )
+
+
 def create_parser():
     parser = argparse.ArgumentParser()
     subparsers = parser.add_subparsers(dest="subparser_name", required=True)
@@ -2,27 +2,33 @@ import itertools
 import json
 import logging
 import shutil
+import time
 from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import PurePath, Path
-from typing import Any, Iterable
+from typing import Any
 
-import boto3
 import dateutil.parser
 import requests
 import requests.utils
 import validators
+from boto3.s3.transfer import TransferConfig
 from cachetools.func import ttl_cache
 from smart_open import open
 
 import extractor.extract
 import product2dataset.product2dataset
-from data_subscriber import ionosphere_download
+from data_subscriber import download_manifest, https_download, ionosphere_download, transfer_scheduler
+from data_subscriber.download_manifest import DownloadManifest
+from data_subscriber.transfer_scheduler import TransferScheduler
 from data_subscriber.url import _to_granule_id, _to_orbit_number, _has_url, _to_url, _to_https_url
 from product2dataset import product2dataset
 from tools import stage_orbit_file
 from tools.stage_ionosphere_file import IonosphereFileNotFoundException
 from tools.stage_orbit_file import NoQueryResultsException
+from util import checksum_util, placement_util, s3_util
 from util.conf_util import SettingsConf
 
 logger = logging.getLogger(__name__)
@@ -62,12 +68,14 @@ class SessionWithHeaderRedirection(requests.Session):
 def run_download(args, token, es_conn, netloc, username, password, job_id):
     provider = PRODUCT_PROVIDER_MAP[args.collection] if hasattr(args, "collection") else args.provider
     download_timerange = get_download_timerange(args)
-    all_pending_downloads: Iterable[dict] = es_conn.get_all_between(
+    # the catalog is filtered to the job's batches server-side, so that each job only pages through its own chunk
+    all_pending_downloads: list[dict] = es_conn.get_all_between(
         dateutil.parser.isoparse(download_timerange.start_date),
         dateutil.parser.isoparse(download_timerange.end_date),
-        args.use_temporal
+        args.use_temporal,
+        batch_ids=args.batch_ids
     )
-    logger.info(f"{len(list(all_pending_downloads))=}")
+    logger.info(f"{len(all_pending_downloads)=}")
 
     downloads = all_pending_downloads
     if args.batch_ids:
@@ -87,15 +95,29 @@ def run_download(args, token, es_conn, netloc, username, password, job_id):
 
     session = SessionWithHeaderRedirection(username, password, netloc)
 
+    # planned by the query job. see query.update_url_index
+    planned_bytes = sum(download.get("size_in_bytes") or 0 for download in downloads if _has_url(download))
+
+    # progress of earlier attempts of this job, if any
+    manifest = download_manifest.create_download_manifest(SettingsConf().cfg, args, es=es_conn.es, job_id=job_id)
+    if manifest:
+        manifest.reconcile(es_conn)
+
     if provider == "ASF":
-        download_from_asf(session=session, es_conn=es_conn, downloads=downloads, args=args, token=token, job_id=job_id)
+        downloaded_bytes = download_from_asf(session=session, es_conn=es_conn, downloads=downloads, args=args, token=token, job_id=job_id, manifest=manifest)
     else:
         download_urls = [_to_url(download) for download in downloads if _has_url(download)]
         logger.debug(f"{download_urls=}")
 
         granule_id_to_download_urls_map = group_download_urls_by_granule_id(download_urls)
 
-        download_granules(session, es_conn, granule_id_to_download_urls_map, args, token, job_id)
+        downloaded_bytes = download_granules(session, es_conn, granule_id_to_download_urls_map, args, token, job_id,
+                                             manifest=manifest)
+
+    if manifest:
+        manifest.complete()
+
+    logger.info(f"{planned_bytes=:,}, {downloaded_bytes=:,}")
 
 
 def get_download_timerange(args):
@@ -113,19 +135,24 @@ def download_from_asf(
         downloads: list[dict],
         args,
         token,
-        job_id
-):
+        job_id,
+        manifest: DownloadManifest = None
+) -> int:
+    """Returns the number of bytes downloaded. Products completed by earlier attempts of the job, as recorded in the
+    given manifest, are not downloaded again."""
     settings_cfg = SettingsConf().cfg  # has metadata extractor config
+    transfer_config = s3_util.create_transfer_config(settings_cfg.get("S3_TRANSFER_CONFIG", {}))
     logger.info("Creating directories to process products")
     provider = PRODUCT_PROVIDER_MAP[args.collection] if hasattr(args, "collection") else args.provider
 
     # house all file downloads
-    downloads_dir = Path("downloads")
-    downloads_dir.mkdir(exist_ok=True)
+    downloads_dir = manifest.downloads_dir if manifest else Path("downloads")
+    downloads_dir.mkdir(parents=True, exist_ok=True)
 
     if args.dry_run:
         logger.info(f"{args.dry_run=}. Skipping downloads.")
 
+    downloaded_bytes = 0
     for download in downloads:
         if not _has_url(download):
             continue
@@ -137,6 +164,9 @@ def download_from_asf(
 
         logger.info(f"Processing {product_url=}")
         product_id = PurePath(product_url).name
+        if manifest and manifest.is_dataset_complete(product_id):
+            logger.info(f"Skipping product completed by an earlier attempt. {product_id=}")
+            continue
 
         product_download_dir = downloads_dir / product_id
         product_download_dir.mkdir(exist_ok=True)
@@ -146,25 +176,6 @@ def download_from_asf(
             logger.debug(f"{args.dry_run=}. Skipping download.")
             continue
 
-        if product_url.startswith("s3"):
-            product = product_filepath = download_product_using_s3(
-                product_url,
-                token,
-                target_dirpath=product_download_dir.resolve(),
-                args=args
-            )
-        else:
-            product = product_filepath = download_asf_product(
-                product_url, token, product_download_dir
-            )
-
-        logger.info(f"{product_filepath=}")
-
-        logger.info(f"Marking as downloaded. {product_url=}")
-        es_conn.mark_product_as_downloaded(product_url, job_id)
-
-        logger.info(f"product_url_downloaded={product_url}")
-
         additional_metadata = {}
         try:
             additional_metadata['processing_mode'] = download['processing_mode']
@@ -176,57 +187,174 @@ def download_from_asf(
                 logger.info("adding additional dataset metadata (intersects_north_america)")
                 additional_metadata["intersects_north_america"] = True
 
-        dataset_dir = extract_one_to_one(product, settings_cfg, working_dir=Path.cwd(),
-                                         extra_metadata=additional_metadata)
+        # orbit and ionosphere files are looked up by the product's file name, so they are staged while the product
+        # downloads, and moved into the dataset once it is extracted
+        product_filepath = product_download_dir.resolve() / product_id
+        completed_product_filepath = manifest.get_completed_product(product_url) if manifest else None
+        stage_timings = _StageTimings(product_id)
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="asf_staging") as staging_executor:
+            product_future = None
+            if completed_product_filepath:
+                logger.info(f"Skipping download of product completed by an earlier attempt. {product_id=}")
+            else:
+                product_future = staging_executor.submit(
+                    stage_timings.timed, "download_product",
+                    _download_asf_or_s3_product, product_url, token, product_download_dir, args, transfer_config
+                )
+            orbit_dir = product_download_dir / "orbit"
+            orbit_future = staging_executor.submit(
+                stage_timings.timed, "stage_orbit_file",
+                _stage_orbit_file, product_filepath, orbit_dir, settings_cfg
+            )
+            ionosphere_dir = product_download_dir / "ionosphere"
+            ionosphere_future = None
+            if additional_metadata.get("intersects_north_america", False) \
+                    and additional_metadata['processing_mode'] in ("historical", "reprocessing"):
+                logger.info(f"Processing mode is {additional_metadata['processing_mode']}. Attempting to download ionosphere correction file.")
+                ionosphere_future = staging_executor.submit(
+                    stage_timings.timed, "stage_ionosphere_file",
+                    _stage_ionosphere_file, product_filepath, ionosphere_dir
+                )
+
+            if product_future:
+                product = product_filepath = product_future.result()
+                logger.info(f"{product_filepath=}")
+                downloaded_bytes += _get_file_size(product_filepath)
+                if manifest:
+                    manifest.record_product(product_url, product_filepath)
+
+                logger.info(f"Marking as downloaded. {product_url=}")
+                es_conn.mark_product_as_downloaded(product_url, job_id)
+            else:
+                product = product_filepath = completed_product_filepath
+
+            logger.info(f"product_url_downloaded={product_url}")
+
+            with stage_timings.stage("extract"):
+                dataset_dir = extract_one_to_one(product, settings_cfg, working_dir=Path.cwd(),
+                                                 extra_metadata=additional_metadata)
+
+                update_pending_dataset_with_index_name(dataset_dir)
+
+            with stage_timings.stage("wait_for_orbit_file"):
+                orbit_future.result()
+            _move_to_dataset_dir(orbit_dir, dataset_dir)
+            logger.info("Added orbit file to dataset")
+
+            if ionosphere_future:
+                try:
+                    with stage_timings.stage("wait_for_ionosphere_file"):
+                        output_ionosphere_filepath, ionosphere_url = ionosphere_future.result()
+                    moved_filepaths = _move_to_dataset_dir(ionosphere_dir, dataset_dir)
+                    output_ionosphere_filepath = moved_filepaths[output_ionosphere_filepath.name]
+
+                    # add ionosphere metadata to the dataset about to be ingested
+                    ionosphere_metadata = ionosphere_download.generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url=ionosphere_url, s3_bucket="...", s3_key="...")
+                    update_pending_dataset_metadata_with_ionosphere_metadata(dataset_dir, ionosphere_metadata)
+                except IonosphereFileNotFoundException:
+                    logger.warning("Ionosphere file not found remotely. Allowing job to continue.")
+                    pass
+
+        if manifest:
+            manifest.record_dataset(product_id, dataset_dir)
+        stage_timings.log()
+
+        if not (manifest and manifest.retain_downloads):
+            logger.info(f"Removing {product_filepath}")
+            product_filepath.unlink(missing_ok=True)
+
+    logger.info(f"Removing directory tree. {downloads_dir}")
+    shutil.rmtree(downloads_dir)
 
-        update_pending_dataset_with_index_name(dataset_dir)
+    return downloaded_bytes
 
-        logger.info("Downloading associated orbit file")
 
-        try:
-            logger.info(f"Querying for Precise Ephemeris Orbit (POEORB) file")
-            stage_orbit_file_args = stage_orbit_file.get_parser().parse_args(
-                [
-                    f"--output-directory={str(dataset_dir)}",
-                    "--orbit-type=POEORB",
-                    f"--query-time-range={settings_cfg.get('POE_ORBIT_TIME_RANGE', stage_orbit_file.DEFAULT_POE_TIME_RANGE)}",
-                    str(product_filepath)
-                ]
-            )
-            stage_orbit_file.main(stage_orbit_file_args)
-        except NoQueryResultsException:
-            logger.warning("POEORB file could not be found, querying for Restituted Orbit (ROEORB) file")
-            stage_orbit_file_args = stage_orbit_file.get_parser().parse_args(
-                [
-                    f"--output-directory={str(dataset_dir)}",
-                    "--orbit-type=RESORB",
-                    f"--query-time-range={settings_cfg.get('RES_ORBIT_TIME_RANGE', stage_orbit_file.DEFAULT_RES_TIME_RANGE)}",
-                    str(product_filepath)
-                ]
-            )
-            stage_orbit_file.main(stage_orbit_file_args)
+def _download_asf_or_s3_product(product_url, token, product_download_dir: Path, args,
+                                transfer_config: TransferConfig = None) -> Path:
+    if product_url.startswith("s3"):
+        return download_product_using_s3(
+            product_url,
+            token,
+            target_dirpath=product_download_dir.resolve(),
+            args=args,
+            transfer_config=transfer_config
+        )
+    return download_asf_product(product_url, token, product_download_dir)
+
 
-        logger.info("Added orbit file to dataset")
+def _stage_orbit_file(product_filepath: Path, output_dir: Path, settings_cfg: dict):
+    """Downloads the orbit file of the given product (only its file name is used), preferring POEORB over RESORB."""
+    logger.info("Downloading associated orbit file")
+    output_dir.mkdir(exist_ok=True)
+    orbit_catalog_path = settings_cfg.get("ORBIT_CATALOG", {}).get("PATH", stage_orbit_file.DEFAULT_ORBIT_CATALOG_PATH)
 
-        if additional_metadata.get("intersects_north_america", False) \
-                and additional_metadata['processing_mode'] in ("historical", "reprocessing"):
-            logger.info(f"Processing mode is {additional_metadata['processing_mode']}. Attempting to download ionosphere correction file.")
-            try:
-                output_ionosphere_filepath = ionosphere_download.download_ionosphere_correction_file(dataset_dir=dataset_dir, product_filepath=product_filepath)
-                ionosphere_url = ionosphere_download.get_ionosphere_correction_file_url(dataset_dir=dataset_dir, product_filepath=product_filepath)
+    try:
+        logger.info(f"Querying for Precise Ephemeris Orbit (POEORB) file")
+        stage_orbit_file_args = stage_orbit_file.get_parser().parse_args(
+            [
+                f"--output-directory={str(output_dir)}",
+                "--orbit-type=POEORB",
+                f"--query-time-range={settings_cfg.get('POE_ORBIT_TIME_RANGE', stage_orbit_file.DEFAULT_POE_TIME_RANGE)}",
+                f"--catalog={orbit_catalog_path}",
+                str(product_filepath)
+            ]
+        )
+        stage_orbit_file.main(stage_orbit_file_args)
+    except NoQueryResultsException:
+        logger.warning("POEORB file could not be found, querying for Restituted Orbit (ROEORB) file")
+        stage_orbit_file_args = stage_orbit_file.get_parser().parse_args(
+            [
+                f"--output-directory={str(output_dir)}",
+                "--orbit-type=RESORB",
+                f"--query-time-range={settings_cfg.get('RES_ORBIT_TIME_RANGE', stage_orbit_file.DEFAULT_RES_TIME_RANGE)}",
+                f"--catalog={orbit_catalog_path}",
+                str(product_filepath)
+            ]
+        )
+        stage_orbit_file.main(stage_orbit_file_args)
 
-                # add ionosphere metadata to the dataset about to be ingested
-                ionosphere_metadata = ionosphere_download.generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url=ionosphere_url, s3_bucket="...", s3_key="...")
-                update_pending_dataset_metadata_with_ionosphere_metadata(dataset_dir, ionosphere_metadata)
-            except IonosphereFileNotFoundException:
-                logger.warning("Ionosphere file not found remotely. Allowing job to continue.")
-                pass
 
-        logger.info(f"Removing {product_filepath}")
-        product_filepath.unlink(missing_ok=True)
+def _stage_ionosphere_file(product_filepath: Path, output_dir: Path) -> tuple[PurePath, str]:
+    """Downloads the ionosphere correction file of the given product (only its file name is used).
 
-    logger.info(f"Removing directory tree. {downloads_dir}")
-    shutil.rmtree(downloads_dir)
+    :return: the path and URL of the ionosphere correction file.
+    """
+    output_dir.mkdir(exist_ok=True)
+    output_ionosphere_filepath, ionosphere_url = ionosphere_download.download_ionosphere_correction_file(dataset_dir=output_dir, product_filepath=product_filepath)
+    return output_ionosphere_filepath, ionosphere_url
+
+
+def _move_to_dataset_dir(staging_dir: Path, dataset_dir: PurePath) -> dict[str, Path]:
+    """Moves the files staged in the given directory into the dataset. Returns the new paths, by file name."""
+    moved_filepaths = {}
+    for staged_filepath in staging_dir.iterdir():
+        moved_filepaths[staged_filepath.name] = staged_filepath.replace(Path(dataset_dir) / staged_filepath.name)
+    return moved_filepaths
+
+
+class _StageTimings:
+    """Records the duration of each stage of processing a product, including stages running concurrently."""
+    def __init__(self, product_id: str):
+        self.product_id = product_id
+        self.durations_seconds: dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations_seconds[name] = time.perf_counter() - start
+
+    def timed(self, name: str, fn, /, *args, **kwargs):
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def log(self):
+        total_seconds = time.perf_counter() - self._start
+        durations = ", ".join(f"{name}={seconds:.1f}s" for name, seconds in self.durations_seconds.items())
+        logger.info(f"Stage timings. product_id={self.product_id}, {durations}, total={total_seconds:.1f}s")
 
 
 def update_pending_dataset_with_index_name(dataset_dir: PurePath):
@@ -270,13 +398,16 @@ def download_granules(
         granule_id_to_product_urls_map: dict[str, list[str]],
         args,
         token,
-        job_id
-):
+        job_id,
+        manifest: DownloadManifest = None
+) -> int:
+    """Returns the number of bytes downloaded. Products and granules completed by earlier attempts of the job, as
+    recorded in the given manifest, are not downloaded again."""
     cfg = SettingsConf().cfg  # has metadata extractor config
     logger.info("Creating directories to process granules")
     # house all file downloads
-    downloads_dir = Path("downloads")
-    downloads_dir.mkdir(exist_ok=True)
+    downloads_dir = manifest.downloads_dir if manifest else Path("downloads")
+    downloads_dir.mkdir(parents=True, exist_ok=True)
 
     if args.dry_run:
         logger.info(f"{args.dry_run=}. Skipping downloads.")
@@ -284,40 +415,106 @@ def download_granules(
     if args.smoke_run:
         granule_id_to_product_urls_map = dict(itertools.islice(granule_id_to_product_urls_map.items(), 1))
 
-    for granule_id, product_urls in granule_id_to_product_urls_map.items():
-        logger.info(f"Processing {granule_id=}")
-
-        granule_download_dir = downloads_dir / granule_id
-        granule_download_dir.mkdir(exist_ok=True)
-
-        # download products in granule
-        products = []
-        product_urls_downloaded = []
-        for product_url in product_urls:
+    transfer_settings = cfg.get("DOWNLOAD_TRANSFERS", {})
+    scheduler = TransferScheduler(
+        max_s3_transfers=transfer_settings.get("MAX_S3_TRANSFERS", transfer_scheduler.DEFAULT_MAX_S3_TRANSFERS),
+        max_https_transfers=transfer_settings.get("MAX_HTTPS_TRANSFERS", transfer_scheduler.DEFAULT_MAX_HTTPS_TRANSFERS)
+    )
+    transfer_config = s3_util.create_transfer_config(cfg.get("S3_TRANSFER_CONFIG", {}))
+
+    # granules are extracted one at a time (extractions share the "extracts" working directory), in the background,
+    # while the products of the next granule are downloaded
+    downloaded_bytes = 0
+    extraction = None
+    with scheduler, ThreadPoolExecutor(max_workers=1, thread_name_prefix="extraction") as extraction_executor:
+        for granule_id, product_urls in granule_id_to_product_urls_map.items():
+            logger.info(f"Processing {granule_id=}")
+            if manifest and manifest.is_dataset_complete(granule_id):
+                logger.info(f"Skipping granule completed by an earlier attempt. {granule_id=}")
+                continue
+
+            granule_download_dir = downloads_dir / granule_id
+            granule_download_dir.mkdir(exist_ok=True)
+
+            # download products in granule
+            product_urls_downloaded = [] if args.dry_run else product_urls
             if args.dry_run:
                 logger.debug(f"{args.dry_run=}. Skipping download.")
-                break
-            product_filepath = download_product(product_url, session, token, args, granule_download_dir)
-            products.append(product_filepath)
-            product_urls_downloaded.append(product_url)
-        logger.info(f"{products=}")
+            completed_products = _get_completed_products(manifest, product_urls_downloaded)
+            product_futures = {
+                product_url: scheduler.submit(
+                    _to_transfer_protocol(product_url, args),
+                    download_product, product_url, session, token, args, granule_download_dir,
+                    transfer_config=transfer_config
+                )
+                for product_url in product_urls_downloaded
+                if product_url not in completed_products
+            }
+            downloaded_products = {product_url: future.result() for product_url, future in product_futures.items()}
+            products = [completed_products.get(product_url) or downloaded_products[product_url]
+                        for product_url in product_urls_downloaded]
+            downloaded_bytes += sum(_get_file_size(product) for product in downloaded_products.values())
+            logger.info(f"{products=}, {len(completed_products)=}")
+
+            logger.info(f"Marking as downloaded. {granule_id=}")
+            for product_url, product in downloaded_products.items():
+                if manifest:
+                    manifest.record_product(product_url, product)
+                es_conn.mark_product_as_downloaded(product_url, job_id)
+
+            logger.info(f"{len(product_urls_downloaded)=}, {product_urls_downloaded=}")
+
+            if extraction:
+                extraction.result()  # surface failures of the previous granule before moving on
+            extraction = extraction_executor.submit(_extract_granule, products, granule_id, cfg, granule_download_dir,
+                                                    manifest)
+
+        if extraction:
+            extraction.result()
+
+    logger.info(f"Removing directory tree. {downloads_dir}")
+    shutil.rmtree(downloads_dir)
 
-        logger.info(f"Marking as downloaded. {granule_id=}")
-        for product_url in product_urls_downloaded:
-            es_conn.mark_product_as_downloaded(product_url, job_id)
+    return downloaded_bytes
 
-        logger.info(f"{len(product_urls_downloaded)=}, {product_urls_downloaded=}")
 
-        extract_many_to_one(products, granule_id, cfg)
+def _extract_granule(products: list[Path], granule_id: str, settings_cfg: dict, granule_download_dir: Path,
+                     manifest: DownloadManifest = None):
+    retain_downloads = manifest is not None and manifest.retain_downloads
+    extract_many_to_one(products, granule_id, settings_cfg, allow_rename=not retain_downloads)
+    if manifest:
+        manifest.record_dataset(granule_id, Path(granule_id))
 
+    if not retain_downloads:
         logger.info(f"Removing directory {granule_download_dir}")
         shutil.rmtree(granule_download_dir)
 
-    logger.info(f"Removing directory tree. {downloads_dir}")
-    shutil.rmtree(downloads_dir)
 
+def _get_completed_products(manifest: DownloadManifest, product_urls: list[str]) -> dict[str, Path]:
+    """Returns the files of the given products completed by earlier attempts of the job, by URL."""
+    if not manifest:
+        return {}
+    completed_products = {product_url: manifest.get_completed_product(product_url) for product_url in product_urls}
+    return {product_url: product for product_url, product in completed_products.items() if product}
 
-def download_product(product_url, session: requests.Session, token: str, args, target_dirpath: Path):
+
+def _to_transfer_protocol(product_url: str, args) -> str:
+    """Returns the protocol `download_product` transfers the given URL with."""
+    transfer_protocol = args.transfer_protocol.lower()
+    if transfer_protocol == "auto":
+        return "s3" if product_url.startswith("s3") else "https"
+    return transfer_protocol
+
+
+def _get_file_size(filepath) -> int:
+    try:
+        return Path(filepath).stat().st_size
+    except OSError:
+        return 0
+
+
+def download_product(product_url, session: requests.Session, token: str, args, target_dirpath: Path,
+                     transfer_config: TransferConfig = None):
     if args.transfer_protocol.lower() == "https":
         product_filepath = download_product_using_https(
             product_url,
@@ -330,7 +527,8 @@ def download_product(product_url, session: requests.Session, token: str, args, t
             product_url,
             token,
             target_dirpath=target_dirpath.resolve(),
-            args=args
+            args=args,
+            transfer_config=transfer_config
         )
     elif args.transfer_protocol.lower() == "auto":
         if product_url.startswith("s3"):
@@ -338,7 +536,8 @@ def download_product(product_url, session: requests.Session, token: str, args, t
                 product_url,
                 token,
                 target_dirpath=target_dirpath.resolve(),
-                args=args
+                args=args,
+                transfer_config=transfer_config
             )
         else:
             product_filepath = download_product_using_https(
@@ -354,22 +553,24 @@ def download_product(product_url, session: requests.Session, token: str, args, t
 def download_asf_product(product_url, token: str, target_dirpath: Path):
     logger.info(f"Requesting from {product_url}")
 
-    asf_response = _handle_url_redirect(product_url, token)
-    asf_response.raise_for_status()
-
     product_filename = PurePath(product_url).name
     product_download_path = target_dirpath / product_filename
-    with open(product_download_path, "wb") as file:
-        file.write(asf_response.content)
+    https_download.download_file(
+        product_url,
+        product_download_path,
+        request=lambda headers: _handle_url_redirect(product_url, token, headers=headers),
+        checksum_algos=checksum_util.DEFAULT_CHECKSUM_ALGOS
+    )
     return product_download_path.resolve()
 
 
-def extract_many_to_one(products: list[Path], group_dataset_id, settings_cfg: dict):
+def extract_many_to_one(products: list[Path], group_dataset_id, settings_cfg: dict, allow_rename=True):
     """Creates a dataset for each of the given products, merging them into 1 final dataset.
 
     :param products: the products to create datasets for.
     :param group_dataset_id: a unique identifier for the group of products.
     :param settings_cfg: the settings.yaml config as a dict.
+    :param allow_rename: whether the products can be moved into the dataset, i.e. whether they are deleted afterwards.
     """
     # house all datasets / extracted metadata
     extracts_dir = Path("extracts")
@@ -398,8 +599,8 @@ def extract_many_to_one(products: list[Path], group_dataset_id, settings_cfg: di
     target_dataset_dir = Path(group_dataset_id)
     target_dataset_dir.mkdir(exist_ok=True)
     for product in products:
-        shutil.copy(product, target_dataset_dir.resolve())
-    logger.info("Copied input products to dataset directory")
+        placement_util.place_file_in_dir(product, target_dataset_dir.resolve(), allow_rename=allow_rename)
+    logger.info(f"Placed input products in dataset directory. {placement_util.stats}")
 
     logger.info("update merged *.met.json with additional, top-level metadata")
     merged_met_dict.update(shared_met_entries_dict)
@@ -458,28 +659,30 @@ def extract_one_to_one(product: Path, settings_cfg: dict, working_dir: Path, ext
     return PurePath(dataset_dir)
 
 
-def download_product_using_https(url, session: requests.Session, token, target_dirpath: Path, chunk_size=25600) -> Path:
-    headers = {"Echo-Token": token}
-    with session.get(url, headers=headers) as r:
-        r.raise_for_status()
-
-        file_name = PurePath(url).name
-        product_download_path = target_dirpath / file_name
-        with open(product_download_path, "wb") as output_file:
-            output_file.write(r.content)
-        return product_download_path.resolve()
+def download_product_using_https(url, session: requests.Session, token, target_dirpath: Path,
+                                 chunk_size=https_download.DEFAULT_CHUNK_SIZE) -> Path:
+    file_name = PurePath(url).name
+    product_download_path = target_dirpath / file_name
+    https_download.download_file(
+        url,
+        product_download_path,
+        request=lambda headers: session.get(url, headers={"Echo-Token": token, **headers}, stream=True),
+        chunk_size=chunk_size,
+        checksum_algos=checksum_util.DEFAULT_CHECKSUM_ALGOS
+    )
+    return product_download_path.resolve()
 
 
-def download_product_using_s3(url, token, target_dirpath: Path, args) -> Path:
+def download_product_using_s3(url, token, target_dirpath: Path, args, transfer_config: TransferConfig = None) -> Path:
     provider = PRODUCT_PROVIDER_MAP[args.collection] if hasattr(args, "collection") else args.provider
     aws_creds = _get_aws_creds(token, provider)
     logger.debug(f"{_get_aws_creds.cache_info()=}")
 
-    s3 = boto3.Session(aws_access_key_id=aws_creds['accessKeyId'],
-                       aws_secret_access_key=aws_creds['secretAccessKey'],
-                       aws_session_token=aws_creds['sessionToken'],
-                       region_name='us-west-2').client("s3")
-    product_download_path = _s3_download(url, s3, str(target_dirpath))
+    s3 = s3_util.get_s3_client(aws_access_key_id=aws_creds['accessKeyId'],
+                               aws_secret_access_key=aws_creds['secretAccessKey'],
+                               aws_session_token=aws_creds['sessionToken'],
+                               region_name='us-west-2')
+    product_download_path = _s3_download(url, s3, str(target_dirpath), transfer_config=transfer_config)
     return product_download_path.resolve()
 
 
@@ -492,22 +695,25 @@ def _https_transfer(url, bucket_name, token, staging_area=""):
 
     try:
         logger.info(f"Requesting from {url}")
-        r = _handle_url_redirect(url, token)
-        if r.status_code != 200:
-            r.raise_for_status()
-
-        with open("https.tmp", "wb") as file:
-            file.write(r.content)
+        download_path = Path(f"{file_name}.https.tmp")
+        download_stats = https_download.download_file(
+            url,
+            download_path,
+            request=lambda headers: _handle_url_redirect(url, token, headers=headers)
+        )
 
         logger.info(f"Uploading {file_name} to {bucket=}, {key=}")
-        with open("https.tmp", "rb") as file:
-            s3 = boto3.client("s3")
+        with open(download_path, "rb") as file:
+            s3 = s3_util.get_s3_client()
             s3.upload_fileobj(file, bucket, key)
+        download_path.unlink()
 
         upload_end_time = datetime.utcnow()
         upload_duration = upload_end_time - upload_start_time
         upload_stats = {"file_name": file_name,
-                        "file_size (in bytes)": r.headers.get("Content-Length"),
+                        "file_size (in bytes)": download_stats.size_in_bytes,
+                        "download_throughput (in MB/s)": download_stats.mb_per_second,
+                        "download_retries": download_stats.retries,
                         "upload_duration (in seconds)": upload_duration.total_seconds(),
                         "upload_start_time": _convert_datetime(upload_start_time),
                         "upload_end_time": _convert_datetime(upload_end_time)}
@@ -519,14 +725,15 @@ def _https_transfer(url, bucket_name, token, staging_area=""):
         return {"failed_download": e}
 
 
-def _handle_url_redirect(url, token):
+def _handle_url_redirect(url, token, headers=None):
+    """Returns the streamed response of the URL that `url` redirects to."""
     if not validators.url(url):
         raise Exception(f"Malformed URL: {url}")
 
     r = requests.get(url, allow_redirects=False)
 
-    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
-    return requests.get(r.headers["Location"], headers=headers, allow_redirects=True)
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/json", **(headers or {})}
+    return requests.get(r.headers["Location"], headers=headers, allow_redirects=True, stream=True)
 
 
 def _convert_datetime(datetime_obj, strformat="%Y-%m-%dT%H:%M:%S.%fZ"):
@@ -582,7 +789,7 @@ def _s3_transfer(url, bucket_name, s3, tmp_dir, staging_area=""):
         return {"failed_download": e}
 
 
-def _s3_download(url, s3, tmp_dir, staging_area=""):
+def _s3_download(url, s3, tmp_dir, staging_area="", transfer_config: TransferConfig = None):
     file_name = PurePath(url).name
     target_key = str(Path(staging_area, file_name))
 
@@ -590,7 +797,7 @@ def _s3_download(url, s3, tmp_dir, staging_area=""):
     source_bucket = source[0]
     source_key = source[2]
 
-    s3.download_file(source_bucket, source_key, f"{tmp_dir}/{target_key}")
+    s3.download_file(source_bucket, source_key, f"{tmp_dir}/{target_key}", Config=transfer_config)
 
     return Path(f"{tmp_dir}/{target_key}")
 
@@ -600,8 +807,7 @@ def _s3_upload(url, bucket_name, tmp_dir, staging_area=""):
     target_key = str(Path(staging_area, file_name))
     target_bucket = bucket_name[len("s3://"):] if bucket_name.startswith("s3://") else bucket_name
 
-    target_s3 = boto3.resource("s3")
-    target_s3.Bucket(target_bucket).upload_file(f"{tmp_dir}/{target_key}", target_key)
+    s3_util.get_s3_client().upload_file(f"{tmp_dir}/{target_key}", target_bucket, target_key)
 
     return target_key
 
@@ -0,0 +1,180 @@
+import heapq
+import logging
+import math
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FILE_SIZE_BYTES = 100 * 1024 ** 2
+DEFAULT_PLANNING_WINDOW_JOBS = 4
+
+
+@dataclass
+class DownloadChunk:
+    """The batches of a single download job."""
+    batches: list[tuple[str, set[str]]] = field(default_factory=list)
+    """(batch ID, URLs) of each batch"""
+    planned_bytes: int = 0
+    """Total size of the files of the batches"""
+
+
+class DownloadChunkPlanner:
+    """
+    Groups download batches (e.g. HLS granules or SLC products) into download jobs (chunks).
+
+    Without a byte budget, batches are chunked by count, in arrival order (at most `max_batches_per_job` per chunk).
+
+    With a byte budget, batches are bin-packed by the size of their files, so that each chunk downloads roughly
+    `byte_budget` bytes: chunks are planned once a window of `planning_window_jobs` budgets worth of batches is
+    pending, and batches are assigned largest first to the least loaded chunk (LPT scheduling), which balances the
+    chunks of a window.
+    """
+    def __init__(
+            self,
+            /,
+            max_batches_per_job: int,
+            byte_budget: Optional[int] = None,
+            max_jobs: Optional[int] = None,
+            default_file_size_bytes: int = DEFAULT_FILE_SIZE_BYTES,
+            planning_window_jobs: int = DEFAULT_PLANNING_WINDOW_JOBS
+    ):
+        """
+        :param max_batches_per_job: the max number of batches per chunk.
+        :param byte_budget: the target number of bytes per chunk. Batches are chunked by count when not provided.
+        :param max_jobs: the max number of chunks planned over the lifetime of the planner. Unlimited when not provided.
+                         Once reached, the remaining batches are spread across the final chunks regardless of the
+                         other limits.
+        :param default_file_size_bytes: the size assumed for files of unknown size.
+        :param planning_window_jobs: the number of chunks worth of batches to hold before planning.
+        """
+        self.max_batches_per_job = max_batches_per_job
+        self.byte_budget = byte_budget
+        self.max_jobs = max_jobs
+        self.default_file_size_bytes = default_file_size_bytes
+        self.planning_window_jobs = planning_window_jobs
+
+        self._urls: dict[str, set[str]] = defaultdict(set)
+        self._file_sizes: dict[str, dict[str, int]] = defaultdict(dict)
+
+        self.planned_bytes: list[int] = []
+        """Planned bytes of each chunk popped so far"""
+
+    def __len__(self):
+        return len(self._urls)
+
+    def add(self, batch_id: str, urls: Iterable[str], file_sizes: dict[str, Optional[int]]):
+        """
+        :param batch_id: the ID of the batch the URLs belong to.
+        :param urls: the URLs to download.
+        :param file_sizes: the size (in bytes) of files, by file name. URLs sharing a file name (e.g. the HTTPS and S3
+                           URL of a file) are only counted once.
+        """
+        for url in urls:
+            filename = Path(url).name
+            size = file_sizes.get(filename)
+            self._urls[batch_id].add(url)
+            self._file_sizes[batch_id][filename] = size if size is not None else self.default_file_size_bytes
+
+    def pop_full_chunks(self) -> list[DownloadChunk]:
+        """Returns the chunks that are ready to submit. Partially filled chunks are held back."""
+        remaining_jobs = self._remaining_jobs()
+        if remaining_jobs is not None and remaining_jobs <= 1:
+            return []  # the last job takes all remaining batches
+
+        if not self.byte_budget:
+            chunk_count = len(self._urls) // self.max_batches_per_job
+            if remaining_jobs is not None:
+                chunk_count = min(chunk_count, remaining_jobs - 1)
+            chunks = []
+            for _ in range(chunk_count):
+                batch_ids = list(self._urls)[:self.max_batches_per_job]
+                chunks.append(self._pop_chunk(batch_ids))
+            return chunks
+
+        pending_bytes = self._pending_bytes()
+        if pending_bytes < self.byte_budget * self.planning_window_jobs \
+                and len(self._urls) < self.max_batches_per_job * self.planning_window_jobs:
+            return []
+
+        chunk_count = max(pending_bytes // self.byte_budget, math.ceil(len(self._urls) / self.max_batches_per_job))
+        if remaining_jobs is not None:
+            chunk_count = min(chunk_count, remaining_jobs - 1)
+        return self._plan(chunk_count, self.max_batches_per_job)
+
+    def pop_remaining_chunks(self) -> list[DownloadChunk]:
+        """Returns chunks for all pending batches."""
+        if not self._urls:
+            return []
+
+        chunk_count = math.ceil(len(self._urls) / self.max_batches_per_job)
+        if self.byte_budget:
+            chunk_count = max(chunk_count, math.ceil(self._pending_bytes() / self.byte_budget))
+
+        max_batches_per_job = self.max_batches_per_job
+        remaining_jobs = self._remaining_jobs()
+        if remaining_jobs is not None and chunk_count > max(remaining_jobs, 1):
+            max_batches_per_job = math.ceil(len(self._urls) / max(remaining_jobs, 1))
+            # fewer chunks may hold all batches at the raised limit. never plan empty chunks
+            chunk_count = math.ceil(len(self._urls) / max_batches_per_job)
+
+        if not self.byte_budget:
+            return [self._pop_chunk(list(self._urls)[:max_batches_per_job]) for _ in range(chunk_count)]
+        return self._plan(chunk_count, max_batches_per_job)
+
+    def log_summary(self):
+        if not self.planned_bytes:
+            return
+        logger.info(f"Planned {len(self.planned_bytes)} download job(s). "
+                    f"total_bytes={sum(self.planned_bytes):,}, min_bytes={min(self.planned_bytes):,}, "
+                    f"median_bytes={int(statistics.median(self.planned_bytes)):,}, "
+                    f"max_bytes={max(self.planned_bytes):,}, {self.byte_budget=}")
+
+    def _plan(self, chunk_count: int, max_batches_per_job: int) -> list[DownloadChunk]:
+        """Assigns all pending batches to `chunk_count` chunks, largest batch first, each to the least loaded chunk."""
+        if chunk_count <= 0:
+            return []
+
+        batch_bytes = {batch_id: sum(sizes.values()) for batch_id, sizes in self._file_sizes.items()}
+        chunk_batch_ids = [[] for _ in range(chunk_count)]
+        heap = [(0, i) for i in range(chunk_count)]  # (planned bytes, chunk index)
+        for batch_id in sorted(batch_bytes, key=batch_bytes.get, reverse=True):
+            if not heap:
+                break  # all chunks are full. leave the remaining batches pending
+            load, i = heapq.heappop(heap)
+            chunk_batch_ids[i].append(batch_id)
+            if len(chunk_batch_ids[i]) < max_batches_per_job:
+                heapq.heappush(heap, (load + batch_bytes[batch_id], i))
+
+        return [self._pop_chunk(batch_ids) for batch_ids in chunk_batch_ids if batch_ids]
+
+    def _pop_chunk(self, batch_ids: list[str]) -> DownloadChunk:
+        chunk = DownloadChunk()
+        for batch_id in batch_ids:
+            chunk.batches.append((batch_id, self._urls.pop(batch_id)))
+            chunk.planned_bytes += sum(self._file_sizes.pop(batch_id).values())
+        self.planned_bytes.append(chunk.planned_bytes)
+        return chunk
+
+    def _pending_bytes(self) -> int:
+        return sum(sum(sizes.values()) for sizes in self._file_sizes.values())
+
+    def _remaining_jobs(self) -> Optional[int]:
+        return self.max_jobs - len(self.planned_bytes) if self.max_jobs else None
+
+
+def to_file_sizes(granule) -> dict[str, int]:
+    """
+    Returns the sizes (in bytes) of the given granule's files to download, by file name, as reported by CMR.
+
+    When CMR reports sizes under other names than the downloaded file name (e.g. the SAFE name rather than the zip
+    name), the total size is attributed to a single downloaded file.
+    """
+    file_sizes = granule.get("file_sizes") or {}
+    filenames = {Path(url).name for url in granule.get("filtered_urls") or []}
+    if len(filenames) == 1 and file_sizes and not filenames & file_sizes.keys():
+        return {filenames.pop(): sum(file_sizes.values())}
+    return {filename: file_sizes[filename] for filename in filenames if filename in file_sizes}
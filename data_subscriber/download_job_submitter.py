@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+
+import backoff
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_SUBMISSIONS_PER_SECOND = 20
+DEFAULT_MAX_TRIES = 3
+
+
+class DownloadJobSubmitter:
+    """
+    Submits download jobs from a bounded thread pool, at a limited rate, retrying failed submissions with
+    exponential backoff.
+
+    Callers must call `close()` (or use the submitter as a context manager) once all submissions have completed, to
+    release the thread pool and log submission metrics.
+    """
+    def __init__(
+            self,
+            submit: Callable[..., str],
+            /,
+            max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+            max_submissions_per_second: float = DEFAULT_MAX_SUBMISSIONS_PER_SECOND,
+            max_tries: int = DEFAULT_MAX_TRIES
+    ):
+        """
+        :param submit: submits a single job, returning its job ID. e.g. `query.submit_download_job`
+        :param max_concurrency: the max number of submissions in flight.
+        :param max_submissions_per_second: the max rate at which submissions (including retries) are started.
+        :param max_tries: the number of times a submission is attempted before giving up.
+        """
+        self._submit = submit
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="download_job_submitter")
+        self._rate_limiter = RateLimiter(max_submissions_per_second)
+        self._submit_with_retries = backoff.on_exception(
+            backoff.expo,
+            exception=Exception,
+            max_tries=max_tries,
+            jitter=None,
+            on_backoff=self._on_backoff
+        )(self._submit_once)
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.failed = 0
+        self.retries = 0
+        self.latencies_seconds: list[float] = []
+        self._t0 = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, loop: asyncio.AbstractEventLoop, **kwargs) -> asyncio.Future:
+        """Schedules the submission of a job. The returned future resolves to the job ID."""
+        return loop.run_in_executor(self._executor, partial(self._submit_and_record, **kwargs))
+
+    def close(self):
+        """Waits for pending submissions and logs submission metrics."""
+        self._executor.shutdown(wait=True)
+
+        elapsed_seconds = time.perf_counter() - self._t0
+        latencies = sorted(self.latencies_seconds)
+        p50 = statistics.median(latencies) if latencies else 0.0
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        logger.info(f"{self.submitted=}, {self.failed=}, {self.retries=}, "
+                    f"submissions/sec={self.submitted / elapsed_seconds if elapsed_seconds else 0.0:,.1f}, "
+                    f"latency p50={p50:.3f}s p95={p95:.3f}s max={latencies[-1] if latencies else 0.0:.3f}s")
+
+    def _submit_and_record(self, **kwargs) -> str:
+        try:
+            job_id = self._submit_with_retries(**kwargs)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        with self._lock:
+            self.submitted += 1
+        return job_id
+
+    def _submit_once(self, **kwargs) -> str:
+        self._rate_limiter.acquire()
+        t0 = time.perf_counter()
+        job_id = self._submit(**kwargs)
+        latency_seconds = time.perf_counter() - t0
+        with self._lock:
+            self.latencies_seconds.append(latency_seconds)
+        logger.debug(f"Submitted job. {job_id=}, {latency_seconds=:.3f}")
+        return job_id
+
+    def _on_backoff(self, details):
+        with self._lock:
+            self.retries += 1
+        logger.warning(f"Retrying job submission in {details['wait']:.1f}s. tries={details['tries']}, "
+                       f"error={details.get('exception')!r}")
+
+
+class RateLimiter:
+    """Spaces out calls to `acquire()` across threads so that at most `rate` calls return per second."""
+    def __init__(self, rate: float):
+        """:param rate: the max number of calls per second. Unlimited when falsy."""
+        self.interval_seconds = 1 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval_seconds:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait_seconds = self._next - now
+            self._next = max(now, self._next) + self.interval_seconds
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
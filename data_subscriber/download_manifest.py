@@ -0,0 +1,242 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path, PurePath
+from typing import Optional
+
+from util import checksum_util
+
+null_logger = logging.getLogger('dummy')
+null_logger.addHandler(logging.NullHandler())
+null_logger.propagate = False
+
+ES_INDEX = "data_subscriber_download_manifest"
+MANIFEST_FILENAME = "download_manifest.json"
+DOWNLOADS_DIRNAME = "downloads"
+
+
+class DownloadManifest:
+    """
+    Records the progress of a download job: the product files it completed (with their size and checksums) and the
+    datasets it created from them. A retry of the job loads the manifest, skips the completed files and datasets, and
+    resumes partial downloads (see `https_download.download_file`), so that it only transfers the remaining bytes.
+
+    The manifest is saved to a local file as each file completes, and mirrored to ES as each dataset completes, so
+    that the progress of a job is visible, and the manifest survives the loss of the local file.
+
+    Manifests are keyed by the inputs of the job (see `to_manifest_key`), which stay the same across retries.
+    Datasets are recorded relative to the working directory of the job, and only those under the working directory of
+    the current attempt count as complete, as a retry may run in a new working directory, from which the datasets of
+    an earlier attempt are not published.
+    """
+    def __init__(self, key: str, /, root_dir: Path, es=None, job_id=None, retain_downloads=False, logger=None):
+        """
+        :param key: the key of the manifest. See `to_manifest_key`.
+        :param root_dir: the directory holding the manifest file and the downloads.
+        :param es: the ElasticsearchUtility to mirror the manifest to, if any.
+        :param job_id: the ID of the current attempt of the job.
+        :param retain_downloads: whether downloads must be kept until the job completes, e.g. as `root_dir` persists
+                                 across attempts of the job, and later attempts recreate datasets from them.
+        """
+        self.key = key
+        self.root_dir = root_dir
+        self.filepath = root_dir / MANIFEST_FILENAME
+        self.downloads_dir = root_dir / DOWNLOADS_DIRNAME
+        self.es = es
+        self.job_id = job_id
+        self.retain_downloads = retain_downloads
+        self.logger = logger or null_logger
+
+        self._products: dict[str, dict] = {}
+        """Completed product files by URL"""
+        self._datasets: dict[str, dict] = {}
+        """Created datasets by batch ID (e.g. granule ID)"""
+        self._lock = threading.RLock()
+
+    def load(self) -> "DownloadManifest":
+        """Loads the manifest saved by an earlier attempt of the job, from the local file, or else from ES."""
+        doc = None
+        try:
+            with open(self.filepath) as fp:
+                doc = json.load(fp)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            self.logger.warning(f"Ignoring unreadable download manifest. {self.filepath}")
+
+        if doc is None and self.es:
+            try:
+                doc = self.es.get_by_id(index=ES_INDEX, id=self.key)["_source"]
+            except:
+                self.logger.info(f"No download manifest found. {self.key=}")
+
+        if doc and doc.get("status") == "complete":
+            # a re-run of a completed job, whose datasets and downloads are gone
+            self.logger.info(f"Ignoring completed download manifest. {self.key=}")
+            doc = None
+
+        if doc:
+            self._products = {product["url"]: product for product in doc.get("products", [])}
+            self._datasets = {dataset["batch_id"]: dataset for dataset in doc.get("datasets", [])}
+            self.logger.info(f"Loaded download manifest. {self.key=}, "
+                             f"products={len(self._products)}, datasets={len(self._datasets)}")
+        return self
+
+    def reconcile(self, es_conn):
+        """
+        Reconciles the manifest with the local files and the product catalog, with a single catalog query.
+
+        Drops completed products whose files are gone or changed, and marks the remaining ones as downloaded in the
+        catalog when an earlier attempt completed them, but failed before marking them.
+
+        :param es_conn: the product catalog. e.g. HLSProductCatalog or SLCProductCatalog
+        """
+        with self._lock:
+            for url in list(self._products):
+                if self.get_completed_product(url) is None:
+                    del self._products[url]
+            if not self._products:
+                return
+
+            download_states = es_conn.get_download_states_for([PurePath(url).name for url in self._products])
+            unmarked_urls = [url for url in self._products if not download_states.get(PurePath(url).name)]
+
+        self.logger.info(f"Reconciled download manifest. products={len(self._products)}, {len(unmarked_urls)=}")
+        for url in unmarked_urls:
+            es_conn.mark_product_as_downloaded(url, self.job_id)
+
+    def get_completed_product(self, url: str) -> Optional[Path]:
+        """Returns the file of the given product, when completed by this or an earlier attempt, and unchanged since."""
+        with self._lock:
+            product = self._products.get(url)
+        if product is None:
+            return None
+
+        filepath = Path(product["filepath"])
+        try:
+            if filepath.stat().st_size != product["size_in_bytes"]:
+                return None
+        except OSError:
+            return None
+
+        cached_checksums = checksum_util.get_cached_checksums(filepath)
+        if any(cached_checksums.get(algo, checksum) != checksum for algo, checksum in product["checksums"].items()):
+            return None
+        return filepath
+
+    def record_product(self, url: str, filepath: Path):
+        """Records the file of the given product as complete. Saved to the local file only."""
+        with self._lock:
+            self._products[url] = {
+                "url": url,
+                "filepath": str(Path(filepath).resolve()),
+                "size_in_bytes": Path(filepath).stat().st_size,
+                "checksums": checksum_util.get_cached_checksums(filepath)  # computed while downloading, if at all
+            }
+            self._save()
+
+    def is_dataset_complete(self, batch_id: str) -> bool:
+        """
+        Whether the dataset of the given batch was created by this or an earlier attempt, and still exists in the
+        working directory of this attempt.
+        """
+        with self._lock:
+            dataset = self._datasets.get(batch_id)
+        if dataset is None:
+            return False
+
+        dataset_dir = PurePath(dataset["dataset_dir"])
+        if dataset_dir.is_absolute() or ".." in dataset_dir.parts:  # not under the working directory
+            return False
+        return (Path.cwd() / dataset_dir).is_dir()
+
+    def record_dataset(self, batch_id: str, dataset_dir: PurePath):
+        """
+        Records the dataset of the given batch as complete. Saved to the local file, and mirrored to ES.
+
+        :param dataset_dir: the dataset directory, under the working directory.
+        """
+        with self._lock:
+            self._datasets[batch_id] = {
+                "batch_id": batch_id,
+                "dataset_dir": os.path.relpath(Path(dataset_dir).resolve(), Path.cwd().resolve())
+            }
+            self._save()
+            self._mirror()
+
+    def complete(self):
+        """Marks the job as complete, removing the manifest file, and any downloads retained for later attempts."""
+        with self._lock:
+            self._mirror(status="complete")
+            self.filepath.unlink(missing_ok=True)
+            if self.retain_downloads:
+                shutil.rmtree(self.root_dir, ignore_errors=True)
+        self.logger.info(f"Download manifest completed. {self.key=}")
+
+    def _to_doc(self, status: str) -> dict:
+        return {
+            "status": status,
+            "products": list(self._products.values()),
+            "datasets": list(self._datasets.values()),
+            "download_job_id": str(self.job_id),
+            "creation_timestamp": datetime.now()
+        }
+
+    def _save(self):
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        tmp_filepath = self.filepath.with_name(self.filepath.name + ".tmp")
+        with open(tmp_filepath, "w") as fp:
+            json.dump(self._to_doc(status="in_progress"), fp, default=str)
+        os.replace(tmp_filepath, self.filepath)  # never leave a half-written manifest behind
+
+    def _mirror(self, status: str = "in_progress"):
+        if not self.es:
+            return
+        try:
+            self.es.index_document(index=ES_INDEX, id=self.key, body=self._to_doc(status))
+        except:
+            self.logger.warning(f"Failed to mirror download manifest to ES. {self.key=}", exc_info=True)
+
+
+def create_download_manifest(settings: dict, args, es=None, job_id=None) -> Optional[DownloadManifest]:
+    """
+    Creates the download manifest of the given job, per the DOWNLOAD_MANIFEST settings, and loads its progress.
+    Returns None when manifests are disabled.
+
+    :param settings: the settings.yaml config as a dict.
+    :param args: the download job args.
+    :param es: the ElasticsearchUtility to mirror the manifest to.
+    :param job_id: the ID of the current attempt of the job.
+    """
+    manifest_settings = settings.get("DOWNLOAD_MANIFEST", {})
+    if not manifest_settings.get("ENABLED") or args.dry_run:
+        return None
+
+    key = to_manifest_key(args)
+    if manifest_settings.get("DIR"):
+        root_dir, retain_downloads = Path(manifest_settings["DIR"]) / key, True
+    else:
+        root_dir, retain_downloads = Path("."), False
+    return DownloadManifest(
+        key, root_dir=root_dir, es=es, job_id=job_id, retain_downloads=retain_downloads,
+        logger=logging.getLogger(__name__)
+    ).load()
+
+
+def to_manifest_key(args) -> str:
+    """Returns a key identifying the downloads of a job by its inputs, which stay the same across retries."""
+    inputs = {
+        "provider": args.provider if hasattr(args, "provider") else None,
+        "collection": args.collection if hasattr(args, "collection") else None,
+        "start_date": args.start_date,
+        "end_date": args.end_date,
+        "use_temporal": args.use_temporal,
+        "batch_ids": sorted(args.batch_ids or []),
+        "transfer_protocol": args.transfer_protocol,
+        "smoke_run": args.smoke_run
+    }
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
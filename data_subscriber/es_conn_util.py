@@ -1,10 +1,17 @@
+import logging
+
 from aws_requests_auth.boto_utils import BotoAWSRequestsAuth
-from elasticsearch import RequestsHttpConnection
+from elasticsearch import RequestsHttpConnection, TransportError
 from hysds.celery import app
 from hysds_commons.elasticsearch_utils import ElasticsearchUtility
 
+logger = logging.getLogger(__name__)
+
 CONN = None
 
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PIT_KEEP_ALIVE = "2m"
+
 
 def get_es_connection(logger):
     global CONN
@@ -32,3 +39,51 @@ def get_es_connection(logger):
         else:
             CONN = ElasticsearchUtility(es_url, logger)
     return CONN
+
+
+def query_all(es, index: str, body: dict, page_size: int = DEFAULT_PAGE_SIZE,
+              keep_alive: str = DEFAULT_PIT_KEEP_ALIVE) -> list[dict]:
+    """
+    Returns all hits of a search, paged with `search_after` over a point in time (PIT), so that each request is
+    bounded by `page_size` hits, and the pages are consistent with each other.
+
+    Falls back to `ElasticsearchUtility.query` (scroll) where PIT searches are not supported (before ES 7.12).
+
+    :param es: the ElasticsearchUtility to search with.
+    :param index: the comma-separated indices (or patterns) to search. Missing indices are ignored.
+    :param body: the search body, e.g. query, sort and _source. Sorts are tie-broken by `_shard_doc`.
+    :param page_size: the number of hits per page.
+    :param keep_alive: how long the PIT is kept between pages.
+    """
+    hits = []
+    pit_id = None
+    try:
+        pit_id = es.es.open_point_in_time(index=index, keep_alive=keep_alive, ignore_unavailable=True)["id"]
+        search_after = None
+        while True:
+            page_body = {
+                **body,
+                "size": page_size,
+                "pit": {"id": pit_id, "keep_alive": keep_alive},
+                "sort": [*body.get("sort", []), {"_shard_doc": "asc"}]
+            }
+            if search_after:
+                page_body["search_after"] = search_after
+            response = es.es.search(body=page_body)
+            pit_id = response.get("pit_id", pit_id)
+            page = response["hits"]["hits"]
+            hits.extend(page)
+            if len(page) < page_size:
+                return hits
+            search_after = page[-1]["sort"]
+    except TransportError as e:
+        if hits:
+            raise
+        logger.info(f"PIT search not supported. Falling back to scroll. {e=}")
+        return es.query(index=index, ignore_unavailable=True, body=body)
+    finally:
+        if pit_id:
+            try:
+                es.es.close_point_in_time(body={"id": pit_id})
+            except TransportError:
+                logger.debug("Failed to close PIT", exc_info=True)
@@ -1,7 +1,11 @@
 import logging
+import time
 from datetime import datetime
 
+from more_itertools import chunked
+
 from data_subscriber import es_conn_util
+from data_subscriber.bulk_catalog_writer import BulkWriteResult, DEFAULT_BATCH_SIZE, bulk_write
 
 null_logger = logging.getLogger('dummy')
 null_logger.addHandler(logging.NullHandler())
@@ -39,7 +43,37 @@ class HLSSpatialProductCatalog:
             self.logger.warning(f'Granule {granule["granule_id"]} exists in DB. Returning.')
             return
 
-        doc = {
+        doc = self._to_doc(granule)
+        self._post(granule["granule_id"], doc)
+
+    def process_granules(self, granules: list[dict], batch_size: int = DEFAULT_BATCH_SIZE) -> list[BulkWriteResult]:
+        """
+        Batch variant of `process_granule`. For each batch of granules, the existing granules are looked up with a
+        single query, and the new granules are written with a single `_bulk` request. The "create" op type is used,
+        so granules written concurrently by another query are skipped by ES rather than overwritten.
+
+        :return: the result of each batch
+        """
+        results = []
+        for batch in chunked(granules, batch_size):
+            t0 = time.perf_counter()
+
+            existing = self._query_existence_many([granule["granule_id"] for granule in batch])
+            existing_ids = {result["_id"] for result in (existing or [])}
+            index = generate_es_index_name()
+            actions = [(index, granule["granule_id"], self._to_doc(granule))
+                       for granule in batch
+                       if granule["granule_id"] not in existing_ids]
+            result = bulk_write(self.es.es, "create", actions) if actions else BulkWriteResult()
+            result.conflicts += len(existing_ids)
+
+            latency_seconds = time.perf_counter() - t0
+            self.logger.info(f"Spatial catalog batch processed. {len(batch)=}, {result=}, {latency_seconds=:.3f}")
+            results.append(result)
+        return results
+
+    def _to_doc(self, granule) -> dict:
+        return {
             "id": granule["granule_id"],
             "provider": granule["provider"],
             "production_datetime": granule["production_datetime"],
@@ -48,7 +82,6 @@ class HLSSpatialProductCatalog:
             "bounding_box": granule["bounding_box"],
             "creation_timestamp": datetime.now()
         }
-        self._post(granule["granule_id"], doc)
 
     def _post(self, granule_id, body):
         result = self.es.index_document(index=generate_es_index_name(), body=body, id=granule_id)
@@ -89,3 +122,21 @@ class HLSSpatialProductCatalog:
             results = None
 
         return results
+
+    def _query_existence_many(self, ids: list[str]):
+        try:
+            results = self.es.query(
+                index=",".join(ES_INDEX_PATTERNS),
+                ignore_unavailable=True,  # EDGECASE: index might not exist yet
+                body={
+                    "query": {"bool": {"must": [{"terms": {"_id": ids}}]}},
+                    "_source": {"includes": "false", "excludes": []}  # NOTE: returned object is different than when `"includes": []` is used
+                }
+            )
+            self.logger.debug(f"Query results: {results}")
+
+        except:
+            self.logger.info(f"{len(ids)} _id(s) do not exist in {ES_INDEX_PATTERNS}")
+            results = None
+
+        return results
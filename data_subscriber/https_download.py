@@ -0,0 +1,156 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import requests
+
+from util import checksum_util
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 ** 2
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_INITIAL_BACKOFF_SECONDS = 2
+MAX_BACKOFF_SECONDS = 60
+PART_SUFFIX = ".part"
+RETRYABLE_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+    requests.exceptions.HTTPError
+)
+
+
+class IncompleteDownloadException(Exception):
+    pass
+
+
+@dataclass
+class DownloadStats:
+    url: str
+    filepath: Path
+    size_in_bytes: int = 0
+    """Size of the downloaded file"""
+    transferred_bytes: int = 0
+    """Bytes received over the network, across all attempts"""
+    duration_seconds: float = 0.0
+    retries: int = 0
+    checksums: dict[str, str] = field(default_factory=dict)
+    """Checksums of the downloaded file, by algorithm name, computed while downloading"""
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.transferred_bytes / 1024 ** 2 / self.duration_seconds if self.duration_seconds else 0.0
+
+
+def download_file(
+        url: str,
+        target_filepath: Path,
+        request: Callable[[dict], requests.Response],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        initial_backoff_seconds: float = DEFAULT_INITIAL_BACKOFF_SECONDS,
+        checksum_algos: Iterable[str] = ()
+) -> DownloadStats:
+    """
+    Streams a file to disk, `chunk_size` bytes at a time, so that memory use does not grow with the file size.
+
+    The file is written to a `.part` file next to `target_filepath`, which is renamed once its size matches the
+    Content-Length of the response. Interrupted transfers are retried with exponential backoff, resuming from the end
+    of the `.part` file with an HTTP Range request. The transfer restarts from the first byte when the server ignores
+    the Range header.
+
+    :param url: the URL of the file. Used for logging.
+    :param target_filepath: the path to download the file to.
+    :param request: issues the (streamed) GET request for the file, adding the given headers. Called once per attempt,
+                    so that short-lived redirect URLs are resolved again on retry.
+    :param chunk_size: the number of bytes to read into memory at a time.
+    :param max_retries: the number of times to retry an interrupted transfer.
+    :param initial_backoff_seconds: the delay before the first retry. Doubles with each subsequent retry.
+    :param checksum_algos: hashlib algorithms to checksum the file with as it is written, e.g. "md5" and "sha256".
+                           The checksums are cached in a sidecar file next to the file (see `util.checksum_util`), so
+                           that later steps need not re-read the file.
+    """
+    part_filepath = target_filepath.with_name(target_filepath.name + PART_SUFFIX)
+    stats = DownloadStats(url=url, filepath=target_filepath)
+    checksums = checksum_util.Checksums(checksum_algos)
+
+    start = time.perf_counter()
+    while True:
+        try:
+            _download_part(request, part_filepath, chunk_size, stats, checksums)
+            break
+        except (*RETRYABLE_EXCEPTIONS, IncompleteDownloadException) as e:
+            if stats.retries >= max_retries or not _is_retryable(e):
+                raise
+            stats.retries += 1
+            backoff_seconds = min(initial_backoff_seconds * 2 ** (stats.retries - 1), MAX_BACKOFF_SECONDS)
+            logger.warning(f"Retrying download of {url} in {backoff_seconds}s. retries={stats.retries}, {e=}")
+            time.sleep(backoff_seconds)
+    stats.duration_seconds = time.perf_counter() - start
+
+    part_filepath.replace(target_filepath)
+    stats.size_in_bytes = target_filepath.stat().st_size
+    if checksums.algos:
+        stats.checksums = checksum_util.cache_checksums(target_filepath, checksums.hexdigests(), sidecar=True)
+    logger.info(f"Downloaded {url}. size_in_bytes={stats.size_in_bytes:,}, "
+                f"MB/s={stats.mb_per_second:.1f}, retries={stats.retries}")
+    return stats
+
+
+def _download_part(request: Callable[[dict], requests.Response], part_filepath: Path, chunk_size: int,
+                   stats: DownloadStats, checksums: checksum_util.Checksums):
+    offset = part_filepath.stat().st_size if part_filepath.exists() else 0
+    if checksums.algos and checksums.size_in_bytes != offset:
+        # checksum the bytes downloaded so far, e.g. by an earlier process, before appending to them
+        checksums.reset()
+        with open(part_filepath, "rb") as file:
+            checksums.update_from_file(file, size=offset)
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with request(headers) as response:
+        if offset and response.status_code == 416:  # Range Not Satisfiable
+            if _to_total_size(response) == offset:
+                return  # the part file is already complete
+            part_filepath.unlink()
+            checksums.reset()
+            raise IncompleteDownloadException(f"Discarded {part_filepath} not matching the remote file")
+        response.raise_for_status()
+
+        if response.status_code != 206:
+            offset = 0  # Range was ignored
+            checksums.reset()
+        expected_size = _to_expected_size(response, offset)
+
+        with checksum_util.ChecksumStream(open(part_filepath, "ab" if offset else "wb"), checksums) as file:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
+                stats.transferred_bytes += len(chunk)
+
+    size = part_filepath.stat().st_size
+    if expected_size is not None and size != expected_size:
+        raise IncompleteDownloadException(f"Expected {expected_size:,} bytes, downloaded {size:,}. {part_filepath}")
+
+
+def _to_expected_size(response: requests.Response, offset: int) -> Optional[int]:
+    """Returns the expected size of the file once the response is written at `offset`, if known."""
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None  # Content-Length is the size of the encoded content
+    if offset:
+        return _to_total_size(response)
+    content_length = response.headers.get("Content-Length")
+    return int(content_length) if content_length is not None else None
+
+
+def _to_total_size(response: requests.Response) -> Optional[int]:
+    content_range = response.headers.get("Content-Range", "")  # e.g. "bytes 100-999/1000" or "bytes */1000"
+    total_size = content_range.rpartition("/")[2]
+    return int(total_size) if total_size.isdigit() else None
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return True
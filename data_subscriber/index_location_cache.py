@@ -0,0 +1,97 @@
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 100_000
+DEFAULT_MAX_AGE_SECONDS = 24 * 60 * 60
+
+
+class IndexLocationCache:
+    """
+    Maps catalog document IDs to the name of the (monthly) index holding the document, e.g.
+    "T00000.B02.tif" -> "hls_catalog-2022.01".
+
+    Lookups are served from an in-process LRU cache, backed by an optional sqlite database so that locations
+    survive across processes on the same host. Callers must only cache locations confirmed by ES (a search hit or a
+    successful write). A document is never moved to another index once written, but indices are deleted by the GRQ
+    ILM policy, so entries expire after `max_age_seconds`, which must be well below the ILM delete age.
+    """
+    def __init__(self, /, max_size: int = DEFAULT_MAX_SIZE, path: Optional[Union[str, Path]] = None,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        """
+        :param max_size: the max number of locations held in memory.
+        :param path: the path of the sqlite database to persist locations to. Locations are only held in memory
+                     when not provided.
+        :param max_age_seconds: the time after which a cached location expires.
+        """
+        self._lru = TTLCache(maxsize=max_size, ttl=max_age_seconds)
+        self._lock = threading.Lock()
+        self.max_age_seconds = max_age_seconds
+
+        self._db = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS index_location "
+                             "(id TEXT PRIMARY KEY, index_name TEXT NOT NULL, cached_at REAL NOT NULL)")
+            self._db.execute("DELETE FROM index_location WHERE cached_at < ?", (time.time() - max_age_seconds,))
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, _id: str) -> Optional[str]:
+        return self.get_many([_id]).get(_id)
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, str]:
+        """Returns the cached locations of the given IDs. IDs that are not cached are omitted."""
+        ids = list(ids)
+        with self._lock:
+            locations = {_id: self._lru[_id] for _id in ids if _id in self._lru}
+
+            missing = [_id for _id in ids if _id not in locations]
+            if missing and self._db:
+                for _id, index_name in self._select(missing):
+                    locations[_id] = index_name
+                    self._lru[_id] = index_name
+
+            self.hits += len(locations)
+            self.misses += len(ids) - len(locations)
+        return locations
+
+    def put(self, _id: str, index_name: str):
+        self.put_many({_id: index_name})
+
+    def put_many(self, locations: dict[str, str]):
+        if not locations:
+            return
+
+        with self._lock:
+            new_locations = {_id: index_name for _id, index_name in locations.items() if self._lru.get(_id) != index_name}
+            self._lru.update(new_locations)
+            if new_locations and self._db:
+                cached_at = time.time()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO index_location (id, index_name, cached_at) VALUES (?, ?, ?)",
+                    [(_id, index_name, cached_at) for _id, index_name in new_locations.items()]
+                )
+
+    def _select(self, ids: list[str]) -> list[tuple[str, str]]:
+        rows = []
+        min_cached_at = time.time() - self.max_age_seconds
+        batch_size = 500  # stay well below sqlite's max number of host parameters
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            rows.extend(self._db.execute(
+                f"SELECT id, index_name FROM index_location "
+                f"WHERE id IN ({','.join('?' * len(batch))}) AND cached_at >= ?",
+                [*batch, min_cached_at]
+            ))
+        return rows
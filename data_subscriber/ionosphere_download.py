@@ -3,27 +3,42 @@ import asyncio
 import logging
 import shutil
 import sys
-from collections import namedtuple, defaultdict
+from collections import Counter, namedtuple, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import Enum
 from functools import partial
-from pathlib import Path, PurePath
+from pathlib import Path
+from typing import Callable, Optional
 
 import backoff
-import boto3
 import dateutil.parser
 import dateutil.parser
+from botocore.exceptions import ClientError
 from hysds_commons.job_utils import submit_mozart_job
 from more_itertools import chunked, partition
 from mypy_boto3_s3 import S3Client
 
-from tools import stage_ionosphere_file
+from tools.ionosphere_file_cache import IonosphereFile, get_ionosphere_file_cache
 from tools.stage_ionosphere_file import IonosphereFileNotFoundException
-from util import grq_client as grq_client, job_util
+from util import grq_client as grq_client, job_util, s3_util
+from util.conf_util import SettingsConf
 from util.exec_util import exec_wrapper
-from util.grq_client import try_update_slc_dataset_with_ionosphere_metadata
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_CONCURRENT_DATASETS = 16
+DEFAULT_BULK_UPDATE_INTERVAL_SECONDS = 5
+STAGE_CONCURRENCY_SETTINGS = {
+    "download": ("MAX_DOWNLOADS", 4),
+    "upload": ("MAX_UPLOADS", 8),
+    "submit": ("MAX_JOB_SUBMISSIONS", 4),
+    "es_update": ("MAX_ES_UPDATES", 4)
+}
+"""The IONOSPHERE_DOWNLOAD setting, and its default, limiting the concurrency of each stage of dataset processing"""
+
 
 class NoJobUtilsFilter(logging.Filter):
 
@@ -70,9 +85,6 @@ async def run(argv: list[str]):
     parser = create_parser()
     args = parser.parse_args(argv[1:])
 
-    results = defaultdict(list)
-    exceptions = []
-
     slc_datasets = get_pending_slc_datasets(args)
     logger.info(f"{len(slc_datasets)=}")
 
@@ -80,63 +92,38 @@ async def run(argv: list[str]):
     downloads_dir = Path("downloads")  # house all file downloads
     downloads_dir.mkdir(exist_ok=True)
 
-    for i, slc_dataset in enumerate(slc_datasets, start=1):
-        product_id = slc_dataset["_id"]
-        logger.info(f"Processing {product_id=}. {i} of {len(slc_datasets)} products")
-        dataset_dir = downloads_dir / product_id
+    settings = SettingsConf().cfg.get("IONOSPHERE_DOWNLOAD", {})
+    stage_limiter = StageLimiter({
+        stage: settings.get(setting, default) for stage, (setting, default) in STAGE_CONCURRENCY_SETTINGS.items()
+    })
+    dataset_slots = asyncio.Semaphore(settings.get("MAX_CONCURRENT_DATASETS", DEFAULT_MAX_CONCURRENT_DATASETS))
+    metadata_updater = IonosphereMetadataUpdater(
+        stage_limiter,
+        bulk_update_size=settings.get("BULK_UPDATE_SIZE", grq_client.DEFAULT_BULK_UPDATE_SIZE),
+        flush_interval_seconds=settings.get("BULK_UPDATE_INTERVAL_SECONDS", DEFAULT_BULK_UPDATE_INTERVAL_SECONDS)
+    )
 
-        try:
-            dataset_dir.mkdir(exist_ok=True)
-
-            if not slc_dataset["_source"]["metadata"].get("intersects_north_america"):
-                logging.info("dataset doesn't cover North America. Skipping.")
-                continue
-
-            if not slc_dataset["_source"]["metadata"].get("processing_mode") == "forward":
-                logging.info("dataset not captured in forward processing mode. Skipping.")
-                continue
-
-            if slc_dataset["_source"]["metadata"].get("intersects_north_america") \
-                    and slc_dataset["_source"]["metadata"].get("processing_mode") == "forward":
-
-                logger.info("Downloading ionosphere correction file")
-                try:
-                    output_ionosphere_filepath = download_ionosphere_correction_file(dataset_dir, product_id)
-                except IonosphereFileNotFoundException:
-                    logger.info("Couldn't find an ionosphere correction file. Skipping to next SLC dataset.")
-                    continue
-                ionosphere_url = get_ionosphere_correction_file_url(dataset_dir, product_id)
-                logger.info(f"{output_ionosphere_filepath=}")
-                logger.info(f"{ionosphere_url=}")
-
-                slc_dataset_s3_url: str = next(iter(filter(lambda url: url.startswith("s3"), slc_dataset["_source"]["browse_urls"])))
-                logger.info(f"{slc_dataset_s3_url=}")
-
-                s3_bucket, s3_key = try_s3_upload_file(slc_dataset_s3_url, output_ionosphere_filepath)
-
-                job_submission_results = await submit_cslc_jobs([slc_dataset], args)
-
-                if job_submission_results["success"]:
-                    results["success"].extend(job_submission_results["success"])
-                elif job_submission_results["fail"]:
-                    results["fail"].extend(job_submission_results["fail"])
-                else:
-                    pass
-
-                if job_submission_results["fail"]:
-                    logging.info(f"Job submission failure result for {product_id=}. Collecting exception result. Skipping to next SLC dataset.")
-                    exceptions.extend(job_submission_results["fail"])
-                    continue
-
-                ionosphere_metadata = generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url, s3_bucket, s3_key)
-                try_update_slc_dataset_with_ionosphere_metadata(index=slc_dataset["_index"], product_id=product_id, ionosphere_metadata=ionosphere_metadata)
-        except Exception as e:
-            logging.info(f"An exception occurred while processing {product_id=}. Collecting exception. Skipping to next SLC dataset.")
-            exceptions.append(e)
-            continue
-        finally:
-            logging.info(f"Removing {dataset_dir=}")
-            shutil.rmtree(dataset_dir)
+    async def process(i, slc_dataset):
+        async with dataset_slots:
+            logger.info(f"Processing product_id={slc_dataset['_id']}. {i} of {len(slc_datasets)} products")
+            dataset_result = await process_slc_dataset(slc_dataset, args, downloads_dir, stage_limiter)
+        metadata_updater.add(dataset_result)
+        return dataset_result
+
+    with stage_limiter:
+        dataset_results: list[DatasetResult] = await asyncio.gather(
+            *(process(i, slc_dataset) for i, slc_dataset in enumerate(slc_datasets, start=1))
+        )
+        await metadata_updater.close()
+
+    results = defaultdict(list)
+    exceptions = []
+    for dataset_result in dataset_results:
+        results["success"].extend(dataset_result.job_ids)
+        results["fail"].extend(dataset_result.job_submission_failures)
+        if dataset_result.exception:
+            exceptions.append(dataset_result.exception)
+    log_dataset_results(dataset_results)
 
     if exceptions:
         logging.error(f"During job execution, {len(exceptions)} exceptions occurred. Wrapping and raising.")
@@ -152,6 +139,211 @@ async def run(argv: list[str]):
     return results
 
 
+class DatasetStatus(str, Enum):
+    SUCCESS = "success"
+    SKIPPED = "skipped"
+    """The dataset does not need an ionosphere correction file"""
+    NOT_FOUND = "not_found"
+    """No ionosphere correction file is available (yet)"""
+    FAILED = "failed"
+
+
+@dataclass
+class DatasetResult:
+    """The outcome of processing a single SLC dataset."""
+    product_id: str
+    status: DatasetStatus
+    failed_stage: Optional[str] = None
+    """The stage that failed. One of the keys of STAGE_CONCURRENCY_SETTINGS"""
+    exception: Optional[BaseException] = None
+    job_ids: list[str] = field(default_factory=list)
+    """IDs of the CSLC jobs submitted"""
+    job_submission_failures: list[BaseException] = field(default_factory=list)
+    index: Optional[str] = None
+    """The GRQ index of the dataset"""
+    ionosphere_metadata: Optional[dict] = None
+    """The ionosphere metadata to add to the dataset in GRQ, once its job is submitted"""
+
+
+class StageLimiter:
+    """
+    Runs the blocking stages of dataset processing (e.g. downloads and uploads) in a shared thread pool, with a
+    separate concurrency limit per stage, so that concurrent datasets do not overwhelm any single remote service.
+    """
+    def __init__(self, limits: dict[str, int]):
+        """
+        :param limits: the max number of concurrent calls, by stage.
+        """
+        self.limits = limits
+        self._semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in limits.items()}
+        self._executor = ThreadPoolExecutor(max_workers=sum(limits.values()), thread_name_prefix="ionosphere")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._executor.shutdown(wait=True)
+
+    async def run(self, stage: str, fn: Callable, /, *args, **kwargs):
+        """Runs `fn` in the thread pool, once a slot of the given stage is available."""
+        async with self._semaphores[stage]:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    @asynccontextmanager
+    async def slot(self, stage: str):
+        """Holds a slot of the given stage, for stages that are coroutines themselves."""
+        async with self._semaphores[stage]:
+            yield
+
+
+async def process_slc_dataset(slc_dataset: dict, args, downloads_dir: Path, stage_limiter: StageLimiter) -> DatasetResult:
+    """
+    Downloads the ionosphere correction file of the given SLC dataset, uploads it next to the dataset in S3, and
+    submits the CSLC job of the dataset. The ionosphere metadata of successful datasets is returned, to be added to
+    GRQ in bulk (see `IonosphereMetadataUpdater`).
+
+    The dataset is only updated in GRQ after the file is uploaded and the job is submitted, so that a failed dataset
+    remains pending, and is picked up again by the next run. Failures are returned rather than raised.
+    """
+    product_id = slc_dataset["_id"]
+    dataset_dir = downloads_dir / product_id
+    stage = None
+    try:
+        dataset_dir.mkdir(exist_ok=True)
+
+        if not slc_dataset["_source"]["metadata"].get("intersects_north_america"):
+            logging.info(f"dataset doesn't cover North America. Skipping. {product_id=}")
+            return DatasetResult(product_id, DatasetStatus.SKIPPED)
+
+        if not slc_dataset["_source"]["metadata"].get("processing_mode") == "forward":
+            logging.info(f"dataset not captured in forward processing mode. Skipping. {product_id=}")
+            return DatasetResult(product_id, DatasetStatus.SKIPPED)
+
+        logger.info(f"Downloading ionosphere correction file. {product_id=}")
+        stage = "download"
+        try:
+            output_ionosphere_filepath, ionosphere_url = await stage_limiter.run(
+                stage, download_ionosphere_correction_file, dataset_dir, product_id)
+        except IonosphereFileNotFoundException:
+            logger.info(f"Couldn't find an ionosphere correction file. Skipping to next SLC dataset. {product_id=}")
+            return DatasetResult(product_id, DatasetStatus.NOT_FOUND)
+        logger.info(f"{output_ionosphere_filepath=}")
+        logger.info(f"{ionosphere_url=}")
+
+        slc_dataset_s3_url: str = next(iter(filter(lambda url: url.startswith("s3"), slc_dataset["_source"]["browse_urls"])))
+        logger.info(f"{slc_dataset_s3_url=}")
+
+        stage = "upload"
+        s3_bucket, s3_key = await stage_limiter.run(stage, try_s3_upload_file, slc_dataset_s3_url, output_ionosphere_filepath)
+
+        stage = "submit"
+        async with stage_limiter.slot(stage):
+            job_submission_results = await submit_cslc_jobs([slc_dataset], args)
+        if job_submission_results["fail"]:
+            logging.info(f"Job submission failure result for {product_id=}. Collecting exception result. Skipping to next SLC dataset.")
+            return DatasetResult(
+                product_id, DatasetStatus.FAILED, failed_stage=stage,
+                exception=job_submission_results["fail"][0],
+                job_ids=job_submission_results["success"],
+                job_submission_failures=job_submission_results["fail"]
+            )
+
+        ionosphere_metadata = generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url, s3_bucket, s3_key)
+        return DatasetResult(
+            product_id, DatasetStatus.SUCCESS, job_ids=job_submission_results["success"],
+            index=slc_dataset["_index"], ionosphere_metadata=ionosphere_metadata
+        )
+    except Exception as e:
+        logging.info(f"An exception occurred while processing {product_id=}. {stage=}. Collecting exception. Skipping to next SLC dataset.")
+        return DatasetResult(product_id, DatasetStatus.FAILED, failed_stage=stage, exception=e)
+    finally:
+        logging.info(f"Removing {dataset_dir=}")
+        shutil.rmtree(dataset_dir, ignore_errors=True)
+
+
+class IonosphereMetadataUpdater:
+    """
+    Adds the ionosphere metadata of successful datasets to GRQ as the datasets complete, with a bulk request per
+    `bulk_update_size` datasets, or once the oldest buffered dataset has waited `flush_interval_seconds`. Datasets are
+    thereby marked shortly after their CSLC jobs are submitted, so that a run killed partway does not leave the
+    datasets it completed pending, to be submitted again by the next run.
+
+    Datasets that fail to update are marked as failed in the es_update stage, and remain pending. Callers must call
+    `close()` once all datasets have been added, to update the remaining datasets.
+    """
+    stage = "es_update"
+
+    def __init__(self, stage_limiter: StageLimiter, /, bulk_update_size: int = grq_client.DEFAULT_BULK_UPDATE_SIZE,
+                 flush_interval_seconds: float = DEFAULT_BULK_UPDATE_INTERVAL_SECONDS):
+        """
+        :param stage_limiter: runs the bulk updates, within the concurrency limit of the es_update stage.
+        :param bulk_update_size: the number of datasets to buffer before updating them.
+        :param flush_interval_seconds: the max time a dataset is buffered before it is updated.
+        """
+        self.stage_limiter = stage_limiter
+        self.bulk_update_size = bulk_update_size
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._buffer: list[DatasetResult] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._updates: list[asyncio.Task] = []
+
+    def add(self, dataset_result: DatasetResult):
+        """Buffers the given dataset for update, if it was processed successfully."""
+        if dataset_result.status != DatasetStatus.SUCCESS:
+            return
+
+        self._buffer.append(dataset_result)
+        if len(self._buffer) >= self.bulk_update_size:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(self.flush_interval_seconds, self._flush)
+
+    async def close(self):
+        """Updates the remaining buffered datasets, and waits for all updates to complete."""
+        self._flush()
+        await asyncio.gather(*self._updates)
+
+    def _flush(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._buffer:
+            return
+
+        chunk, self._buffer = self._buffer, []
+        self._updates.append(asyncio.ensure_future(self._update(chunk)))
+
+    async def _update(self, chunk: list[DatasetResult]):
+        try:
+            failed_updates = await self.stage_limiter.run(
+                self.stage, grq_client.update_slc_datasets_with_ionosphere_metadata,
+                [(dataset_result.index, dataset_result.product_id, dataset_result.ionosphere_metadata)
+                 for dataset_result in chunk]
+            )
+            exceptions = {product_id: RuntimeError(f"Failed to update dataset in GRQ. {error=}")
+                          for product_id, error in failed_updates.items()}
+        except Exception as e:
+            exceptions = {dataset_result.product_id: e for dataset_result in chunk}
+
+        for dataset_result in chunk:
+            if dataset_result.product_id in exceptions:
+                dataset_result.status = DatasetStatus.FAILED
+                dataset_result.failed_stage = self.stage
+                dataset_result.exception = exceptions[dataset_result.product_id]
+
+
+def log_dataset_results(dataset_results: list[DatasetResult]):
+    status_counts = dict(Counter(dataset_result.status.value for dataset_result in dataset_results))
+    failed_stage_counts = dict(Counter(dataset_result.failed_stage for dataset_result in dataset_results
+                                       if dataset_result.status == DatasetStatus.FAILED))
+    logger.info(f"Processed {len(dataset_results)} SLC datasets. {status_counts=}, {failed_stage_counts=}")
+    for dataset_result in dataset_results:
+        if dataset_result.status == DatasetStatus.FAILED:
+            logger.error(f"Failed to process product_id={dataset_result.product_id}. "
+                         f"stage={dataset_result.failed_stage}, exception={dataset_result.exception!r}")
+
+
 def generate_ionosphere_metadata(output_ionosphere_filepath, ionosphere_url, s3_bucket, s3_key):
     ionosphere_metadata = {
         "ionosphere": {
@@ -173,11 +365,25 @@ def try_s3_upload_file(slc_dataset_s3_url, output_ionosphere_filepath):
     s3_uri_tokens = slc_dataset_s3_url.split('/')
     s3_bucket = s3_uri_tokens[3]
     s3_key = '/'.join(s3_uri_tokens[5:])  # skip redundant `/browse/` fragment at index 4
-    s3_client: S3Client = boto3.client("s3")
-    s3_client.upload_file(Filename=str(output_ionosphere_filepath), Bucket=s3_bucket, Key=f"{s3_key}/{output_ionosphere_filepath.name}")
+    s3_client: S3Client = s3_util.get_s3_client()  # shared, thread-safe client
+    key = f"{s3_key}/{output_ionosphere_filepath.name}"
+    if _s3_object_size(s3_client, s3_bucket, key) == Path(output_ionosphere_filepath).stat().st_size:
+        logger.info(f"Ionosphere file already uploaded by an earlier run. Skipping upload. s3://{s3_bucket}/{key}")
+        return s3_bucket, s3_key
+    s3_client.upload_file(Filename=str(output_ionosphere_filepath), Bucket=s3_bucket, Key=key)
     return s3_bucket, s3_key
 
 
+def _s3_object_size(s3_client: S3Client, bucket: str, key: str) -> Optional[int]:
+    """Returns the size of the given S3 object, or None if it does not exist."""
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return None
+        raise
+
+
 def get_pending_slc_datasets(args):
     slc_dataset_timerange = get_arg_timerange(args)
     slc_datasets = grq_client.get_slc_datasets_without_ionosphere_data(
@@ -307,70 +513,24 @@ def get_arg_timerange(args):
 
 
 @backoff.on_exception(backoff.expo, exception=Exception, max_tries=3, jitter=None, giveup=lambda e: isinstance(e, IonosphereFileNotFoundException))
-def download_ionosphere_correction_file(dataset_dir, product_filepath):
-    logger.info("Downloading associated Ionosphere Correction file")
-    try:
-        stage_ionosphere_file_args = stage_ionosphere_file.get_parser().parse_args(
-            [
-                f"--type={stage_ionosphere_file.IONOSPHERE_TYPE_JPLG}",
-                f"--output-directory={str(dataset_dir)}",
-                str(product_filepath)
-            ]
-        )
-        output_ionosphere_file_path = stage_ionosphere_file.main(stage_ionosphere_file_args)
-        logger.info("Added JPLG Ionosphere correction file to dataset")
-    except IonosphereFileNotFoundException:
-        logger.warning("JPLG file type could not be found, querying for JPRG file type")
-        try:
-            stage_ionosphere_file_args = stage_ionosphere_file.get_parser().parse_args(
-                [
-                    f"--type={stage_ionosphere_file.IONOSPHERE_TYPE_JPRG}",
-                    f"--output-directory={str(dataset_dir)}",
-                    str(product_filepath)
-                ]
-            )
-            output_ionosphere_file_path = stage_ionosphere_file.main(stage_ionosphere_file_args)
-            logger.info("Added JPRG Ionosphere correction file to dataset")
-        except IonosphereFileNotFoundException:
-            logger.warning(f"Could not find any Ionosphere Correction file for product {product_filepath}")
-            raise
-
-    return PurePath(output_ionosphere_file_path)
+def download_ionosphere_correction_file(dataset_dir, product_filepath) -> IonosphereFile:
+    """
+    Places the ionosphere correction file of the given product (only its file name is used) in `dataset_dir`.
 
+    Files are served from the shared ionosphere file cache, so that products starting on the same day share a single
+    download of the (JPLG, or else JPRG) file of that day.
 
-@backoff.on_exception(backoff.expo, exception=Exception, max_tries=3, jitter=None, giveup=lambda e: isinstance(e, IonosphereFileNotFoundException))
-def get_ionosphere_correction_file_url(dataset_dir, product_filepath):
+    :return: the path of the placed file, and the URL it was downloaded from.
+    """
     logger.info("Downloading associated Ionosphere Correction file")
     try:
-        stage_ionosphere_file_args = stage_ionosphere_file.get_parser().parse_args(
-            [
-                f"--type={stage_ionosphere_file.IONOSPHERE_TYPE_JPLG}",
-                f"--output-directory={str(dataset_dir)}",
-                f"--url-only",
-                str(product_filepath)
-            ]
-        )
-        ionosphere_url = stage_ionosphere_file.main(stage_ionosphere_file_args)
-        logger.info("Added JPLG Ionosphere correction file to dataset")
+        ionosphere_file = get_ionosphere_file_cache(SettingsConf().cfg).place(product_filepath, dataset_dir)
     except IonosphereFileNotFoundException:
-        logger.warning("JPLG file type could not be found, querying for JPRG file type")
-        try:
-            stage_ionosphere_file_args = stage_ionosphere_file.get_parser().parse_args(
-                [
-                    f"--type={stage_ionosphere_file.IONOSPHERE_TYPE_JPRG}",
-                    f"--output-directory={str(dataset_dir)}",
-                    f"--url-only",
-                    str(product_filepath)
-                ]
-            )
-            ionosphere_url = stage_ionosphere_file.main(stage_ionosphere_file_args)
-            logger.info("Added JPRG Ionosphere correction file to dataset")
-        except IonosphereFileNotFoundException:
-            logger.warning(f"Could not find any Ionosphere Correction file for product {product_filepath}")
-            raise
-
-    return ionosphere_url
+        logger.warning(f"Could not find any Ionosphere Correction file for product {product_filepath}")
+        raise
+    logger.info(f"Added Ionosphere correction file to dataset. {ionosphere_file.filepath.name}")
 
+    return ionosphere_file
 
 if __name__ == "__main__":
     main()
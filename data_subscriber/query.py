@@ -3,19 +3,25 @@ import logging
 import re
 import uuid
 from collections import namedtuple, defaultdict
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from functools import partial
 from pathlib import Path
+from typing import Optional
 
 import dateutil.parser
-import requests
 from hysds_commons.job_utils import submit_mozart_job
-from more_itertools import map_reduce, chunked
 
+from data_subscriber import (
+    bulk_catalog_writer, cmr_client, cmr_umm, download_chunk_planner, download_job_submitter, query_checkpoint
+)
+from data_subscriber.bulk_catalog_writer import BulkCatalogWriter
+from data_subscriber.download_chunk_planner import DownloadChunk, DownloadChunkPlanner, to_file_sizes
+from data_subscriber.download_job_submitter import DownloadJobSubmitter
 from data_subscriber.hls_spatial.hls_spatial_catalog_connection import get_hls_spatial_catalog_connection
+from data_subscriber.query_checkpoint import QueryCheckpointStore
 from data_subscriber.slc_spatial.slc_spatial_catalog_connection import get_slc_spatial_catalog_connection
 from data_subscriber.url import _hls_url_to_granule_id, _slc_url_to_chunk_id
-from geo.geo_util import does_bbox_intersect_north_america
+from geo.geo_util import intersects_north_america_many
 
 DateTimeRange = namedtuple("DateTimeRange", ["start_date", "end_date"])
 PRODUCT_PROVIDER_MAP = {"HLSL30": "LPCLOUD",
@@ -29,28 +35,210 @@ async def run_query(args, token, es_conn, cmr, job_id, settings):
     now = datetime.utcnow()
     query_timerange: DateTimeRange = get_query_timerange(args, now)
 
-    granules = query_cmr(args, token, cmr, settings, query_timerange, now)
+    checkpoint_settings = settings.get("QUERY_CHECKPOINT", {})
+    checkpoint_store = None
+    if checkpoint_settings.get("ENABLED") and query_checkpoint.is_checkpointable(args):
+        checkpoint_store = QueryCheckpointStore(es_conn.es, logger=logging.getLogger(__name__))
+        query_timerange = query_checkpoint.resume_timerange(
+            query_timerange,
+            watermark=checkpoint_store.get_watermark(query_checkpoint.to_checkpoint_key(args)),
+            safety_overlap=timedelta(minutes=checkpoint_settings.get("SAFETY_OVERLAP_MINUTES", 15)),
+            max_catch_up=timedelta(hours=checkpoint_settings.get("MAX_CATCH_UP_HOURS", 24))
+        )
+        logging.info(f"Applied query checkpoint. {query_timerange=}")
+
+    schedule_download = _should_schedule_download(args)
+    job_submitter = None
+    if schedule_download:
+        logging.info(f"{args.chunk_size=}")
+        job_submitter = create_download_job_submitter(settings, args)
+
+    # group URLs by this mapping func. E.g. group URLs by granule_id
+    keyfunc = _hls_url_to_granule_id if PRODUCT_PROVIDER_MAP[args.collection] == "LPCLOUD" else _slc_url_to_chunk_id
+    chunk_planner = create_download_chunk_planner(settings, args)
+
+    job_submission_tasks = []
+    loop = asyncio.get_event_loop()
+
+    catalog_writer_settings = settings.get("CATALOG_WRITER", {})
+    catalog_writer = BulkCatalogWriter(
+        es_conn,
+        batch_size=catalog_writer_settings.get("BATCH_SIZE", bulk_catalog_writer.DEFAULT_BATCH_SIZE),
+        flush_interval_seconds=catalog_writer_settings.get(
+            "FLUSH_INTERVAL_SECONDS", bulk_catalog_writer.DEFAULT_FLUSH_INTERVAL_SECONDS),
+        max_retries=catalog_writer_settings.get("MAX_RETRIES", bulk_catalog_writer.DEFAULT_MAX_RETRIES)
+    )
+
+    if PRODUCT_PROVIDER_MAP[args.collection] == "LPCLOUD":
+        spatial_catalog_conn = get_hls_spatial_catalog_connection(logging.getLogger(__name__))
+    else:
+        spatial_catalog_conn = get_slc_spatial_catalog_connection(logging.getLogger(__name__))
+
+    # explicit re-runs (e.g. of a time range or native ID) re-submit everything they find
+    skip_unchanged_granules = (catalog_writer_settings.get("SKIP_UNCHANGED_GRANULES", True)
+                               and query_checkpoint.is_checkpointable(args))
+    granules_unchanged = 0
+    granules_changed = 0
+
+    # granules are indexed (in a worker thread) page by page while the next CMR pages are fetched,
+    # and download jobs are submitted as soon as a full chunk of batches is available
+    granule_pages = iter_query_cmr(args, token, cmr, settings, query_timerange, now)
+    try:
+        async for granules in granule_pages:
+            if args.smoke_run:
+                logging.info(f"{args.smoke_run=}. Restricting to 1 granule(s).")
+                granules = granules[:1]
+
+            if skip_unchanged_granules:
+                changed_granules = await loop.run_in_executor(
+                    executor=None,
+                    func=partial(drop_unchanged_granules, es_conn, granules)
+                )
+                granules_unchanged += len(granules) - len(changed_granules)
+                granules_changed += len(changed_granules)
+                granules = changed_granules
+
+            download_urls = await loop.run_in_executor(
+                executor=None,
+                func=partial(index_granules, args, catalog_writer, spatial_catalog_conn, granules, job_id, query_dt,
+                             spatial_batch_size=catalog_writer.batch_size)
+            )
+
+            if not schedule_download:
+                continue
+
+            file_sizes = {}
+            for granule in granules:
+                file_sizes.update(to_file_sizes(granule))
+            for url in download_urls:
+                chunk_planner.add(keyfunc(url), [url], file_sizes)
+
+            chunks = chunk_planner.pop_full_chunks()
+            if chunks:
+                # download jobs look up their batches in the catalog
+                await loop.run_in_executor(executor=None, func=catalog_writer.flush)
+            for chunk in chunks:
+                job_submission_tasks.append(
+                    _submit_download_job_chunk(job_submitter, loop, args, query_timerange, chunk)
+                )
+
+            if args.smoke_run:
+                break
+    finally:
+        await granule_pages.aclose()
+        await loop.run_in_executor(executor=None, func=catalog_writer.close)
+        if skip_unchanged_granules:
+            logging.info(f"{granules_changed=}, {granules_unchanged=}")
+
+    if not schedule_download:
+        _save_checkpoint(checkpoint_store, args, query_timerange, job_id)
+        return
+
+    # submit the remaining, partial chunks
+    for chunk in chunk_planner.pop_remaining_chunks():
+        job_submission_tasks.append(
+            _submit_download_job_chunk(job_submitter, loop, args, query_timerange, chunk)
+        )
+    chunk_planner.log_summary()
+
+    results = await asyncio.gather(*job_submission_tasks, return_exceptions=True)
+    await loop.run_in_executor(executor=None, func=job_submitter.close)
+    logging.info(f"{len(results)=}")
+    logging.info(f"{results=}")
+
+    succeeded = [job_id for job_id in results if isinstance(job_id, str)]
+    logging.info(f"{succeeded=}")
+    failed = [e for e in results if isinstance(e, Exception)]
+    logging.info(f"{failed=}")
+
+    if not failed:
+        _save_checkpoint(checkpoint_store, args, query_timerange, job_id)
+
+    return {
+        "success": succeeded,
+        "fail": failed
+    }
+
+
+def _save_checkpoint(checkpoint_store, args, query_timerange: DateTimeRange, job_id):
+    """Records the end of the given, fully processed, query time range as the watermark of the next query."""
+    if checkpoint_store is None:
+        return
+
+    checkpoint_store.set_watermark(
+        query_checkpoint.to_checkpoint_key(args),
+        dateutil.parser.isoparse(query_timerange.end_date),
+        job_id
+    )
 
-    if args.smoke_run:
-        logging.info(f"{args.smoke_run=}. Restricting to 1 granule(s).")
-        granules = granules[:1]
 
+def _should_schedule_download(args) -> bool:
+    if args.subparser_name == "full":
+        logging.info(f"{args.subparser_name=}. Skipping download job submission.")
+        return False
+
+    if args.no_schedule_download:
+        logging.info(f"{args.no_schedule_download=}. Skipping download job submission.")
+        return False
+
+    if not args.chunk_size:
+        logging.info(f"{args.chunk_size=}. Skipping download job submission.")
+        return False
+
+    return True
+
+
+def drop_unchanged_granules(es_conn, granules: list[dict]) -> list[dict]:
+    """
+    Drops the granules whose files were all downloaded, and whose CMR revision date has not advanced since, i.e.
+    granules fully processed after being found by a previous (overlapping) query. Granules that were only cataloged
+    (e.g. their download job submission failed) are kept, so that their download jobs are submitted again. The
+    revision dates of all the given granules are looked up with a single query.
+    """
+    granule_filenames = [{Path(url).name for url in granule.get("filtered_urls") or []} for granule in granules]
+    revision_dates = es_conn.get_downloaded_revision_dates_for(sorted(set().union(*granule_filenames)))
+
+    changed_granules = []
+    for granule, filenames in zip(granules, granule_filenames):
+        revision_date = _to_utc(dateutil.parser.isoparse(granule["revision_date"]))
+        if filenames and all(filename in revision_dates and _to_utc(revision_dates[filename]) >= revision_date
+                             for filename in filenames):
+            logging.debug(f"Skipping unchanged granule. {granule['granule_id']=}")
+            continue
+        changed_granules.append(granule)
+    return changed_granules
+
+
+def _to_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def index_granules(args, es_conn, spatial_catalog_conn, granules: list[dict], job_id, query_dt: datetime,
+                   spatial_batch_size: int = bulk_catalog_writer.DEFAULT_BATCH_SIZE) -> list[str]:
+    """Indexes the given granules into the product and spatial catalogs, returning the URLs to download."""
     download_urls: list[str] = []
+    indexed_granules: list[dict] = []
+
+    if args.proc_mode == "historical" or PRODUCT_PROVIDER_MAP[args.collection] == "ASF":
+        granules_intersect_north_america = intersects_north_america_many(
+            [granule["bounding_box"] for granule in granules])
+    else:
+        granules_intersect_north_america = [False] * len(granules)
 
-    for granule in granules:
+    for granule, intersects_north_america in zip(granules, granules_intersect_north_america):
         additional_fields = {}
 
         additional_fields["processing_mode"] = args.proc_mode
 
         # If processing mode is historical,
         # throw out any granules that do not intersect with North America
-        if args.proc_mode == "historical" and not does_bbox_intersect_north_america(granule["bounding_box"]):
+        if args.proc_mode == "historical" and not intersects_north_america:
             logging.info(f"Processing mode is historical and the following granule does not intersect with \
 North America. Skipping processing. %s" % granule.get("granule_id"))
             continue
 
         if PRODUCT_PROVIDER_MAP[args.collection] == "ASF":
-            if does_bbox_intersect_north_america(granule["bounding_box"]):
+            if intersects_north_america:
                 additional_fields["intersects_north_america"] = True
 
         update_url_index(
@@ -61,129 +249,109 @@ North America. Skipping processing. %s" % granule.get("granule_id"))
             query_dt,
             temporal_extent_beginning_dt=dateutil.parser.isoparse(granule["temporal_extent_beginning_datetime"]),
             revision_date_dt=dateutil.parser.isoparse(granule["revision_date"]),
+            file_sizes=to_file_sizes(granule),
             **additional_fields
         )
 
-        if PRODUCT_PROVIDER_MAP[args.collection] == "LPCLOUD":
-            spatial_catalog_conn = get_hls_spatial_catalog_connection(logging.getLogger(__name__))
-            update_granule_index(spatial_catalog_conn, granule)
-        elif PRODUCT_PROVIDER_MAP[args.collection] == "ASF":
-            spatial_catalog_conn = get_slc_spatial_catalog_connection(logging.getLogger(__name__))
-            update_granule_index(spatial_catalog_conn, granule)
+        indexed_granules.append(granule)
 
         if granule.get("filtered_urls"):
             download_urls.extend(granule.get("filtered_urls"))
 
-    if args.subparser_name == "full":
-        logging.info(f"{args.subparser_name=}. Skipping download job submission.")
-        return
+    update_granule_index(spatial_catalog_conn, indexed_granules, batch_size=spatial_batch_size)
 
-    if args.no_schedule_download:
-        logging.info(f"{args.no_schedule_download=}. Skipping download job submission.")
-        return
+    return download_urls
 
-    if not args.chunk_size:
-        logging.info(f"{args.chunk_size=}. Skipping download job submission.")
-        return
 
-    # group URLs by this mapping func. E.g. group URLs by granule_id
-    keyfunc = _hls_url_to_granule_id if PRODUCT_PROVIDER_MAP[args.collection] == "LPCLOUD" else _slc_url_to_chunk_id
-    batch_id_to_urls_map: dict[str, set[str]] = map_reduce(
-        iterable=download_urls,
-        keyfunc=keyfunc,
-        valuefunc=lambda url: url,
-        reducefunc=set
+def create_download_job_submitter(settings, args) -> DownloadJobSubmitter:
+    submitter_settings = settings.get("DOWNLOAD_JOB_SUBMITTER", {})
+    return DownloadJobSubmitter(
+        submit_download_job,
+        max_concurrency=submitter_settings.get("MAX_CONCURRENCY", download_job_submitter.DEFAULT_MAX_CONCURRENCY),
+        max_submissions_per_second=submitter_settings.get(
+            "MAX_SUBMISSIONS_PER_SECOND", download_job_submitter.DEFAULT_MAX_SUBMISSIONS_PER_SECOND),
+        max_tries=submitter_settings.get("MAX_TRIES", download_job_submitter.DEFAULT_MAX_TRIES)
     )
 
-    logging.info(f"{batch_id_to_urls_map=}")
-    job_submission_tasks = []
-    loop = asyncio.get_event_loop()
-    logging.info(f"{args.chunk_size=}")
-    for batch_chunk in chunked(batch_id_to_urls_map.items(), n=args.chunk_size):
-        chunk_id = str(uuid.uuid4())
-        logging.info(f"{chunk_id=}")
-
-        chunk_batch_ids = []
-        chunk_urls = []
-        for batch_id, urls in batch_chunk:
-            chunk_batch_ids.append(batch_id)
-            chunk_urls.extend(urls)
-
-        logging.info(f"{chunk_batch_ids=}")
-        logging.info(f"{chunk_urls=}")
 
-        job_submission_tasks.append(
-            loop.run_in_executor(
-                executor=None,
-                func=partial(
-                    submit_download_job,
-                    release_version=args.release_version,
-                    provider=PRODUCT_PROVIDER_MAP[args.collection],
-                    params=[
-                        {
-                            "name": "batch_ids",
-                            "value": "--batch-ids " + " ".join(chunk_batch_ids) if chunk_batch_ids else "",
-                            "from": "value"
-                        },
-                        {
-                            "name": "smoke_run",
-                            "value": "--smoke-run" if args.smoke_run else "",
-                            "from": "value"
-                        },
-                        {
-                            "name": "dry_run",
-                            "value": "--dry-run" if args.dry_run else "",
-                            "from": "value"
-                        },
-                        {
-                            "name": "endpoint",
-                            "value": f"--endpoint={args.endpoint}",
-                            "from": "value"
-                        },
-                        {
-                            "name": "start_datetime",
-                            "value": f"--start-date={query_timerange.start_date}",
-                            "from": "value"
-                        },
-                        {
-                            "name": "end_datetime",
-                            "value": f"--end-date={query_timerange.end_date}",
-                            "from": "value"
-                        },
-                        {
-                            "name": "use_temporal",
-                            "value": "--use-temporal" if args.use_temporal else "",
-                            "from": "value"
-                        },
-                        {
-                            "name": "transfer_protocol",
-                            "value": f"--transfer-protocol={args.transfer_protocol}",
-                            "from": "value"
-                        },
-                        {
-                            "name": "proc_mode",
-                            "value": f"--processing-mode={args.proc_mode}",
-                            "from": "value"
-                        }
-                    ],
-                    job_queue=args.job_queue
-                )
-            )
-        )
-
-    results = await asyncio.gather(*job_submission_tasks, return_exceptions=True)
-    logging.info(f"{len(results)=}")
-    logging.info(f"{results=}")
+def create_download_chunk_planner(settings, args) -> DownloadChunkPlanner:
+    planner_settings = settings.get("DOWNLOAD_CHUNK_PLANNER", {})
+    return DownloadChunkPlanner(
+        max_batches_per_job=args.chunk_size or 1,
+        byte_budget=planner_settings.get("BYTE_BUDGET", {}).get(PRODUCT_PROVIDER_MAP[args.collection]),
+        max_jobs=planner_settings.get("MAX_JOBS"),
+        default_file_size_bytes=planner_settings.get("DEFAULT_FILE_SIZE_BYTES", {}).get(
+            PRODUCT_PROVIDER_MAP[args.collection], download_chunk_planner.DEFAULT_FILE_SIZE_BYTES)
+    )
 
-    succeeded = [job_id for job_id in results if isinstance(job_id, str)]
-    logging.info(f"{succeeded=}")
-    failed = [e for e in results if isinstance(e, Exception)]
-    logging.info(f"{failed=}")
 
-    return {
-        "success": succeeded,
-        "fail": failed
-    }
+def _submit_download_job_chunk(job_submitter: DownloadJobSubmitter, loop, args, query_timerange: DateTimeRange,
+                               chunk: DownloadChunk):
+    chunk_id = str(uuid.uuid4())
+    logging.info(f"{chunk_id=}, {len(chunk.batches)=}, {chunk.planned_bytes=:,}")
+
+    chunk_batch_ids = []
+    chunk_urls = []
+    for batch_id, urls in chunk.batches:
+        chunk_batch_ids.append(batch_id)
+        chunk_urls.extend(urls)
+
+    logging.info(f"{chunk_batch_ids=}")
+    logging.info(f"{chunk_urls=}")
+
+    return job_submitter.submit(
+        loop,
+        release_version=args.release_version,
+        provider=PRODUCT_PROVIDER_MAP[args.collection],
+        params=[
+            {
+                "name": "batch_ids",
+                "value": "--batch-ids " + " ".join(chunk_batch_ids) if chunk_batch_ids else "",
+                "from": "value"
+            },
+            {
+                "name": "smoke_run",
+                "value": "--smoke-run" if args.smoke_run else "",
+                "from": "value"
+            },
+            {
+                "name": "dry_run",
+                "value": "--dry-run" if args.dry_run else "",
+                "from": "value"
+            },
+            {
+                "name": "endpoint",
+                "value": f"--endpoint={args.endpoint}",
+                "from": "value"
+            },
+            {
+                "name": "start_datetime",
+                "value": f"--start-date={query_timerange.start_date}",
+                "from": "value"
+            },
+            {
+                "name": "end_datetime",
+                "value": f"--end-date={query_timerange.end_date}",
+                "from": "value"
+            },
+            {
+                "name": "use_temporal",
+                "value": "--use-temporal" if args.use_temporal else "",
+                "from": "value"
+            },
+            {
+                "name": "transfer_protocol",
+                "value": f"--transfer-protocol={args.transfer_protocol}",
+                "from": "value"
+            },
+            {
+                "name": "proc_mode",
+                "value": f"--processing-mode={args.proc_mode}",
+                "from": "value"
+            }
+        ],
+        job_queue=args.job_queue
+    )
 
 
 def get_query_timerange(args, now: datetime, silent=False):
@@ -199,7 +367,40 @@ def get_query_timerange(args, now: datetime, silent=False):
     return query_timerange
 
 
-def query_cmr(args, token, cmr, settings, timerange: DateTimeRange, now: datetime, silent=False) -> list:
+async def query_cmr(args, token, cmr, settings, timerange: DateTimeRange, now: datetime, silent=False) -> list:
+    product_granules = []
+    async for granules in iter_query_cmr(args, token, cmr, settings, timerange, now, silent):
+        product_granules.extend(granules)
+
+    if args.collection in settings["SHORTNAME_FILTERS"]:
+        if not silent:
+            logging.info(f"Found {str(len(product_granules))} total granules")
+
+    return product_granules
+
+
+async def iter_query_cmr(args, token, cmr, settings, timerange: DateTimeRange, now: datetime, silent=False):
+    """Queries CMR, yielding the filtered granules of each page of results as soon as the page is fetched."""
+    request_url, params = _to_search_params(args, token, cmr, timerange, now, silent)
+
+    granule_pages = _request_search(args, request_url, params, settings)
+    try:
+        async for product_granules in granule_pages:
+            if args.collection in settings["SHORTNAME_FILTERS"]:
+                product_granules = [granule
+                                    for granule in product_granules
+                                    if _match_identifier(settings, args, granule)]
+
+            for granule in product_granules:
+                granule["filtered_urls"] = _filter_granules(granule, args)
+
+            if product_granules:
+                yield product_granules
+    finally:
+        await granule_pages.aclose()
+
+
+def _to_search_params(args, token, cmr, timerange: DateTimeRange, now: datetime, silent=False) -> tuple[str, dict]:
     page_size = 2000
     request_url = f"https://{cmr}/search/granules.umm_json"
     bounding_box = args.bbox
@@ -246,24 +447,7 @@ def query_cmr(args, token, cmr, settings, timerange: DateTimeRange, now: datetim
 
     if not silent:
         logging.info(f"{request_url=} {params=}")
-    product_granules, search_after = _request_search(args, request_url, params)
-
-    while search_after:
-        granules, search_after = _request_search(args, request_url, params, search_after=search_after)
-        product_granules.extend(granules)
-
-    if args.collection in settings["SHORTNAME_FILTERS"]:
-        product_granules = [granule
-                            for granule in product_granules
-                            if _match_identifier(settings, args, granule)]
-
-        if not silent:
-            logging.info(f"Found {str(len(product_granules))} total granules")
-
-    for granule in product_granules:
-        granule["filtered_urls"] = _filter_granules(granule, args)
-
-    return product_granules
+    return request_url, params
 
 
 def _get_temporal_range(start: str, end: str, now: str):
@@ -280,44 +464,33 @@ def _get_temporal_range(start: str, end: str, now: str):
         return "1900-01-01T00:00:00Z,{}".format(now)
 
 
-def _request_search(args, request_url, params, search_after=None):
-    response = requests.get(request_url, params=params, headers={"CMR-Search-After": search_after}) \
-        if search_after else requests.get(request_url, params=params)
+async def _request_search(args, request_url, params, settings):
+    """Fetches the pages of the given CMR search concurrently, yielding the de-duplicated granules of each page."""
+    cmr_query_settings = settings.get("CMR_QUERY", {})
+    granule_pages = cmr_client.async_iter_search(
+        request_url,
+        params,
+        range_param="temporal" if args.use_temporal else "revision_date",
+        parse=cmr_umm.parse_search_results,
+        decode=partial(_to_granules, args),
+        key=lambda granule: granule["granule_id"],
+        max_concurrency=cmr_query_settings.get("MAX_CONCURRENCY", cmr_client.DEFAULT_MAX_CONCURRENCY),
+        max_pages_per_window=cmr_query_settings.get("MAX_PAGES_PER_WINDOW", cmr_client.DEFAULT_MAX_PAGES_PER_WINDOW),
+        max_buffered_pages=cmr_query_settings.get("MAX_BUFFERED_PAGES", cmr_client.DEFAULT_MAX_BUFFERED_PAGES)
+    )
+    try:
+        async for granules in granule_pages:
+            yield granules
+    finally:
+        await granule_pages.aclose()
 
-    results = response.json()
-    items = results.get("items")
-    next_search_after = response.headers.get("CMR-Search-After")
 
+def _to_granules(args, items: list[cmr_umm.UmmItem]) -> list[cmr_umm.CmrGranule]:
     collection_identifier_map = {"HLSL30": "LANDSAT_PRODUCT_ID",
                                  "HLSS30": "PRODUCT_URI"}
 
-    if items and "umm" in items[0]:
-        return [{"granule_id": item.get("umm").get("GranuleUR"),
-                 "provider": item.get("meta").get("provider-id"),
-                 "production_datetime": item.get("umm").get("DataGranule").get("ProductionDateTime"),
-                 "temporal_extent_beginning_datetime": item["umm"]["TemporalExtent"]["RangeDateTime"][
-                     "BeginningDateTime"],
-                 "revision_date": item["meta"]["revision-date"],
-                 "short_name": item.get("umm").get("Platforms")[0].get("ShortName"),
-                 "bounding_box": [
-                     {"lat": point.get("Latitude"), "lon": point.get("Longitude")}
-                     for point
-                     in item.get("umm")
-                         .get("SpatialExtent")
-                         .get("HorizontalSpatialDomain")
-                         .get("Geometry")
-                         .get("GPolygons")[0]
-                         .get("Boundary")
-                         .get("Points")
-                 ],
-                 "related_urls": [url_item.get("URL") for url_item in item.get("umm").get("RelatedUrls")],
-                 "identifier": next(attr.get("Values")[0]
-                                    for attr in item.get("umm").get("AdditionalAttributes")
-                                    if attr.get("Name") == collection_identifier_map[
-                                        args.collection]) if args.collection in collection_identifier_map else None}
-                for item in items], next_search_after
-    else:
-        return [], None
+    identifier_attribute = collection_identifier_map.get(args.collection)
+    return [cmr_umm.to_cmr_granule(item, identifier_attribute) for item in items]
 
 
 def _filter_granules(granule, args):
@@ -389,8 +562,13 @@ def update_url_index(
         temporal_extent_beginning_dt: datetime,
         revision_date_dt: datetime,
         *args,
+        file_sizes: Optional[dict[str, int]] = None,
         **kwargs
 ):
+    """
+    :param file_sizes: the size (in bytes) of files, by file name. Recorded as `size_in_bytes` in the catalog, for
+                       comparing planned and actual download sizes.
+    """
     # group pairs of URLs (http and s3) by filename
     filename_to_urls_map = defaultdict(list)
     for url in urls:
@@ -398,8 +576,9 @@ def update_url_index(
         filename_to_urls_map[filename].append(url)
 
     for filename, filename_urls in filename_to_urls_map.items():
-        es_conn.process_url(filename_urls, granule_id, job_id, query_dt, temporal_extent_beginning_dt, revision_date_dt, *args, **kwargs)
+        size_fields = {"size_in_bytes": file_sizes[filename]} if file_sizes and filename in file_sizes else {}
+        es_conn.process_url(filename_urls, granule_id, job_id, query_dt, temporal_extent_beginning_dt, revision_date_dt, *args, **kwargs, **size_fields)
 
 
-def update_granule_index(es_spatial_conn, granule, *args, **kwargs):
-    es_spatial_conn.process_granule(granule, *args, **kwargs)
+def update_granule_index(es_spatial_conn, granules: list[dict], *args, **kwargs):
+    es_spatial_conn.process_granules(granules, *args, **kwargs)
@@ -0,0 +1,93 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+import dateutil.parser
+from elasticsearch.exceptions import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+null_logger = logging.getLogger('dummy')
+null_logger.addHandler(logging.NullHandler())
+null_logger.propagate = False
+
+ES_INDEX = "data_subscriber_query_checkpoint"
+
+DEFAULT_SAFETY_OVERLAP = timedelta(minutes=15)
+DEFAULT_MAX_CATCH_UP = timedelta(hours=24)
+
+
+class QueryCheckpointStore:
+    """
+    Persists the revision date watermark of periodic (cron) queries in ES, i.e. the end of the most recent
+    revision date range that was fully queried and ingested.
+
+    Watermarks are keyed by collection, endpoint and processing mode. See `to_checkpoint_key`.
+    """
+    def __init__(self, /, es, logger=None):
+        """
+        :param es: the ElasticsearchUtility to store checkpoints with.
+        """
+        self.logger = logger or null_logger
+        self.es = es
+
+    def get_watermark(self, key: str) -> Optional[datetime]:
+        """Returns the watermark of the given key, or None if there is no checkpoint. Other ES errors are raised."""
+        try:
+            doc = self.es.get_by_id(index=ES_INDEX, id=key)
+        except NotFoundError:
+            self.logger.info(f"No query checkpoint found. {key=}")
+            return None
+        return dateutil.parser.isoparse(doc["_source"]["revision_date_watermark"])
+
+    def set_watermark(self, key: str, watermark: datetime, job_id=None):
+        self.es.index_document(
+            index=ES_INDEX,
+            id=key,
+            body={
+                "revision_date_watermark": watermark.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "query_job_id": str(job_id),
+                "creation_timestamp": datetime.now()
+            }
+        )
+        self.logger.info(f"Query checkpoint saved. {key=}, {watermark=!s}")
+
+
+def to_checkpoint_key(args) -> str:
+    return f"{args.collection}-{args.endpoint}-{args.proc_mode}"
+
+
+def is_checkpointable(args) -> bool:
+    """Checkpoints only apply to queries whose revision date range is derived from `--minutes`."""
+    return not (args.start_date or args.end_date or args.native_id or args.use_temporal or args.smoke_run)
+
+
+def resume_timerange(query_timerange, watermark: Optional[datetime], safety_overlap: timedelta = DEFAULT_SAFETY_OVERLAP,
+                     max_catch_up: timedelta = DEFAULT_MAX_CATCH_UP):
+    """
+    Returns the given query time range, with its start moved to the given watermark minus a safety overlap (which
+    covers granules that become visible in CMR late). This narrows the range when the previous query overlaps this
+    one, and widens it to catch up when previous queries were missed.
+
+    Catching up is limited to `max_catch_up` per query: after a long outage, the end of the range is moved back so that
+    the range spans at most `max_catch_up`, and the following queries resume from there until caught up.
+
+    :param query_timerange: the DateTimeRange derived from the query args.
+    :param watermark: the end of the most recent fully queried range, if any.
+    :param safety_overlap: how far before the watermark to resume.
+    :param max_catch_up: the max span of a resumed range.
+    """
+    if watermark is None:
+        return query_timerange
+
+    end_dt = dateutil.parser.isoparse(query_timerange.end_date)
+    start_dt = watermark.replace(tzinfo=end_dt.tzinfo) - safety_overlap
+    if start_dt >= end_dt:
+        return query_timerange
+
+    if end_dt - start_dt > max_catch_up:
+        end_dt = start_dt + max_catch_up
+        logger.warning(f"Query checkpoint is behind by more than {max_catch_up}. Catching up to {end_dt!s}")
+
+    return query_timerange._replace(start_date=start_dt.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                                    end_date=end_dt.strftime("%Y-%m-%dT%H:%M:%SZ"))
@@ -2,13 +2,22 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
+import dateutil.parser
+from elasticsearch.exceptions import NotFoundError
+
 from data_subscriber import es_conn_util
+from data_subscriber.index_location_cache import IndexLocationCache
 
 null_logger = logging.getLogger('dummy')
 null_logger.addHandler(logging.NullHandler())
 null_logger.propagate = False
 
 ES_INDEX_PATTERNS = ["slc_catalog", "slc_catalog-*"]
+DOWNLOAD_SOURCE_INCLUDES = ["s3_url", "https_url", "size_in_bytes", "processing_mode", "intersects_north_america"]
+"""Fields of catalog docs used by download jobs"""
+
+INDEX_LOCATION_CACHE = IndexLocationCache()
+"""Process-wide cache of the index holding each catalog doc. Used when no cache is given to the catalog"""
 
 
 def generate_es_index_name():
@@ -29,12 +38,16 @@ class SLCProductCatalog:
         delete_by_id
         update_document
     """
-    def __init__(self, /, logger=None):
+    def __init__(self, /, logger=None, index_cache: IndexLocationCache = None):
         self.logger = logger or null_logger
         self.es = es_conn_util.get_es_connection(logger)
+        self.index_cache = index_cache or INDEX_LOCATION_CACHE
 
-    def get_all_between(self, start_dt: datetime, end_dt: datetime, use_temporal: bool):
-        undownloaded = self._query_undownloaded(start_dt, end_dt, use_temporal)
+    def get_all_between(self, start_dt: datetime, end_dt: datetime, use_temporal: bool, batch_ids: list[str] = None):
+        """Returns the catalog docs in the given time range, restricted to the given product file names, if any. Only
+        the fields used by download jobs are returned."""
+        undownloaded = self._query_undownloaded(start_dt, end_dt, use_temporal, batch_ids)
+        self._cache_index_locations(undownloaded)
         return [result['_source'] for result in (undownloaded or [])]
 
     def process_url(
@@ -48,6 +61,25 @@ class SLCProductCatalog:
             *args,
             **kwargs
     ):
+        doc = self._to_url_doc(urls, granule_id, job_id, query_dt, temporal_extent_beginning_dt, revision_date_dt,
+                               **kwargs)
+        filename = doc["id"]
+
+        index = self._get_index_name_for(_id=filename, default=generate_es_index_name())
+
+        self.es.update_document(index=index, body={"doc_as_upsert": True, "doc": doc}, id=filename)
+        return True
+
+    def _to_url_doc(
+            self,
+            urls: list[str],
+            granule_id: str,
+            job_id: str,
+            query_dt: datetime,
+            temporal_extent_beginning_dt: datetime,
+            revision_date_dt: datetime,
+            **kwargs
+    ) -> dict:
         filename = Path(urls[0]).name
         doc = {
             "id": filename,
@@ -70,11 +102,7 @@ class SLCProductCatalog:
                 raise Exception(f"Unrecognized URL format. {url=}")
 
         doc.update(kwargs)
-
-        index = self._get_index_name_for(_id=filename, default=generate_es_index_name())
-
-        self.es.update_document(index=index, body={"doc_as_upsert": True, "doc": doc}, id=filename)
-        return True
+        return doc
 
     def mark_product_as_downloaded(self, url, job_id):
         filename = url.split("/")[-1]
@@ -101,6 +129,10 @@ class SLCProductCatalog:
         if default is None:
             raise
 
+        index = self.index_cache.get(_id)
+        if index:
+            return index
+
         results = self._query_existence(_id)
         self.logger.debug(f"{results=}")
         if not results:  # EDGECASE: index doesn't exist yet
@@ -110,8 +142,58 @@ class SLCProductCatalog:
                 index = results[0]["_index"]  # get the ID of the most recent record
             else:
                 index = default
+            self.index_cache.put(_id, index)
         return index
 
+    def _get_index_names_for(self, ids: list[str]) -> dict[str, str]:
+        """Batch variant of `_get_index_name_for`. Maps each of the given _ids to the index of its most recent ES doc,
+        or to the current index when no doc exists yet. Only the locations of existing docs are cached: the locations
+        of new docs are cached once they are written."""
+        index_names = self.index_cache.get_many(ids)
+        missing_ids = [_id for _id in ids if _id not in index_names]
+        if not missing_ids:
+            return index_names
+
+        results = self._query_existence_many(missing_ids) or []
+        results = list(reversed(results))  # sorted by most recent first. keep the most recent
+        self._cache_index_locations(results)
+
+        default = generate_es_index_name()
+        missing_index_names = {_id: default for _id in missing_ids}
+        missing_index_names.update({result["_id"]: result["_index"] for result in results})
+        return {**index_names, **missing_index_names}
+
+    def get_downloaded_revision_dates_for(self, ids: list[str]) -> dict[str, datetime]:
+        """Maps each of the given _ids whose most recent ES doc is marked as downloaded to the CMR revision date
+        recorded in that doc. Other _ids (without an ES doc, not downloaded yet, or without a recorded revision date)
+        are omitted."""
+        results = self._query_existence_many(ids, source_includes=["revision_date", "downloaded"]) or []
+        results = list(reversed(results))  # sorted by most recent first. keep the most recent
+        self._cache_index_locations(results)
+
+        revision_dates = {}
+        for result in results:
+            source = result.get("_source", {})
+            if source.get("downloaded") and source.get("revision_date"):
+                revision_dates[result["_id"]] = dateutil.parser.isoparse(source["revision_date"])
+            else:
+                revision_dates.pop(result["_id"], None)
+        return revision_dates
+
+    def get_download_states_for(self, ids: list[str]) -> dict[str, bool]:
+        """Maps each of the given _ids to whether its most recent ES doc is marked as downloaded.
+        _ids without an ES doc are omitted."""
+        results = self._query_existence_many(ids, source_includes=["downloaded"]) or []
+        results = list(reversed(results))  # sorted by most recent first. keep the most recent
+        self._cache_index_locations(results)
+
+        return {result["_id"]: bool(result.get("_source", {}).get("downloaded")) for result in results}
+
+    def _cache_index_locations(self, results):
+        """Caches the index locations of the docs in the given search results, which are written to later.
+        Later results take precedence."""
+        self.index_cache.put_many({result["_id"]: result["_index"] for result in (results or [])})
+
     def _post(self, filename, body):
         result = self.es.index_document(index=generate_es_index_name(), body=body, id=filename)
 
@@ -136,14 +218,35 @@ class SLCProductCatalog:
 
         return results
 
-    def _query_undownloaded(self, start_dt: datetime, end_dt: datetime, use_temporal: bool):
-        range_str = "temporal_extent_beginning_datetime" if use_temporal else "revision_date"
+    def _query_existence_many(self, ids: list[str], source_includes: list[str] = None):
         try:
-            result = self.es.query(
+            results = self.es.query(
                 index=",".join(ES_INDEX_PATTERNS),
                 ignore_unavailable=True,  # EDGECASE: index might not exist yet
+                body={
+                    "query": {"bool": {"must": [{"terms": {"_id": ids}}]}},
+                    "sort": [{"creation_timestamp": "desc"}],
+                    "_source": {"includes": source_includes or "false", "excludes": []}  # NOTE: returned object is different than when `"includes": []` is used
+                }
+            )
+            self.logger.debug(f"Query results: {results}")
+
+        except NotFoundError:  # EDGECASE: no catalog index exists yet. other errors must not be mistaken for new docs
+            self.logger.info(f"{len(ids)} _id(s) do not exist in {ES_INDEX_PATTERNS}")
+            results = None
+
+        return results
+
+    def _query_undownloaded(self, start_dt: datetime, end_dt: datetime, use_temporal: bool, batch_ids: list[str] = None):
+        range_str = "temporal_extent_beginning_datetime" if use_temporal else "revision_date"
+        filters = [{"terms": {"_id": batch_ids}}] if batch_ids else []
+        try:
+            result = es_conn_util.query_all(
+                self.es,
+                index=",".join(ES_INDEX_PATTERNS),
                 body={
                     "sort": [{"creation_timestamp": "asc"}],
+                    "_source": {"includes": DOWNLOAD_SOURCE_INCLUDES},
                     "query": {
                         "bool": {
                             "must": [
@@ -155,7 +258,8 @@ class SLCProductCatalog:
                                         }
                                     }
                                 }
-                            ]
+                            ],
+                            "filter": filters
                         }
                     }
                 }
@@ -1,5 +1,5 @@
 from data_subscriber.slc.slc_catalog import SLCProductCatalog
 
 
-def get_slc_catalog_connection(logger):
-    return SLCProductCatalog(logger=logger)
+def get_slc_catalog_connection(logger, index_cache=None):
+    return SLCProductCatalog(logger=logger, index_cache=index_cache)
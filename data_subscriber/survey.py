@@ -6,9 +6,9 @@ from data_subscriber.query import get_query_timerange, query_cmr
 _date_format_str = "%Y-%m-%dT%H:%M:%SZ"
 _date_format_str_cmr = _date_format_str[:-1] + ".%fZ"
 @backoff.on_exception(backoff.expo, Exception, max_value=13, max_time=34)
-def _query_cmr_backoff(args, token, cmr, settings, query_timerange, now, silent=True):
-    return query_cmr(args, token, cmr, settings, query_timerange, now, silent)
-def run_survey(args, token, cmr, settings):
+async def _query_cmr_backoff(args, token, cmr, settings, query_timerange, now, silent=True):
+    return await query_cmr(args, token, cmr, settings, query_timerange, now, silent)
+async def run_survey(args, token, cmr, settings):
 
     start_dt = datetime.strptime(args.start_date, _date_format_str)
     end_dt = datetime.strptime(args.end_date, _date_format_str)
@@ -38,7 +38,7 @@ def run_survey(args, token, cmr, settings):
 
         query_timerange: DateTimeRange = get_query_timerange(args, now, silent=True)
 
-        granules = _query_cmr_backoff(args, token, cmr, settings, query_timerange, now, silent=True)
+        granules = await _query_cmr_backoff(args, token, cmr, settings, query_timerange, now, silent=True)
 
         count = 0
         for granule in granules:
@@ -0,0 +1,61 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_S3_TRANSFERS = 8
+DEFAULT_MAX_HTTPS_TRANSFERS = 4
+
+
+class TransferScheduler:
+    """
+    Runs file transfers concurrently, with separate concurrency caps for S3 and HTTPS transfers.
+
+    S3 (in-region) transfers scale well with concurrency, while HTTPS transfers go through the DAAC's distribution
+    endpoints (and their rate limits), so the latter are typically capped lower.
+    """
+    def __init__(
+            self,
+            /,
+            max_s3_transfers: int = DEFAULT_MAX_S3_TRANSFERS,
+            max_https_transfers: int = DEFAULT_MAX_HTTPS_TRANSFERS
+    ):
+        """
+        :param max_s3_transfers: the max number of concurrent S3 transfers.
+        :param max_https_transfers: the max number of concurrent HTTPS transfers.
+        """
+        self._executors = {
+            "s3": ThreadPoolExecutor(max_workers=max_s3_transfers, thread_name_prefix="s3_transfer"),
+            "https": ThreadPoolExecutor(max_workers=max_https_transfers, thread_name_prefix="https_transfer")
+        }
+        self._futures: list[Future] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.shutdown(cancel_pending=exc_type is not None)
+
+    def submit(self, protocol: str, fn: Callable, /, *args, **kwargs) -> Future:
+        """
+        Schedules a transfer.
+
+        :param protocol: "s3" or "https". Determines the concurrency cap applied to the transfer.
+        :param fn: the function performing the transfer.
+        """
+        future = self._executors[protocol].submit(fn, *args, **kwargs)
+        self._futures = [f for f in self._futures if not f.done()] + [future]
+        return future
+
+    def shutdown(self, cancel_pending=False):
+        """
+        Waits for running transfers to complete.
+
+        :param cancel_pending: whether to cancel transfers that have not started yet, e.g. after a failed transfer.
+        """
+        if cancel_pending:
+            for future in self._futures:
+                future.cancel()
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
@@ -23,6 +23,7 @@ from shapely.ops import transform
 
 from commons.constants import product_metadata as pm
 from commons.logger import logger
+from util import placement_util
 from util.conf_util import SettingsConf
 from util.exec_util import exec_wrapper
 
@@ -83,9 +84,9 @@ def extract(
         logger.info(f"Creating dataset directory {dataset_dir}")
         os.makedirs(dataset_dir)
 
-    # Copy product to dataset directory
+    # Place product in dataset directory (hardlinked where possible)
     logger.info(f"Moving {product} to dataset directory")
-    shutil.copyfile(product, os.path.join(dataset_dir, os.path.basename(product)))
+    placement_util.place_file(product, os.path.join(dataset_dir, os.path.basename(product)))
 
     try:
         found, product_met, ds_met, alt_ds_met = extract_metadata(
@@ -2,9 +2,13 @@ import json
 import logging
 from functools import cache
 from pathlib import Path
-from typing import TypedDict
+from typing import Sequence, TypedDict
 
+import numpy as np
+import shapely
 from osgeo import ogr
+from shapely import STRtree
+from shapely.geometry import shape
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +29,7 @@ def does_bbox_intersect_north_america(bbox: list[Coordinate]) -> bool:
                  `bbox["lon"]` refers to the longitudinal component of the coordinate.
     :return: True if the given coordinates intersect with North America (OPERA). Otherwise False.
     """
-    logger.info(f"{bbox=}")
+    logger.debug(f"{bbox=}")
 
     bbox_ring = ogr.Geometry(ogr.wkbLinearRing)
     for coordinate in bbox:
@@ -36,10 +40,68 @@ def does_bbox_intersect_north_america(bbox: list[Coordinate]) -> bool:
     na_geom = _load_north_america_opera_geometry_collection()
 
     is_bbox_in_north_america = na_geom.Intersects(bbox_poly)
-    logger.info(f"{is_bbox_in_north_america=}")
+    logger.debug(f"{is_bbox_in_north_america=}")
     return is_bbox_in_north_america
 
 
+def intersects_north_america_many(bboxes: Sequence[list[Coordinate]]) -> np.ndarray:
+    """
+    Batch variant of `does_bbox_intersect_north_america`.
+
+    Bounding boxes are checked in stages, using vectorized shapely predicates:
+    1. bboxes whose envelope overlaps no North America (OPERA) polygon envelope are misses.
+    2. bboxes with a vertex inside North America (OPERA) are hits.
+    3. the remaining bboxes are intersected with the (prepared) North America (OPERA) geometry.
+
+    :param bboxes: a sequence of bboxes. See `does_bbox_intersect_north_america`.
+                   bboxes with fewer than 4 coordinates (i.e. not a closed ring) are considered not to intersect.
+    :return: a boolean array, True where the corresponding bbox intersects with North America (OPERA).
+    """
+    result = np.zeros(len(bboxes), dtype=bool)
+
+    counts = np.fromiter((len(bbox) for bbox in bboxes), dtype=np.intp, count=len(bboxes))
+    bbox_indices = np.flatnonzero(counts >= 4)
+    if not len(bbox_indices):
+        return result
+
+    counts = counts[bbox_indices]
+    coords = np.fromiter(
+        (value
+         for i in bbox_indices.tolist()
+         for coordinate in bboxes[i]
+         for value in (coordinate["lon"], coordinate["lat"])),
+        dtype=float,
+        count=2 * counts.sum()
+    ).reshape(-1, 2)
+    starts = np.cumsum(counts) - counts
+    x, y = coords[:, 0], coords[:, 1]
+
+    na_tree, na_geom = _load_north_america_opera_shapely()
+
+    envelopes = shapely.box(np.minimum.reduceat(x, starts), np.minimum.reduceat(y, starts),
+                            np.maximum.reduceat(x, starts), np.maximum.reduceat(y, starts))
+    candidates = np.zeros(len(bbox_indices), dtype=bool)
+    candidates[na_tree.query(envelopes)[0]] = True
+
+    vertex_mask = np.repeat(candidates, counts)
+    vertex_hits = np.zeros(len(coords), dtype=bool)
+    vertex_hits[vertex_mask] = shapely.contains_xy(na_geom, x[vertex_mask], y[vertex_mask])
+    hits = np.logical_or.reduceat(vertex_hits, starts)
+
+    remaining = np.flatnonzero(candidates & ~hits)
+    if len(remaining):
+        remaining_mask = np.zeros(len(bbox_indices), dtype=bool)
+        remaining_mask[remaining] = True
+        rings = shapely.linearrings(
+            coords[np.repeat(remaining_mask, counts)],
+            indices=np.repeat(np.arange(len(remaining)), counts[remaining])
+        )
+        hits[remaining] = shapely.intersects(na_geom, shapely.polygons(rings))
+
+    result[bbox_indices] = hits
+    return result
+
+
 @cache
 def _load_north_america_opera_geometry_collection() -> ogr.Geometry:
     north_america_opera_geojson = _cached_load_north_america_opera_geojson()
@@ -52,6 +114,21 @@ def _load_north_america_opera_geometry_collection() -> ogr.Geometry:
     return na_geoms
 
 
+@cache
+def _load_north_america_opera_shapely() -> tuple[STRtree, shapely.Geometry]:
+    """Returns the polygons of North America (OPERA) as a spatial index, and as a single prepared geometry."""
+    north_america_opera_geojson = _cached_load_north_america_opera_geojson()
+
+    na_polygons = shapely.get_parts(
+        [shape(feature["geometry"]) for feature in north_america_opera_geojson["features"]]
+    )
+    na_geom = shapely.multipolygons(na_polygons)
+    shapely.prepare(na_geom)
+
+    logger.info("Loaded geojson as shapely geometries")
+    return STRtree(na_polygons), na_geom
+
+
 @cache
 def _cached_load_north_america_opera_geojson() -> dict:
     """Loads a RFC7946 GeoJSON file."""
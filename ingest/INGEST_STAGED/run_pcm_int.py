@@ -14,7 +14,7 @@ from purge_ISL import purge_isl
 from util.conf_util import SettingsConf
 from util.ctx_util import JobContext
 from util.exec_util import exec_wrapper
-from util.checksum_util import create_dataset_checksums, get_file_checksum
+from util.checksum_util import create_dataset_checksums, get_file_checksums
 from extractor import extract
 from opera_chimera.constants.opera_chimera_const import (
     OperaChimeraConstants as oc_const,
@@ -52,8 +52,7 @@ def main(id, src_data):
         checksum_value = open(checksum_file, "r").read()
 
         checksum_type = job_context.get("checksum_type")
-        file_content = open(id, "rb").read()
-        file_checksum = get_file_checksum(file_content, checksum_type)
+        file_checksum = get_file_checksums(id, [checksum_type])[checksum_type]
 
         if checksum_value != file_checksum:
             error = "Checksums don't match. \nChecksum in signal file: {}. \n File checksum: {}".format(
@@ -1,6 +1,7 @@
 import os
 import json
-import hashlib
+
+from util.checksum_util import get_file_checksums
 
 
 def validate(sf_context):
@@ -31,7 +32,7 @@ def validate_checksum(filepath, checksum):
     :param filepath
     :return:
     """
-    observed_checksum = hashlib.md5(open(filepath, 'rb').read()).hexdigest()
+    observed_checksum = get_file_checksums(filepath, ['md5'])['md5']
     if checksum != observed_checksum:
         raise ValueError("Invalid checksum. observed:{0}, submitted:{1}".format(
             observed_checksum, checksum))
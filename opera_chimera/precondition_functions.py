@@ -18,7 +18,6 @@ from lxml import etree as ET
 from typing import Dict, List
 from urllib.parse import urlparse
 
-import boto3
 import psutil
 from chimera.precondition_functions import PreConditionFunctions
 
@@ -30,14 +29,15 @@ from hysds.utils import get_disk_usage
 from opera_chimera.constants.opera_chimera_const import (
     OperaChimeraConstants as oc_const,
 )
-from util import datasets_json_util
+from util import datasets_json_util, s3_util
 from util.common_util import convert_datetime, get_working_dir
 from util.pge_util import (download_object_from_s3,
                            get_input_hls_dataset_tile_code,
                            write_pge_metrics)
 from util.type_util import set_type
 from tools.stage_dem import main as stage_dem
-from tools.stage_ionosphere_file import VALID_IONOSPHERE_TYPES
+from tools.ionosphere_file_cache import get_ionosphere_file_cache
+from tools.stage_ionosphere_file import IonosphereFileNotFoundException, VALID_IONOSPHERE_TYPES
 from tools.stage_worldcover import main as stage_worldcover
 
 ancillary_es = get_grq_es(logger)
@@ -852,7 +852,7 @@ class OperaPreConditionFunctions(PreConditionFunctions):
         s3_bucket_name = s3_path.split('/')[0]
         s3_key = '/'.join(s3_path.split('/')[1:])
 
-        s3 = boto3.resource('s3')
+        s3 = s3_util.get_s3_resource()
 
         bucket = s3.Bucket(s3_bucket_name)
         s3_objects = bucket.objects.filter(Prefix=s3_key)
@@ -1015,8 +1015,9 @@ class OperaPreConditionFunctions(PreConditionFunctions):
         """
         Stages an Ionosphere Correction (TEC) file for use with a CSLC-S1
         job. The name of the SLC archive to be processed is used to obtain
-        the date of the corresponding TEC file to download. The stage_ionosphere_file.py
-        script is then used to perform the download.
+        the date of the corresponding TEC file to download. The file staged in S3
+        by the download job is used when available, otherwise the file is staged
+        through the local Ionosphere file cache (see ionosphere_file_cache.py).
 
         """
         logger.info(f"Evaluating precondition {inspect.currentframe().f_code.co_name}")
@@ -1034,7 +1035,7 @@ class OperaPreConditionFunctions(PreConditionFunctions):
         s3_bucket_name = s3_path.split('/')[0]
         s3_key = '/'.join(s3_path.split('/')[1:])
 
-        s3 = boto3.resource('s3')
+        s3 = s3_util.get_s3_resource()
 
         bucket = s3.Bucket(s3_bucket_name)
         s3_objects = bucket.objects.filter(Prefix=s3_key)
@@ -1048,11 +1049,31 @@ class OperaPreConditionFunctions(PreConditionFunctions):
 
         logger.info(f"{ionosphere_file_objects}=")
 
-        # May not of found any Ionosphere files during download phase, so check now
+        # May not of found any Ionosphere files during download phase, so check now,
+        # through the Ionosphere file cache shared by all jobs on this host
         if len(ionosphere_file_objects) < 1:
-            raise RuntimeError(
-                f'Could not find an Ionosphere file within the S3 location {s3_product_path}'
-            )
+            logger.info(f'Could not find an Ionosphere file within the S3 location {s3_product_path}, '
+                        f'staging one now')
+
+            safe_file_name = self._context['product_metadata']['metadata']['FileName']
+
+            try:
+                ionosphere_file = get_ionosphere_file_cache(self._settings).place(
+                    safe_file_name, get_working_dir()
+                )
+            except IonosphereFileNotFoundException:
+                raise RuntimeError(
+                    f'Could not find an Ionosphere file within the S3 location {s3_product_path}, '
+                    f'or for the date of {safe_file_name}'
+                )
+
+            rc_params = {
+                oc_const.TEC_FILE: str(ionosphere_file.filepath)
+            }
+
+            logger.info(f"rc_params : {rc_params}")
+
+            return rc_params
 
         # There should only have been one file downloaded, but any should
         # work so just take the first
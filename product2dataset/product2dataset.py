@@ -10,7 +10,6 @@ from __future__ import print_function
 import glob
 import json
 import os
-import shutil
 import subprocess
 import sys
 import traceback
@@ -19,7 +18,7 @@ from typing import Union, Tuple
 
 from commons.logger import logger
 from extractor import extract
-from util import datasets_json_util, job_json_util
+from util import datasets_json_util, job_json_util, placement_util
 from util.checksum_util import create_dataset_checksums
 from util.conf_util import SettingsConf, PGEOutputsConf
 
@@ -104,19 +103,19 @@ def convert(
         if rc_file:
             renamed_rc_file = os.path.join(dataset_dir, f"{os.path.basename(dataset_dir)}.rc.yaml")
             logger.info(f"Copying RunConfig file to {renamed_rc_file}")
-            shutil.copyfile(rc_file, renamed_rc_file)
+            placement_util.place_file(rc_file, renamed_rc_file)
 
         # Ensure ancillary PGE outputs are copied into each individual dataset
         for secondary_product in products[SECONDARY_KEY].keys():
             source = os.path.join(product_dir, secondary_product)
             target = os.path.join(dataset_dir, secondary_product)
-            logger.info(f"Copying {source} to {target}")
-            shutil.copy(source, target)
-
             hashcheck = products[SECONDARY_KEY][secondary_product].get("hashcheck", False)
+            hash_algo = products[SECONDARY_KEY][secondary_product].get("hash_algo", DEFAULT_HASH_ALGO)
+
+            logger.info(f"Copying {source} to {target}")
+            placement_util.place_file(source, target, checksum_algos=[hash_algo] if hashcheck else [])
 
             if hashcheck:
-                hash_algo = products[SECONDARY_KEY][secondary_product].get("hash_algo", DEFAULT_HASH_ALGO)
                 create_dataset_checksums(target, hash_algo)
 
         # Add fields to the top-level of the .met.json file
@@ -192,6 +191,8 @@ def convert(
         with open(dataset_met_json_path, 'w') as outfile:
             json.dump(dataset_met_json, outfile, indent=2)
 
+    logger.info(f"Placed products in datasets. {placement_util.stats}")
+
     return list(created_datasets)
 
 def get_collection_info(dataset_id: str, settings: dict):
@@ -45,6 +45,8 @@ setup(
             "boto3-stubs-lite[essential]",  # for ec2, s3, rds, lambda, sqs, dynamo and cloudformation
         ],
         "subscriber": [
+            "aiohttp",
+            "backoff",
             "boto3",
             "boto3-stubs",
             "boto3-stubs-lite[essential]",  # for ec2, s3, rds, lambda, sqs, dynamo and cloudformation
@@ -52,7 +54,10 @@ setup(
             "elasticsearch==7.13.4",
             "elasticsearch[async]>=7.13.4",
             "more-itertools==8.13.0",
+            "msgspec",
+            "numpy",
             "requests==2.27.1",
+            "Shapely>=2.0",
             "validators",
             "cachetools==5.2.0"
         ],
@@ -70,7 +75,7 @@ setup(
             "botocore",
             "click==8.1.3",
             # "GDAL==3.6.2",  # install native gdal first. `brew install gdal` on macOS.
-            "Shapely",
+            "Shapely>=2.0",
             "elasticsearch==7.13.4",
             "elasticsearch[async]>=7.13.4",
             "requests==2.27.1",
@@ -78,11 +83,13 @@ setup(
             "pytest-mock>=3.8.2",
             "pytest-asyncio==0.20.3",
             "pytest-cov==4.0.0",
+            "aiohttp",
             "mgrs",
             "pyproj",
             "validators",
             "cachetools==5.2.0",
             "matplotlib",
+            "msgspec",
             "numpy",
             "more-itertools==8.13.0",
             "ruamel.yaml"  # NOTE: deployed instances use ruamel-yaml-conda
@@ -120,6 +127,7 @@ setup(
             "backoff",
             "compact-json",
             "more-itertools",
+            "msgspec",
             "python-dateutil",
             "python-dotenv"
         ],
@@ -0,0 +1,148 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from elasticsearch.exceptions import ConnectionTimeout
+
+from data_subscriber import bulk_catalog_writer
+from data_subscriber.bulk_catalog_writer import BulkCatalogWriter
+from data_subscriber.hls.hls_catalog import HLSProductCatalog
+from data_subscriber.hls_spatial.hls_spatial_catalog import HLSSpatialProductCatalog
+from data_subscriber.index_location_cache import IndexLocationCache
+
+
+def create_catalog(bulk_responses):
+    catalog = HLSProductCatalog.__new__(HLSProductCatalog)
+    catalog.logger = MagicMock()
+    catalog.index_cache = IndexLocationCache()
+    catalog.es = MagicMock()
+    catalog.es.query = MagicMock(return_value=[{"_id": "T00000.B02.tif", "_index": "hls_catalog-2022.01"}])
+    catalog.es.es.bulk = MagicMock(side_effect=bulk_responses)
+    return catalog
+
+
+def process_url(writer, url):
+    writer.process_url([url], "dummy_granule_id", "dummy_job_id", datetime.now(), datetime.now(), datetime.now())
+
+
+def test_bulk_catalog_writer_batches_writes():
+    # ARRANGE
+    catalog = create_catalog(bulk_responses=[
+        {"items": [{"update": {"status": 201}}, {"update": {"status": 201}}]},
+        {"items": [{"update": {"status": 201}}]}
+    ])
+    writer = BulkCatalogWriter(catalog, batch_size=2, flush_interval_seconds=60)
+
+    # ACT
+    with writer:
+        process_url(writer, "https://example.com/T00000.B02.tif")
+        process_url(writer, "https://example.com/T00001.B02.tif")
+        process_url(writer, "https://example.com/T00002.B02.tif")
+
+    # ASSERT
+    assert catalog.es.es.bulk.call_count == 2
+    assert catalog.es.query.call_count == 2  # one index lookup per batch
+
+    first_batch = catalog.es.es.bulk.call_args_list[0].kwargs["body"]
+    assert first_batch[0] == {"update": {"_index": "hls_catalog-2022.01", "_id": "T00000.B02.tif"}}
+    assert first_batch[1]["doc_as_upsert"] is True
+    assert first_batch[2]["update"]["_id"] == "T00001.B02.tif"
+    assert first_batch[2]["update"]["_index"].startswith("hls_catalog-")
+
+    assert writer.docs_written == 3
+
+
+def test_bulk_catalog_writer_retries_rejected_docs(monkeypatch):
+    # ARRANGE
+    monkeypatch.setattr(bulk_catalog_writer.time, bulk_catalog_writer.time.sleep.__name__, MagicMock())
+    catalog = create_catalog(bulk_responses=[
+        {"items": [{"update": {"status": 201}}, {"update": {"status": 429, "error": {"type": "es_rejected_execution_exception"}}}]},
+        {"items": [{"update": {"status": 200}}]}
+    ])
+    writer = BulkCatalogWriter(catalog, batch_size=10)
+
+    # ACT
+    with writer:
+        process_url(writer, "https://example.com/T00000.B02.tif")
+        process_url(writer, "https://example.com/T00001.B02.tif")
+
+    # ASSERT
+    retried_batch = catalog.es.es.bulk.call_args_list[1].kwargs["body"]
+    assert len(retried_batch) == 2
+    assert retried_batch[0]["update"]["_id"] == "T00001.B02.tif"
+
+    assert writer.docs_written == 2
+    assert writer.bulk_rejections == 1
+    assert writer.docs_failed == 0
+
+
+def test_bulk_catalog_writer_caches_locations_of_written_docs():
+    # ARRANGE
+    catalog = create_catalog(bulk_responses=[
+        {"items": [
+            {"update": {"status": 200, "_index": "hls_catalog-2022.01"}},
+            {"update": {"status": 201, "_index": "hls_catalog-2023.01"}},
+            {"update": {"status": 400, "error": {"type": "mapper_parsing_exception"}}}
+        ]}
+    ])
+    writer = BulkCatalogWriter(catalog, batch_size=10)
+
+    # ACT
+    with writer:
+        process_url(writer, "https://example.com/T00000.B02.tif")
+        process_url(writer, "https://example.com/T00001.B02.tif")
+        process_url(writer, "https://example.com/T00002.B02.tif")
+
+    # ASSERT
+    assert catalog.index_cache.get_many(["T00000.B02.tif", "T00001.B02.tif", "T00002.B02.tif"]) == {
+        "T00000.B02.tif": "hls_catalog-2022.01",
+        "T00001.B02.tif": "hls_catalog-2023.01"
+    }
+
+def test_bulk_catalog_writer_raises_when_index_lookup_fails():
+    # ARRANGE
+    catalog = create_catalog(bulk_responses=[])
+    catalog.es.query = MagicMock(side_effect=ConnectionTimeout("TIMEOUT", "timed out", None))
+    writer = BulkCatalogWriter(catalog, batch_size=10)
+    process_url(writer, "https://example.com/T00000.B02.tif")
+
+    # ACT
+    with pytest.raises(ConnectionTimeout):
+        writer.flush()
+
+    # ASSERT
+    catalog.es.es.bulk.assert_not_called()  # docs are never routed to the current index instead
+    assert catalog.index_cache.get("T00000.B02.tif") is None
+
+def test_spatial_catalog_process_granules_skips_existing():
+    # ARRANGE
+    catalog = HLSSpatialProductCatalog.__new__(HLSSpatialProductCatalog)
+    catalog.logger = MagicMock()
+    catalog.es = MagicMock()
+    catalog.es.query = MagicMock(return_value=[{"_id": "granule_0", "_index": "hls_spatial_catalog-2022.01"}])
+    catalog.es.es.bulk = MagicMock(return_value={
+        "items": [{"create": {"status": 201}}, {"create": {"status": 409, "error": {"type": "version_conflict_engine_exception"}}}]
+    })
+    granules = [
+        {
+            "granule_id": f"granule_{i}",
+            "provider": "LPCLOUD",
+            "production_datetime": "2022-01-01T00:00:00Z",
+            "short_name": "Sentinel-2A",
+            "identifier": "S2A_dummy",
+            "bounding_box": []
+        }
+        for i in range(3)
+    ]
+
+    # ACT
+    results = catalog.process_granules(granules, batch_size=10)
+
+    # ASSERT
+    assert catalog.es.query.call_count == 1
+    body = catalog.es.es.bulk.call_args.kwargs["body"]
+    assert [action["create"]["_id"] for action in body[::2]] == ["granule_1", "granule_2"]
+
+    assert len(results) == 1
+    assert results[0].written == 1
+    assert results[0].conflicts == 2
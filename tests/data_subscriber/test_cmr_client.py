@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from data_subscriber import cmr_client
+from tools.benchmarks.fake_cmr_server import SEARCH_PATH, STATS, create_app, generate_granules
+
+END = datetime(2023, 1, 1, tzinfo=timezone.utc)
+START = END - timedelta(days=1)
+
+
+async def start_fake_cmr(granule_count):
+    app = create_app(generate_granules(granule_count, START, END))
+    server = TestServer(app)
+    await server.start_server()
+    return server, app
+
+
+@pytest.mark.asyncio
+async def test_async_search_splits_and_dedups():
+    # ARRANGE
+    server, app = await start_fake_cmr(granule_count=5_000)
+    params = {"page_size": 100, "revision_date": cmr_client._format_range(START, END)}
+
+    # ACT
+    try:
+        granules = await cmr_client.async_search(
+            str(server.make_url(SEARCH_PATH)), params,
+            range_param="revision_date", max_concurrency=3, max_pages_per_window=4
+        )
+    finally:
+        await server.close()
+
+    # ASSERT
+    granule_ids = [granule["umm"]["GranuleUR"] for granule in granules]
+    assert len(granule_ids) == 5_000
+    assert len(set(granule_ids)) == 5_000
+    assert app[STATS]["requests"] > 50  # windows were split and paged
+
+
+@pytest.mark.asyncio
+async def test_async_search_probes_windows_expected_to_split(monkeypatch):
+    # ARRANGE
+    monkeypatch.setattr(cmr_client, "MAX_SPLITS", 2)  # sub-windows of the first split must be split again
+    server, app = await start_fake_cmr(granule_count=5_000)
+    params = {"page_size": 100, "revision_date": cmr_client._format_range(START, END)}
+
+    # ACT
+    try:
+        granules = await cmr_client.async_search(
+            str(server.make_url(SEARCH_PATH)), params,
+            range_param="revision_date", max_concurrency=3, max_pages_per_window=4
+        )
+    finally:
+        await server.close()
+
+    # ASSERT
+    assert len({granule["umm"]["GranuleUR"] for granule in granules}) == 5_000
+    # only the first page of the whole range is fetched twice, besides granules on the shared boundaries of windows
+    assert app[STATS]["items"] < 5_000 + 2 * 100
+
+@pytest.mark.asyncio
+async def test_async_search_small_window_is_single_request():
+    # ARRANGE
+    server, app = await start_fake_cmr(granule_count=10)
+    params = {"page_size": 2000, "revision_date": cmr_client._format_range(START, END)}
+
+    # ACT
+    try:
+        granules = await cmr_client.async_search(
+            str(server.make_url(SEARCH_PATH)), params,
+            range_param="revision_date", decode=lambda items: [item["meta"]["native-id"] for item in items], key=str
+        )
+    finally:
+        await server.close()
+
+    # ASSERT
+    assert len(granules) == 10
+    assert app[STATS]["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_iter_search_yields_pages_and_stops_early():
+    # ARRANGE
+    server, app = await start_fake_cmr(granule_count=1_000)
+    params = {"page_size": 100, "revision_date": cmr_client._format_range(START, END)}
+
+    # ACT
+    try:
+        pages = cmr_client.async_iter_search(
+            str(server.make_url(SEARCH_PATH)), params,
+            range_param="revision_date", max_concurrency=1, max_pages_per_window=100, max_buffered_pages=1
+        )
+        first_page = await pages.__anext__()
+        await pages.aclose()
+    finally:
+        await server.close()
+
+    # ASSERT
+    assert len(first_page) == 100
+    assert app[STATS]["requests"] < 10  # remaining pages were never fetched
+
+
+def test_split_range():
+    sub_ranges = cmr_client._split_range(START, END, splits=4, min_window=timedelta(minutes=1))
+
+    assert len(sub_ranges) == 4
+    assert sub_ranges[0][0] == START
+    assert sub_ranges[-1][1] == END
+    assert all(left[1] == right[0] for left, right in zip(sub_ranges, sub_ranges[1:]))
+
+
+def test_split_range_respects_min_window():
+    sub_ranges = cmr_client._split_range(START, START + timedelta(minutes=3), splits=10, min_window=timedelta(minutes=1))
+
+    assert len(sub_ranges) == 3
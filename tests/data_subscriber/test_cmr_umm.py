@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from data_subscriber import cmr_client, cmr_umm
+from tools.benchmarks.fake_cmr_server import SEARCH_PATH, create_app, generate_granules
+
+END = datetime(2023, 1, 1, tzinfo=timezone.utc)
+START = END - timedelta(days=1)
+
+
+def test_to_cmr_granule():
+    # ARRANGE
+    item = generate_granules(1, START, END, collection="HLSS30")[0]
+    item["umm"]["ProviderDates"] = [{"Date": "2023-01-01T00:00:00Z", "Type": "Insert"}]  # unused fields are skipped
+    body = json.dumps({"hits": 1, "items": [item]}).encode()
+
+    # ACT
+    items, hits = cmr_umm.parse_search_results(body)
+    granule = cmr_umm.to_cmr_granule(items[0], identifier_attribute="PRODUCT_URI", additional_attributes=["PRODUCT_URI"])
+
+    # ASSERT
+    assert hits == 1
+    assert granule["granule_id"] == item["umm"]["GranuleUR"]
+    assert granule.native_id == item["meta"]["native-id"]
+    assert granule["provider"] == "LPCLOUD"
+    assert granule["revision_date"] == item["meta"]["revision-date"]
+    assert granule["revision_id"] == 1
+    assert granule["short_name"] == "Sentinel-2A"
+    assert granule["bounding_box"][0] == {"lat": 36.99, "lon": -109.06}
+    assert granule["related_urls"] == [url["URL"] for url in item["umm"]["RelatedUrls"]]
+    assert granule["identifier"] == "S2A_MSIL1C_0"
+    assert granule.additional_attributes == {"PRODUCT_URI": ["S2A_MSIL1C_0"]}
+    assert granule.file_sizes == {f"{item['umm']['GranuleUR']}.zip": 4_500_000_000}
+    assert granule.get("filtered_urls") == []
+
+
+def test_to_cmr_granule_tolerates_missing_fields():
+    # ARRANGE
+    body = json.dumps({"hits": 1, "items": [{"meta": {"native-id": "G1"}, "umm": {"GranuleUR": "G1"}}]}).encode()
+
+    # ACT
+    items, _ = cmr_umm.parse_search_results(body)
+    granule = cmr_umm.to_cmr_granule(items[0], identifier_attribute="PRODUCT_URI")
+
+    # ASSERT
+    assert granule["granule_id"] == "G1"
+    assert granule["bounding_box"] == []
+    assert granule["identifier"] is None
+    assert granule["temporal_extent_beginning_datetime"] is None
+
+
+@pytest.mark.asyncio
+async def test_async_search_with_umm_parser():
+    # ARRANGE
+    server = TestServer(create_app(generate_granules(500, START, END)))
+    await server.start_server()
+    params = {"page_size": 100, "revision_date": cmr_client._format_range(START, END)}
+
+    # ACT
+    try:
+        granules = await cmr_client.async_search(
+            str(server.make_url(SEARCH_PATH)), params,
+            range_param="revision_date",
+            parse=cmr_umm.parse_search_results,
+            decode=lambda items: [cmr_umm.to_cmr_granule(item) for item in items],
+            key=lambda granule: granule.granule_id
+        )
+    finally:
+        await server.close()
+
+    # ASSERT
+    assert len({granule.granule_id for granule in granules}) == 500
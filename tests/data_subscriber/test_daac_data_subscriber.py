@@ -1,11 +1,17 @@
+import os
 import random
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
+from elasticsearch.exceptions import NotFoundError
 
 from data_subscriber import daac_data_subscriber, download, query
+from data_subscriber.download_manifest import DownloadManifest
+from util import s3_util
 
 
 def setup_module():
@@ -165,6 +171,65 @@ async def test_query_smoke_run(monkeypatch):
     assert len(results["query"]["fail"]) == 0
 
 
+@pytest.mark.asyncio
+async def test_query_resubmits_download_jobs_after_failed_submission(monkeypatch):
+    # ARRANGE
+    patch_subscriber(monkeypatch)
+    monkeypatch.setattr(query, "submit_mozart_job", MagicMock(side_effect=Exception("submission failed")))
+
+    args = "dummy.py query " \
+           "--collection-shortname=HLSS30 " \
+           "--chunk-size=1 " \
+           "".split()
+
+    failed_results = await daac_data_subscriber.run(args)
+    mock_submit_mozart_job = MagicMock(return_value="dummy_job_id")
+    monkeypatch.setattr(query, "submit_mozart_job", mock_submit_mozart_job)
+
+    # ACT
+    results = await daac_data_subscriber.run(args)
+
+    # ASSERT
+    assert len(failed_results["query"]["success"]) == 0
+    assert len(failed_results["query"]["fail"]) > 0
+    assert len(results["query"]["success"]) == len(failed_results["query"]["fail"])
+    assert len(results["query"]["fail"]) == 0
+    assert mock_submit_mozart_job.call_count == len(results["query"]["success"])
+
+
+def test_drop_unchanged_granules():
+    # ARRANGE
+    es_conn = MagicMock(get_downloaded_revision_dates_for=MagicMock(return_value={
+        "T00000.B02.tif": datetime(2023, 1, 1, tzinfo=timezone.utc),
+        "T00001.B02.tif": datetime(2023, 1, 1, tzinfo=timezone.utc),
+        "T00001.B03.tif": datetime(2023, 1, 1, tzinfo=timezone.utc),
+    }))
+    granules = [
+        {   # unchanged
+            "granule_id": "T00000",
+            "filtered_urls": ["https://example.com/T00000.B02.tif"],
+            "revision_date": "2023-01-01T00:00:00.000Z"
+        },
+        {   # revised
+            "granule_id": "T00001",
+            "filtered_urls": ["https://example.com/T00001.B02.tif", "https://example.com/T00001.B03.tif"],
+            "revision_date": "2023-01-02T00:00:00.000Z"
+        },
+        {   # new
+            "granule_id": "T00002",
+            "filtered_urls": ["https://example.com/T00002.B02.tif"],
+            "revision_date": "2023-01-01T00:00:00.000Z"
+        },
+    ]
+
+    # ACT
+    changed_granules = query.drop_unchanged_granules(es_conn, granules)
+
+    # ASSERT
+    assert [granule["granule_id"] for granule in changed_granules] == ["T00001", "T00002"]
+    es_conn.get_downloaded_revision_dates_for.assert_called_once()
+
+
 @pytest.mark.asyncio
 async def test_download(monkeypatch):
     # ARRANGE
@@ -305,6 +370,7 @@ async def test_download_https(monkeypatch):
     patch_subscriber_io(monkeypatch)
     mock_get_aws_creds(monkeypatch)
     mock_https_transfer(monkeypatch)
+    mock_https_download(monkeypatch)
     mock_boto3(monkeypatch)
 
     mock_extract = MagicMock(side_effect=["extracts/T00003/T00003.Fmask"])
@@ -453,6 +519,98 @@ def test_download_granules_using_s3(monkeypatch):
     mock_download_product_using_s3.assert_called()
 
 
+def test_download_granules_downloads_products_concurrently(monkeypatch):
+    # ARRANGE
+    patch_subscriber_io(monkeypatch)
+
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+
+    def download_product_using_s3(url, *args, **kwargs):
+        with lock:
+            in_flight.append(url)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.remove(url)
+        return Path(url).name
+
+    monkeypatch.setattr(download, download.download_product_using_s3.__name__, download_product_using_s3)
+    mock_extract_many_to_one = MagicMock()
+    monkeypatch.setattr(download, download.extract_many_to_one.__name__, mock_extract_many_to_one)
+    mock_es_conn = MagicMock()
+
+    from dataclasses import dataclass
+
+    @dataclass
+    class Args:
+        dry_run = False
+        smoke_run = False
+        transfer_protocol = "s3"
+
+    granule_id_to_product_urls_map = {
+        f"granule{i}": [f"s3://example/granule{i}.B0{band}.tif" for band in range(1, 4)]
+        for i in range(1, 3)
+    }
+
+    # ACT
+    download.download_granules(None, mock_es_conn, granule_id_to_product_urls_map, Args(), None, None)
+
+    # ASSERT
+    assert max(max_in_flight) == 3  # all bands of a granule at once
+    marked_urls = [c.args[0] for c in mock_es_conn.mark_product_as_downloaded.call_args_list]
+    assert marked_urls == [url for urls in granule_id_to_product_urls_map.values() for url in urls]
+    assert [c.args[:2] for c in mock_extract_many_to_one.call_args_list] == [
+        (["granule1.B01.tif", "granule1.B02.tif", "granule1.B03.tif"], "granule1"),
+        (["granule2.B01.tif", "granule2.B02.tif", "granule2.B03.tif"], "granule2")
+    ]
+
+
+def test_download_granules_skips_products_completed_by_earlier_attempts(monkeypatch, tmp_path):
+    # ARRANGE
+    patch_subscriber_io(monkeypatch)
+
+    def download_product_using_s3(url, token, target_dirpath, *args, **kwargs):
+        os.makedirs(target_dirpath, exist_ok=True)  # Path.mkdir is patched
+        product_filepath = target_dirpath / Path(url).name
+        product_filepath.write_bytes(b"band")
+        return product_filepath
+
+    mock_download_product_using_s3 = MagicMock(side_effect=download_product_using_s3)
+    monkeypatch.setattr(download, download.download_product_using_s3.__name__, mock_download_product_using_s3)
+    mock_extract_many_to_one = MagicMock()
+    monkeypatch.setattr(download, download.extract_many_to_one.__name__, mock_extract_many_to_one)
+    mock_es_conn = MagicMock()
+
+    manifest = DownloadManifest("key", root_dir=tmp_path, job_id="attempt1", retain_downloads=True)
+    completed_product = download_product_using_s3("s3://example/granule1.B01.tif", None, manifest.downloads_dir / "granule1")
+    manifest.record_product("s3://example/granule1.B01.tif", completed_product)
+
+    from dataclasses import dataclass
+
+    @dataclass
+    class Args:
+        dry_run = False
+        smoke_run = False
+        transfer_protocol = "s3"
+
+    product_urls = [f"s3://example/granule1.B0{band}.tif" for band in range(1, 4)]
+
+    # ACT
+    downloaded_bytes = download.download_granules(None, mock_es_conn, {"granule1": product_urls}, Args(), None,
+                                                  "attempt2", manifest=manifest)
+
+    # ASSERT
+    assert sorted(c.args[0] for c in mock_download_product_using_s3.call_args_list) == product_urls[1:]  # concurrent
+    assert downloaded_bytes == 2 * len(b"band")
+    assert [c.args[0] for c in mock_es_conn.mark_product_as_downloaded.call_args_list] == product_urls[1:]
+    products, granule_id, _ = mock_extract_many_to_one.call_args.args
+    assert products == [manifest.downloads_dir / "granule1" / Path(url).name for url in product_urls]
+    assert mock_extract_many_to_one.call_args.kwargs == {"allow_rename": False}
+    assert manifest.get_completed_product(product_urls[2]) == products[2]
+
+
 def test_download_from_asf(monkeypatch):
     # ARRANGE
     patch_subscriber_io(monkeypatch)
@@ -472,6 +630,7 @@ def test_download_from_asf(monkeypatch):
         download._handle_url_redirect.__name__,
         MagicMock()
     )
+    mock_https_download(monkeypatch)
 
     mock_extract_one_to_one = MagicMock()
     monkeypatch.setattr(
@@ -499,29 +658,28 @@ def test_download_from_asf(monkeypatch):
         mock_stage_orbit_file
     )
 
-    mock_stage_ionosphere_file = MagicMock()
+    mock_stage_ionosphere_file = MagicMock(return_value=(Path("jplg0010.23i"), "https://example.com/jplg0010.23i.Z"))
     monkeypatch.setattr(
         download.ionosphere_download,
         download.ionosphere_download.download_ionosphere_correction_file.__name__,
         mock_stage_ionosphere_file
     )
 
-    mock_stage_ionosphere_file_url = MagicMock()
     monkeypatch.setattr(
         download.ionosphere_download,
-        download.ionosphere_download.get_ionosphere_correction_file_url.__name__,
-        mock_stage_ionosphere_file_url
+        download.ionosphere_download.generate_ionosphere_metadata.__name__,
+        MagicMock()
     )
 
     monkeypatch.setattr(
-        download.ionosphere_download,
-        download.ionosphere_download.generate_ionosphere_metadata.__name__,
+        download,
+        download.update_pending_dataset_metadata_with_ionosphere_metadata.__name__,
         MagicMock()
     )
 
     monkeypatch.setattr(
         download,
-        download.update_pending_dataset_metadata_with_ionosphere_metadata.__name__,
+        download._move_to_dataset_dir.__name__,
         MagicMock()
     )
 
@@ -543,7 +701,51 @@ def test_download_from_asf(monkeypatch):
     mock_extract_one_to_one.assert_called_once()
     mock_stage_orbit_file.assert_called_once()
     mock_stage_ionosphere_file.assert_called_once()
-    mock_stage_ionosphere_file_url.assert_called_once()
+
+
+def test_download_from_asf_stages_orbit_file_while_downloading_product(monkeypatch, tmp_path):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    product_id = "S1A_IW_SLC__1SDV_20230101T000000_20230101T000027_046579_05951D_1A2B.zip"
+    dataset_dir = tmp_path / product_id.removesuffix(".zip")
+    dataset_dir.mkdir()
+    orbit_file_staged = threading.Event()
+
+    def download_asf_product(product_url, token, target_dirpath):
+        assert orbit_file_staged.wait(timeout=5)  # the orbit file is staged while the product is downloading
+        product_filepath = target_dirpath / product_id
+        product_filepath.write_bytes(b"SAFE")
+        return product_filepath.resolve()
+
+    def stage_orbit_file_main(args):
+        assert Path(args.input_safe_file).name == product_id
+        Path(args.output_directory, "S1A_OPER_AUX_POEORB_OPOD.EOF").touch()
+        orbit_file_staged.set()
+
+    monkeypatch.setattr(download, download.download_asf_product.__name__, download_asf_product)
+    monkeypatch.setattr(download.stage_orbit_file, download.stage_orbit_file.main.__name__, stage_orbit_file_main)
+    monkeypatch.setattr(download, download.extract_one_to_one.__name__, MagicMock(return_value=dataset_dir))
+    monkeypatch.setattr(download, download.update_pending_dataset_with_index_name.__name__, MagicMock())
+
+    class Args:
+        dry_run = False
+        smoke_run = False
+        provider = "ASF"
+        transfer_protocol = "https"
+
+    # ACT
+    downloaded_bytes = download.download_from_asf(
+        session=MagicMock(),
+        es_conn=MagicMock(),
+        downloads=[{"https_url": f"https://www.example.com/{product_id}", "processing_mode": "forward"}],
+        args=Args(),
+        token=None,
+        job_id=None
+    )
+
+    # ASSERT
+    assert downloaded_bytes == len(b"SAFE")
+    assert [path.name for path in dataset_dir.iterdir()] == ["S1A_OPER_AUX_POEORB_OPOD.EOF"]
 
 
 def mock_token(*args):
@@ -578,7 +780,9 @@ def patch_subscriber(monkeypatch):
                             "https_url": "https://example.com/T00003.B01.tif",
                         }
                     ]
-                )
+                ),
+                get_downloaded_revision_dates_for=MagicMock(return_value={}),
+                es=MagicMock(get_by_id=MagicMock(side_effect=NotFoundError(404, "not_found")))  # no query checkpoint
             )
         )
     )
@@ -619,61 +823,58 @@ def patch_subscriber(monkeypatch):
     monkeypatch.setattr(
         query,
         query._request_search.__name__,
-        MagicMock(return_value=(
-            [
-                {
-                    "granule_id": "dummy_granule_id",
-                    "filtered_urls": [
-                        "https://example.com/T00000.B02.tif",
-                    ],
-                    "related_urls": [
-                        "https://example.com/T00000.B02.tif",
-                    ],
-                    "identifier": "S2A_dummy",
-                    "temporal_extent_beginning_datetime": datetime.now().isoformat(),
-                    "revision_date": datetime.now().isoformat(),
-                },
-                {
-                    "granule_id": "dummy_granule_id_2",
-                    "filtered_urls": [
-                        "https://example.com/T00001.B02.tif",
-                        "https://example.com/T00001.B03.tif",
-                    ],
-                    "related_urls": [
-                        "https://example.com/T00001.B02.tif",
-                        "https://example.com/T00001.B03.tif",
-                    ],
-                    "identifier": "S2A_dummy",
-                    "temporal_extent_beginning_datetime": datetime.now().isoformat(),
-                    "revision_date": datetime.now().isoformat(),
-                },
-                {
-                    "granule_id": "dummy_granule_id_3",
-                    "filtered_urls": [
-                        "https://example.com/T00002.B02.tif",
-                    ],
-                    "related_urls": [
-                        "https://example.com/T00002.B02.tif",
-                    ],
-                    "identifier": "S2A_dummy",
-                    "temporal_extent_beginning_datetime": datetime.now().isoformat(),
-                    "revision_date": datetime.now().isoformat(),
-                },
-                {
-                    "granule_id": "dummy_granule_id_4",
-                    "filtered_urls": [
-                        "https://example.com/T00003.B01.tif",
-                    ],
-                    "related_urls": [
-                        "https://example.com/T00003.B01.tif",
-                    ],
-                    "identifier": "S2A_dummy",
-                    "temporal_extent_beginning_datetime": datetime.now().isoformat(),
-                    "revision_date": datetime.now().isoformat(),
-                }
-            ],
-            False  # search_after
-        ))
+        mock_pages([
+            {
+                "granule_id": "dummy_granule_id",
+                "filtered_urls": [
+                    "https://example.com/T00000.B02.tif",
+                ],
+                "related_urls": [
+                    "https://example.com/T00000.B02.tif",
+                ],
+                "identifier": "S2A_dummy",
+                "temporal_extent_beginning_datetime": datetime.now().isoformat(),
+                "revision_date": datetime.now().isoformat(),
+            },
+            {
+                "granule_id": "dummy_granule_id_2",
+                "filtered_urls": [
+                    "https://example.com/T00001.B02.tif",
+                    "https://example.com/T00001.B03.tif",
+                ],
+                "related_urls": [
+                    "https://example.com/T00001.B02.tif",
+                    "https://example.com/T00001.B03.tif",
+                ],
+                "identifier": "S2A_dummy",
+                "temporal_extent_beginning_datetime": datetime.now().isoformat(),
+                "revision_date": datetime.now().isoformat(),
+            },
+            {
+                "granule_id": "dummy_granule_id_3",
+                "filtered_urls": [
+                    "https://example.com/T00002.B02.tif",
+                ],
+                "related_urls": [
+                    "https://example.com/T00002.B02.tif",
+                ],
+                "identifier": "S2A_dummy",
+                "temporal_extent_beginning_datetime": datetime.now().isoformat(),
+                "revision_date": datetime.now().isoformat(),
+            },
+            {
+                "granule_id": "dummy_granule_id_4",
+                "filtered_urls": [
+                    "https://example.com/T00003.B01.tif",
+                ],
+                "related_urls": [
+                    "https://example.com/T00003.B01.tif",
+                ],
+                "identifier": "S2A_dummy",
+                "temporal_extent_beginning_datetime": datetime.now().isoformat(),
+                "revision_date": datetime.now().isoformat(),
+            }
+        ])
     )
     monkeypatch.setattr(
         daac_data_subscriber,
@@ -687,6 +888,13 @@ def patch_subscriber(monkeypatch):
     )
 
 
+def mock_pages(*pages):
+    async def _pages(*args, **kwargs):
+        for page in pages:
+            yield page
+    return _pages
+
+
 def mock_extract_metadata(monkeypatch, mock_extract):
     monkeypatch.setattr(
         download.extractor.extract,
@@ -709,13 +917,15 @@ def mock_create_merged_files(monkeypatch):
 
 
 def patch_subscriber_io(monkeypatch):
-    """Patch I/O operations from smart_open, shutil, and json modules.
+    """Patch I/O operations from smart_open, shutil, placement_util, download_manifest, and json modules.
 
     Patched functions will do no-op, returning None.
     """
     mock_smart_open(monkeypatch)
     mock_path_package(monkeypatch)
     mock_shutil_package(monkeypatch)
+    mock_placement_util(monkeypatch)
+    mock_download_manifest(monkeypatch)
     mock_json_package(monkeypatch)
 
 
@@ -749,6 +959,22 @@ def mock_shutil_package(monkeypatch):
     )
 
 
+def mock_placement_util(monkeypatch):
+    monkeypatch.setattr(
+        download.placement_util,
+        download.placement_util.place_file_in_dir.__name__,
+        MagicMock()
+    )
+
+
+def mock_download_manifest(monkeypatch):
+    monkeypatch.setattr(
+        download.download_manifest,
+        download.download_manifest.create_download_manifest.__name__,
+        MagicMock(return_value=None)
+    )
+
+
 def mock_json_package(monkeypatch):
     monkeypatch.setattr(
         daac_data_subscriber.json,
@@ -782,6 +1008,14 @@ def mock_https_transfer(monkeypatch):
     )
 
 
+def mock_https_download(monkeypatch):
+    monkeypatch.setattr(
+        download.https_download,
+        download.https_download.download_file.__name__,
+        MagicMock()
+    )
+
+
 def mock_s3_transfer(monkeypatch):
     monkeypatch.setattr(
         download,
@@ -809,7 +1043,9 @@ def mock_boto3(monkeypatch):
             return None
 
     monkeypatch.setattr(
-        download.boto3,
-        download.boto3.Session.__name__,
+        s3_util.boto3,
+        s3_util.boto3.Session.__name__,
         MockSession
     )
+    s3_util.clear_s3_clients()
+
@@ -0,0 +1,80 @@
+from data_subscriber.download_chunk_planner import DownloadChunkPlanner, to_file_sizes
+
+GB = 1024 ** 3
+
+
+def add_batches(planner, sizes):
+    for i, size in enumerate(sizes):
+        planner.add(f"batch{i}", [f"https://example.com/batch{i}.zip", f"s3://example/batch{i}.zip"],
+                    {f"batch{i}.zip": size})
+
+
+def test_planner_without_byte_budget_chunks_by_count():
+    # ARRANGE
+    planner = DownloadChunkPlanner(max_batches_per_job=2)
+    add_batches(planner, [GB] * 5)
+
+    # ACT
+    full_chunks = planner.pop_full_chunks()
+    remaining_chunks = planner.pop_remaining_chunks()
+
+    # ASSERT
+    assert [[batch_id for batch_id, _ in chunk.batches] for chunk in full_chunks] == [["batch0", "batch1"], ["batch2", "batch3"]]
+    assert [[batch_id for batch_id, _ in chunk.batches] for chunk in remaining_chunks] == [["batch4"]]
+    assert full_chunks[0].batches[0][1] == {"https://example.com/batch0.zip", "s3://example/batch0.zip"}
+    assert planner.planned_bytes == [2 * GB, 2 * GB, GB]  # HTTPS and S3 URLs of a file are counted once
+
+
+def test_planner_bin_packs_by_bytes():
+    # ARRANGE
+    planner = DownloadChunkPlanner(max_batches_per_job=100, byte_budget=8 * GB, planning_window_jobs=2)
+    add_batches(planner, [8 * GB, 4 * GB, 4 * GB, 2 * GB, 2 * GB, 2 * GB, 2 * GB, None])  # unknown size is defaulted
+
+    # ACT
+    chunks = planner.pop_full_chunks() + planner.pop_remaining_chunks()
+
+    # ASSERT
+    assert len(chunks) == 3
+    assert sorted(chunk.planned_bytes for chunk in chunks) == [8 * GB, 8 * GB, 8 * GB + planner.default_file_size_bytes]
+    assert len(planner) == 0
+
+
+def test_planner_respects_max_jobs():
+    # ARRANGE
+    planner = DownloadChunkPlanner(max_batches_per_job=1, max_jobs=3)
+    add_batches(planner, [GB] * 10)
+
+    # ACT
+    full_chunks = planner.pop_full_chunks()
+    remaining_chunks = planner.pop_remaining_chunks()
+
+    # ASSERT
+    assert len(full_chunks) == 2
+    assert len(remaining_chunks) == 1
+    assert len(remaining_chunks[0].batches) == 8
+
+
+def test_planner_with_max_jobs_never_plans_empty_chunks():
+    # ARRANGE
+    planner = DownloadChunkPlanner(max_batches_per_job=1, max_jobs=4)
+    add_batches(planner, [GB] * 5)
+
+    # ACT
+    chunks = planner.pop_remaining_chunks()
+
+    # ASSERT
+    assert [len(chunk.batches) for chunk in chunks] == [2, 2, 1]
+    assert len(planner) == 0
+
+
+def test_to_file_sizes():
+    # ARRANGE
+    hls_granule = {"filtered_urls": ["https://example.com/T1.B02.tif", "https://example.com/T1.B03.tif"],
+                   "file_sizes": {"T1.B02.tif": 100, "T1.B03.tif": 200, "T1.jpg": 10}}
+    slc_granule = {"filtered_urls": ["https://example.com/S1A_IW_SLC.zip", "s3://example/S1A_IW_SLC.zip"],
+                   "file_sizes": {"S1A_IW_SLC-SLC": 4 * GB}}
+
+    # ACT / ASSERT
+    assert to_file_sizes(hls_granule) == {"T1.B02.tif": 100, "T1.B03.tif": 200}
+    assert to_file_sizes(slc_granule) == {"S1A_IW_SLC.zip": 4 * GB}
+    assert to_file_sizes({"filtered_urls": ["https://example.com/T1.B02.tif"]}) == {}
@@ -0,0 +1,27 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from data_subscriber.download_job_submitter import DownloadJobSubmitter
+
+
+@pytest.mark.asyncio
+async def test_download_job_submitter_retries_failed_submissions():
+    # ARRANGE
+    submit = MagicMock(side_effect=[ConnectionError("rabbitmq unavailable"), "job-1", "job-2", "job-3"])
+    submitter = DownloadJobSubmitter(submit, max_concurrency=1, max_submissions_per_second=0, max_tries=2)
+    loop = asyncio.get_event_loop()
+
+    # ACT
+    with submitter:
+        job_ids = await asyncio.gather(*[submitter.submit(loop, params=[{"name": str(i)}]) for i in range(3)])
+
+    # ASSERT
+    assert job_ids == ["job-1", "job-2", "job-3"]
+    assert submit.call_count == 4
+    assert submitter.submitted == 3
+    assert submitter.retries == 1
+    assert submitter.failed == 0
+    assert len(submitter.latencies_seconds) == 3
+
@@ -0,0 +1,94 @@
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from data_subscriber.download_manifest import DownloadManifest
+from util import checksum_util
+
+
+def test_download_manifest_is_resumed_by_later_attempts(tmp_path, monkeypatch):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    downloads_dir = tmp_path / "downloads"
+    downloads_dir.mkdir()
+    for band in ("B01", "B02", "B03"):
+        (downloads_dir / f"granule1.{band}.tif").write_bytes(band.encode())
+    checksum_util.cache_checksums(downloads_dir / "granule1.B03.tif", {"md5": "mismatch"}, sidecar=True)
+    (tmp_path / "granule1").mkdir()
+
+    manifest = DownloadManifest("key", root_dir=tmp_path, job_id="attempt1")
+    for band in ("B01", "B02", "B03"):
+        manifest.record_product(f"s3://bucket/granule1.{band}.tif", downloads_dir / f"granule1.{band}.tif")
+    manifest.record_dataset("granule1", tmp_path / "granule1")
+
+    (downloads_dir / "granule1.B02.tif").unlink()
+    checksum_util.clear_cached_checksums()
+    checksum_util.cache_checksums(downloads_dir / "granule1.B03.tif", {"md5": "changed"}, sidecar=True)
+
+    mock_es_conn = MagicMock()
+    mock_es_conn.get_download_states_for.return_value = {"granule1.B01.tif": False}
+
+    # ACT
+    resumed_manifest = DownloadManifest("key", root_dir=tmp_path, job_id="attempt2").load()
+    resumed_manifest.reconcile(mock_es_conn)
+
+    # ASSERT
+    assert resumed_manifest.is_dataset_complete("granule1")
+    assert resumed_manifest.get_completed_product("s3://bucket/granule1.B01.tif") == downloads_dir / "granule1.B01.tif"
+    assert resumed_manifest.get_completed_product("s3://bucket/granule1.B02.tif") is None  # deleted
+    assert resumed_manifest.get_completed_product("s3://bucket/granule1.B03.tif") is None  # modified
+    mock_es_conn.get_download_states_for.assert_called_once_with(["granule1.B01.tif"])
+    mock_es_conn.mark_product_as_downloaded.assert_called_once_with("s3://bucket/granule1.B01.tif", "attempt2")
+
+
+def test_download_manifest_complete_removes_retained_downloads(tmp_path):
+    # ARRANGE
+    root_dir = tmp_path / "key"
+    mock_es = MagicMock()
+    manifest = DownloadManifest("key", root_dir=root_dir, es=mock_es, retain_downloads=True)
+    manifest.downloads_dir.mkdir(parents=True)
+    (manifest.downloads_dir / "granule1.B01.tif").write_bytes(b"B01")
+    manifest.record_product("s3://bucket/granule1.B01.tif", manifest.downloads_dir / "granule1.B01.tif")
+
+    # ACT
+    manifest.complete()
+
+    # ASSERT
+    assert not Path(root_dir).exists()
+    assert mock_es.index_document.call_args.kwargs["body"]["status"] == "complete"
+
+
+def test_download_manifest_ignores_datasets_outside_the_working_dir(tmp_path, monkeypatch):
+    # ARRANGE
+    (tmp_path / "attempt1" / "granule1").mkdir(parents=True)
+    (tmp_path / "attempt2").mkdir()
+    mock_es = MagicMock()
+
+    monkeypatch.chdir(tmp_path / "attempt1")
+    manifest = DownloadManifest("key", root_dir=Path("."), es=mock_es, job_id="attempt1")
+    manifest.record_dataset("granule1", Path("granule1"))
+    mock_es.get_by_id.return_value = {"_source": mock_es.index_document.call_args.kwargs["body"]}
+
+    # ACT
+    monkeypatch.chdir(tmp_path / "attempt2")
+    resumed_manifest = DownloadManifest("key", root_dir=Path("."), es=mock_es, job_id="attempt2").load()
+
+    # ASSERT
+    assert mock_es.index_document.call_args.kwargs["body"]["datasets"][0]["dataset_dir"] == "granule1"
+    assert not resumed_manifest.is_dataset_complete("granule1")
+
+
+def test_download_manifest_ignores_completed_manifests(tmp_path, monkeypatch):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "granule1").mkdir()
+    mock_es = MagicMock()
+    manifest = DownloadManifest("key", root_dir=tmp_path, es=mock_es, job_id="attempt1")
+    manifest.record_dataset("granule1", tmp_path / "granule1")
+    manifest.complete()
+    mock_es.get_by_id.return_value = {"_source": mock_es.index_document.call_args.kwargs["body"]}
+
+    # ACT
+    rerun_manifest = DownloadManifest("key", root_dir=tmp_path, es=mock_es, job_id="rerun1").load()
+
+    # ASSERT
+    assert not rerun_manifest.is_dataset_complete("granule1")
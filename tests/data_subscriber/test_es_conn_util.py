@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+
+from elasticsearch import TransportError
+
+from data_subscriber import es_conn_util
+
+
+def to_hits(ids: list[str]) -> list[dict]:
+    return [{"_id": _id, "_source": {}, "sort": [i, i]} for i, _id in enumerate(ids)]
+
+
+def test_query_all_pages_with_search_after_over_pit():
+    # ARRANGE
+    es = MagicMock()
+    es.es.open_point_in_time.return_value = {"id": "pit1"}
+    es.es.search.side_effect = [
+        {"pit_id": "pit2", "hits": {"hits": to_hits(["a.tif", "b.tif"])}},
+        {"pit_id": "pit2", "hits": {"hits": to_hits(["c.tif"])}}
+    ]
+    body = {"sort": [{"creation_timestamp": "asc"}], "query": {"terms": {"granule_id": ["a", "b", "c"]}}}
+
+    # ACT
+    hits = es_conn_util.query_all(es, "hls_catalog-*", body, page_size=2)
+
+    # ASSERT
+    assert [hit["_id"] for hit in hits] == ["a.tif", "b.tif", "c.tif"]
+    first_page_body, second_page_body = [c.kwargs["body"] for c in es.es.search.call_args_list]
+    assert first_page_body["pit"]["id"] == "pit1"
+    assert first_page_body["sort"] == [{"creation_timestamp": "asc"}, {"_shard_doc": "asc"}]
+    assert "search_after" not in first_page_body
+    assert second_page_body["pit"]["id"] == "pit2"
+    assert second_page_body["search_after"] == [1, 1]
+    es.es.close_point_in_time.assert_called_once_with(body={"id": "pit2"})
+    es.query.assert_not_called()
+
+
+def test_query_all_falls_back_to_scroll_without_pit_support():
+    # ARRANGE
+    es = MagicMock()
+    es.es.open_point_in_time.side_effect = TransportError(400, "illegal_argument_exception")
+    es.query.return_value = to_hits(["a.tif"])
+
+    # ACT
+    hits = es_conn_util.query_all(es, "slc_catalog-*", {"query": {"match_all": {}}})
+
+    # ASSERT
+    assert [hit["_id"] for hit in hits] == ["a.tif"]
+    es.query.assert_called_once_with(index="slc_catalog-*", ignore_unavailable=True, body={"query": {"match_all": {}}})
@@ -0,0 +1,96 @@
+import hashlib
+import io
+
+import pytest
+import requests
+
+from data_subscriber import https_download
+from util import checksum_util
+
+BODY = bytes(range(256)) * 4096  # 1 MiB
+
+
+class DroppedConnection(io.BytesIO):
+    """Response body that fails after the given number of bytes."""
+    def __init__(self, body: bytes, drop_after_bytes: int):
+        super().__init__(body[:drop_after_bytes])
+
+    def read(self, *args, **kwargs):
+        chunk = super().read(*args, **kwargs)
+        if not chunk:
+            raise requests.exceptions.ConnectionError("Connection reset by peer")
+        return chunk
+
+
+def create_request(drop_after_bytes: int, honour_range=True):
+    """Returns a fake `request` serving BODY, which drops the connection of the first request."""
+    range_headers = []
+
+    def request(headers: dict) -> requests.Response:
+        range_header = headers.get("Range")
+        range_headers.append(range_header)
+        offset = int(range_header[len("bytes="):-1]) if range_header and honour_range else 0
+
+        response = requests.Response()
+        response.status_code = 206 if offset else 200
+        if offset:
+            response.headers["Content-Range"] = f"bytes {offset}-{len(BODY) - 1}/{len(BODY)}"
+        response.headers["Content-Length"] = str(len(BODY) - offset)
+        if len(range_headers) == 1:
+            response.raw = DroppedConnection(BODY, drop_after_bytes)
+        else:
+            response.raw = io.BytesIO(BODY[offset:])
+        return response
+
+    return request, range_headers
+
+
+@pytest.mark.parametrize("honour_range,expected_transferred_bytes", [
+    (True, len(BODY)),
+    (False, len(BODY) + 300_000)
+])
+def test_download_file_resumes_interrupted_transfer(tmp_path, honour_range, expected_transferred_bytes):
+    # ARRANGE
+    request, range_headers = create_request(drop_after_bytes=300_000, honour_range=honour_range)
+    target_filepath = tmp_path / "granule.B01.tif"
+
+    # ACT
+    stats = https_download.download_file(
+        "https://example.com/granule.B01.tif",
+        target_filepath,
+        request=request,
+        chunk_size=100_000,
+        initial_backoff_seconds=0,
+        checksum_algos=["md5", "sha256"]
+    )
+
+    # ASSERT
+    assert target_filepath.read_bytes() == BODY
+    assert not (tmp_path / "granule.B01.tif.part").exists()
+    assert range_headers == [None, "bytes=300000-"]
+    assert stats.retries == 1
+    assert stats.size_in_bytes == len(BODY)
+    assert stats.transferred_bytes == expected_transferred_bytes
+    assert stats.checksums == {"md5": hashlib.md5(BODY).hexdigest(), "sha256": hashlib.sha256(BODY).hexdigest()}
+    assert (tmp_path / f".granule.B01.tif{checksum_util.SIDECAR_SUFFIX}").exists()
+
+
+def test_download_file_gives_up_on_client_errors(tmp_path):
+    # ARRANGE
+    response = requests.Response()
+    response.status_code = 404
+    response.url = "https://example.com/granule.B01.tif"
+    response.raw = io.BytesIO()
+    requests_made = []
+
+    # ACT
+    with pytest.raises(requests.exceptions.HTTPError):
+        https_download.download_file(
+            response.url,
+            tmp_path / "granule.B01.tif",
+            request=lambda headers: requests_made.append(headers) or response,
+            initial_backoff_seconds=0
+        )
+
+    # ASSERT
+    assert len(requests_made) == 1
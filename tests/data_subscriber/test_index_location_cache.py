@@ -0,0 +1,72 @@
+import time
+from unittest.mock import MagicMock
+
+from data_subscriber import index_location_cache
+from data_subscriber.hls.hls_catalog import HLSProductCatalog
+from data_subscriber.index_location_cache import IndexLocationCache
+
+
+def test_index_location_cache_persists_across_instances(tmp_path):
+    # ARRANGE
+    path = tmp_path / "index_locations.sqlite3"
+    IndexLocationCache(path=path).put_many({"a.tif": "hls_catalog-2022.01", "b.tif": "hls_catalog-2022.02"})
+
+    # ACT
+    cache = IndexLocationCache(path=path)
+    locations = cache.get_many(["a.tif", "b.tif", "c.tif"])
+
+    # ASSERT
+    assert locations == {"a.tif": "hls_catalog-2022.01", "b.tif": "hls_catalog-2022.02"}
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+
+def test_index_location_cache_expires_persisted_locations(tmp_path, monkeypatch):
+    # ARRANGE
+    path = tmp_path / "index_locations.sqlite3"
+    IndexLocationCache(path=path, max_age_seconds=60).put("a.tif", "hls_catalog-2022.01")
+    monkeypatch.setattr(index_location_cache.time, index_location_cache.time.time.__name__,
+                        MagicMock(return_value=time.time() + 120))
+
+    # ACT
+    location = IndexLocationCache(path=path, max_age_seconds=60).get("a.tif")
+
+    # ASSERT
+    assert location is None
+
+
+def test_index_location_cache_evicts_least_recently_used():
+    cache = IndexLocationCache(max_size=2)
+
+    cache.put("a.tif", "hls_catalog-2022.01")
+    cache.put("b.tif", "hls_catalog-2022.01")
+    cache.get("a.tif")
+    cache.put("c.tif", "hls_catalog-2022.01")
+
+    assert cache.get("a.tif") == "hls_catalog-2022.01"
+    assert cache.get("b.tif") is None
+
+
+def test_catalog_index_name_lookup_is_cached():
+    # ARRANGE
+    catalog = HLSProductCatalog.__new__(HLSProductCatalog)
+    catalog.logger = MagicMock()
+    catalog.index_cache = IndexLocationCache()
+    catalog.es = MagicMock()
+    catalog.es.es.search = MagicMock(return_value={"hits": {"hits": [
+        {"_id": "a.tif", "_index": "hls_catalog-2022.01", "_source": {"https_url": "https://example.com/a.tif"}}
+    ]}})
+    catalog.es.query = MagicMock(return_value=[])
+
+    # ACT
+    catalog.get_all_between(MagicMock(), MagicMock(), use_temporal=False)  # warms the cache
+    index = catalog._get_index_name_for("a.tif", default="hls_catalog-2023.01")
+    new_index = catalog._get_index_name_for("b.tif", default="hls_catalog-2023.01")
+    new_index_again = catalog._get_index_name_for("b.tif", default="hls_catalog-2023.02")
+
+    # ASSERT
+    assert index == "hls_catalog-2022.01"
+    assert new_index == "hls_catalog-2023.01"
+    assert new_index_again == "hls_catalog-2023.02"  # the location of a new doc is not cached until it is written
+    assert catalog.es.es.search.call_count == 1  # the window query
+    assert catalog.es.query.call_count == 2
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+from pathlib import PurePath
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from data_subscriber import ionosphere_download
+
+
+def to_slc_dataset(product_id: str, processing_mode="forward") -> dict:
+    return {
+        "_id": product_id,
+        "_index": "grq_v1_l1_s1_slc-2023.01",
+        "_source": {
+            "metadata": {"intersects_north_america": True, "processing_mode": processing_mode},
+            "browse_urls": [f"s3://s3-us-west-2.amazonaws.com:80/bucket/browse/{product_id}"]
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_run_processes_datasets_concurrently_and_updates_only_uploaded_datasets(monkeypatch, tmp_path):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    slc_datasets = [to_slc_dataset(f"S1A_{i}") for i in range(4)] + [to_slc_dataset("S1A_historical", "historical")]
+    monkeypatch.setattr(ionosphere_download, "get_pending_slc_datasets", MagicMock(return_value=slc_datasets))
+    monkeypatch.setattr(ionosphere_download, "SettingsConf", MagicMock(
+        return_value=MagicMock(cfg={"IONOSPHERE_DOWNLOAD": {"MAX_DOWNLOADS": 2, "BULK_UPDATE_SIZE": 2}})))
+
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+
+    def download_ionosphere_correction_file(dataset_dir, product_id):
+        with lock:
+            in_flight.append(product_id)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.remove(product_id)
+        return PurePath(dataset_dir) / "jplg0010.23i", "https://example.com/jplg0010.23i.Z"
+
+    def try_s3_upload_file(slc_dataset_s3_url, output_ionosphere_filepath):
+        if "S1A_1" in slc_dataset_s3_url:
+            raise ConnectionError("upload failed")
+        return "bucket", "key"
+
+    async def submit_cslc_jobs(products, args):
+        return {"success": [f"job-{products[0]['_id']}"], "fail": []}
+
+    monkeypatch.setattr(ionosphere_download, "download_ionosphere_correction_file", download_ionosphere_correction_file)
+    monkeypatch.setattr(ionosphere_download, "try_s3_upload_file", try_s3_upload_file)
+    monkeypatch.setattr(ionosphere_download, "submit_cslc_jobs", submit_cslc_jobs)
+    monkeypatch.setattr(ionosphere_download, "generate_ionosphere_metadata", MagicMock(return_value={}))
+    mock_update = MagicMock(side_effect=lambda updates: {
+        product_id: {"status": 409} for _, product_id, _ in updates if product_id == "S1A_3"
+    })
+    monkeypatch.setattr(ionosphere_download.grq_client, "update_slc_datasets_with_ionosphere_metadata", mock_update)
+    mock_log_dataset_results = MagicMock(wraps=ionosphere_download.log_dataset_results)
+    monkeypatch.setattr(ionosphere_download, "log_dataset_results", mock_log_dataset_results)
+
+    # ACT
+    with pytest.raises(Exception) as exc_info:
+        await ionosphere_download.run(["ionosphere_download.py", "--release-version=1.0"])
+
+    # ASSERT
+    assert max(max_in_flight) == 2
+    assert sorted(len(c.args[0]) for c in mock_update.call_args_list) == [1, 2]  # bulk updates
+    assert sorted(product_id for c in mock_update.call_args_list for _, product_id, _ in c.args[0]) \
+           == ["S1A_0", "S1A_2", "S1A_3"]
+    assert len(exc_info.value.args[0]) == 2
+
+    dataset_results = {r.product_id: r for r in mock_log_dataset_results.call_args.args[0]}
+    assert dataset_results["S1A_1"].status == ionosphere_download.DatasetStatus.FAILED
+    assert dataset_results["S1A_1"].failed_stage == "upload"
+    assert dataset_results["S1A_2"].job_ids == ["job-S1A_2"]
+    assert dataset_results["S1A_2"].status == ionosphere_download.DatasetStatus.SUCCESS
+    assert dataset_results["S1A_3"].status == ionosphere_download.DatasetStatus.FAILED
+    assert dataset_results["S1A_3"].failed_stage == "es_update"
+    assert dataset_results["S1A_historical"].status == ionosphere_download.DatasetStatus.SKIPPED
+
+
+@pytest.mark.asyncio
+async def test_run_updates_datasets_as_their_jobs_are_submitted(monkeypatch, tmp_path):
+    # ARRANGE
+    monkeypatch.chdir(tmp_path)
+    slc_datasets = [to_slc_dataset(f"S1A_{i}") for i in range(3)]
+    monkeypatch.setattr(ionosphere_download, "get_pending_slc_datasets", MagicMock(return_value=slc_datasets))
+    monkeypatch.setattr(ionosphere_download, "SettingsConf", MagicMock(
+        return_value=MagicMock(cfg={"IONOSPHERE_DOWNLOAD": {"MAX_CONCURRENT_DATASETS": 1, "BULK_UPDATE_SIZE": 1}})))
+
+    updated = []
+    updated_before_submission = {}
+
+    async def submit_cslc_jobs(products, args):
+        for _ in range(100):  # give the update of the previous dataset a chance to complete
+            if len(updated) == len(updated_before_submission):
+                break
+            await asyncio.sleep(0.01)
+        updated_before_submission[products[0]["_id"]] = list(updated)
+        return {"success": [f"job-{products[0]['_id']}"], "fail": []}
+
+    monkeypatch.setattr(ionosphere_download, "download_ionosphere_correction_file", MagicMock(
+        side_effect=lambda dataset_dir, product_id: (PurePath(dataset_dir) / "jplg0010.23i", "https://example.com")))
+    monkeypatch.setattr(ionosphere_download, "try_s3_upload_file", MagicMock(return_value=("bucket", "key")))
+    monkeypatch.setattr(ionosphere_download, "submit_cslc_jobs", submit_cslc_jobs)
+    monkeypatch.setattr(ionosphere_download, "generate_ionosphere_metadata", MagicMock(return_value={}))
+    monkeypatch.setattr(ionosphere_download.grq_client, "update_slc_datasets_with_ionosphere_metadata", MagicMock(
+        side_effect=lambda updates: updated.extend(product_id for _, product_id, _ in updates) or {}))
+
+    # ACT
+    await ionosphere_download.run(["ionosphere_download.py", "--release-version=1.0"])
+
+    # ASSERT
+    assert updated_before_submission == {"S1A_0": [], "S1A_1": ["S1A_0"], "S1A_2": ["S1A_0", "S1A_1"]}
+    assert updated == ["S1A_0", "S1A_1", "S1A_2"]
+
+@pytest.mark.parametrize("existing_object_size,expected_upload", [(None, True), (3, True), (4, False)])
+def test_try_s3_upload_file_skips_objects_already_uploaded(monkeypatch, tmp_path, existing_object_size, expected_upload):
+    # ARRANGE
+    output_ionosphere_filepath = tmp_path / "jplg0010.23i"
+    output_ionosphere_filepath.write_bytes(b"data")
+    mock_s3_client = MagicMock()
+    if existing_object_size is None:
+        mock_s3_client.head_object.side_effect = ClientError({"Error": {"Code": "404"}}, "HeadObject")
+    else:
+        mock_s3_client.head_object.return_value = {"ContentLength": existing_object_size}
+    monkeypatch.setattr(ionosphere_download.s3_util, "get_s3_client", MagicMock(return_value=mock_s3_client))
+
+    # ACT
+    s3_bucket, s3_key = ionosphere_download.try_s3_upload_file(
+        "s3://s3-us-west-2.amazonaws.com:80/bucket/browse/S1A_0", output_ionosphere_filepath)
+
+    # ASSERT
+    assert (s3_bucket, s3_key) == ("bucket", "S1A_0")
+    mock_s3_client.head_object.assert_called_once_with(Bucket="bucket", Key="S1A_0/jplg0010.23i")
+    assert mock_s3_client.upload_file.called == expected_upload
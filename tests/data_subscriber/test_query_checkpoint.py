@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from elasticsearch.exceptions import ConnectionError, NotFoundError
+
+from data_subscriber import query_checkpoint
+from data_subscriber.query import DateTimeRange
+from data_subscriber.query_checkpoint import QueryCheckpointStore
+
+
+def test_resume_timerange_narrows_overlapping_window():
+    query_timerange = DateTimeRange("2023-01-01T00:00:00Z", "2023-01-01T01:00:00Z")
+    watermark = datetime(2023, 1, 1, 0, 50, tzinfo=timezone.utc)
+
+    resumed = query_checkpoint.resume_timerange(query_timerange, watermark, safety_overlap=timedelta(minutes=5))
+
+    assert resumed == DateTimeRange("2023-01-01T00:45:00Z", "2023-01-01T01:00:00Z")
+
+
+def test_resume_timerange_catches_up_after_missed_runs():
+    query_timerange = DateTimeRange("2023-01-01T00:00:00Z", "2023-01-01T01:00:00Z")
+    watermark = datetime(2022, 12, 31, 18, 0, tzinfo=timezone.utc)
+
+    resumed = query_checkpoint.resume_timerange(query_timerange, watermark, safety_overlap=timedelta(minutes=15))
+
+    assert resumed == DateTimeRange("2022-12-31T17:45:00Z", "2023-01-01T01:00:00Z")
+
+
+def test_resume_timerange_caps_catch_up():
+    query_timerange = DateTimeRange("2023-01-10T00:00:00Z", "2023-01-10T01:00:00Z")
+    watermark = datetime(2023, 1, 1, 0, 15, tzinfo=timezone.utc)
+
+    resumed = query_checkpoint.resume_timerange(query_timerange, watermark, safety_overlap=timedelta(minutes=15),
+                                                max_catch_up=timedelta(hours=24))
+
+    assert resumed == DateTimeRange("2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z")
+
+
+def test_resume_timerange_without_watermark():
+    query_timerange = DateTimeRange("2023-01-01T00:00:00Z", "2023-01-01T01:00:00Z")
+
+    assert query_checkpoint.resume_timerange(query_timerange, watermark=None) == query_timerange
+
+
+def test_is_checkpointable():
+    args = SimpleNamespace(start_date=None, end_date=None, native_id=None, use_temporal=False, smoke_run=False)
+    assert query_checkpoint.is_checkpointable(args)
+
+    args.start_date = "2023-01-01T00:00:00Z"
+    assert not query_checkpoint.is_checkpointable(args)
+
+
+def test_checkpoint_store_round_trip():
+    es = MagicMock()
+    store = QueryCheckpointStore(es)
+
+    store.set_watermark("HLSS30-OPS-forward", datetime(2023, 1, 1, 1, 0))
+    es.get_by_id.return_value = {"_source": es.index_document.call_args.kwargs["body"]}
+
+    assert store.get_watermark("HLSS30-OPS-forward") == datetime(2023, 1, 1, 1, 0, tzinfo=timezone.utc)
+    es.get_by_id.side_effect = NotFoundError(404, "not_found")
+    assert store.get_watermark("HLSS30-OPS-forward") is None
+
+
+def test_checkpoint_store_raises_es_errors():
+    es = MagicMock()
+    es.get_by_id.side_effect = ConnectionError("N/A", "connection refused", None)
+    store = QueryCheckpointStore(es)
+
+    with pytest.raises(ConnectionError):
+        store.get_watermark("HLSS30-OPS-forward")
@@ -11,7 +11,7 @@ def test_extract(mocker: MockerFixture):
         True,  # dataset_dir
         False  # dataset_met_file
     ])
-    mocker.patch("shutil.copyfile")
+    mocker.patch("util.placement_util.place_file")
     mocker.patch("os.path.getsize")
 
     mocker.patch("extractor.extract.create_dataset_id", return_value="HLS.L30.T22VEQ.2021248T143156.v2.0.Fmask")
@@ -42,7 +42,7 @@ def test_extract_multiple(mocker: MockerFixture):
         True, False,  # dataset_dir, dataset_met_file
         True, False,  # dataset_dir, dataset_met_file
     ])
-    mocker.patch("shutil.copyfile")
+    mocker.patch("util.placement_util.place_file")
     mocker.patch("os.path.getsize")
 
     mocker.patch("extractor.extract.create_dataset_id", side_effect=[
@@ -76,7 +76,7 @@ def test_extract_multiple(mocker: MockerFixture):
 def test_extract_metadata(mocker: MockerFixture):
     # ARRANGE
     mocker.patch("os.path.exists", return_value=True)
-    mocker.patch("shutil.copyfile")
+    mocker.patch("util.placement_util.place_file")
     mocker.patch("os.path.getsize")
 
     # ACT
@@ -1,4 +1,4 @@
-from geo.geo_util import does_bbox_intersect_north_america, Coordinate
+from geo.geo_util import does_bbox_intersect_north_america, intersects_north_america_many, Coordinate
 from util.geo_util import polygon_from_bounding_box, polygon_from_mgrs_tile
 
 from shapely.geometry import Polygon
@@ -59,4 +59,33 @@ def test_polygon_from_mgrs_tile_nominal_antimeridian():
                                         xmax= 178.82637550795243,
                                         ymax=63.16076767648831)
 
-    assert poly == expected_poly
\ No newline at end of file
+    assert poly == expected_poly
+
+def test_intersects_north_america_many():
+    colorado_bbox: list[Coordinate] = [
+        {"lon": -109.060253, "lat": 36.992426},
+        {"lon": -109.060253, "lat": 41.003444},
+        {"lon": -102.041524, "lat": 41.003444},
+        {"lon": -102.041524, "lat": 36.992426},
+        {"lon": -109.060253, "lat": 36.992426}
+    ]
+    central_america_bbox: list[Coordinate] = [
+        {"lon": -91.324852, "lat": 11.026079},
+        {"lon": -90.954483, "lat": 9.222121},
+        {"lon": -88.683533, "lat": 9.676103},
+        {"lon": -89.040413, "lat": 11.475266},
+        {"lon": -91.324852, "lat": 11.026079}
+    ]
+    # no vertex is inside North America, but the bbox contains Colorado
+    continental_us_bbox: list[Coordinate] = [
+        {"lon": -130.0, "lat": 20.0},
+        {"lon": -130.0, "lat": 55.0},
+        {"lon": -60.0, "lat": 55.0},
+        {"lon": -60.0, "lat": 20.0},
+        {"lon": -130.0, "lat": 20.0}
+    ]
+
+    results = intersects_north_america_many([colorado_bbox, central_america_bbox, continental_us_bbox, []])
+
+    assert results.tolist() == [True, False, True, False]
+    assert len(intersects_north_america_many([])) == 0
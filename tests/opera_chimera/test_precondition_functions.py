@@ -101,7 +101,7 @@ class TestOperaPreConditionFunctions(unittest.TestCase):
         # Create a temporary working directory
         self.working_dir = tempfile.TemporaryDirectory(suffix="_temp", prefix="test_precondition_functions_")
 
-        self.start_dir = os.curdir
+        self.start_dir = os.getcwd()
         os.chdir(self.working_dir.name)
 
         # Create the workunit.json file that points to our temp dir
@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tools import ionosphere_file_cache, stage_ionosphere_file
+from tools.ionosphere_file_cache import IonosphereFileCache
+from tools.stage_ionosphere_file import IonosphereFileNotFoundException
+
+SAFE_FILE_DAY_1_A = "S1A_IW_SLC__1SDV_20230101T000000_20230101T000027_046579_05951D_1A2B.zip"
+SAFE_FILE_DAY_1_B = "S1A_IW_SLC__1SDV_20230101T120000_20230101T120027_046586_0595A0_3C4D.zip"
+SAFE_FILE_DAY_2 = "S1A_IW_SLC__1SDV_20230102T000000_20230102T000027_046594_0595F2_5E6F.zip"
+
+
+@pytest.fixture
+def mock_downloads(monkeypatch):
+    """Serves archives from a fake endpoint. Returns the URLs requested."""
+    requested_urls = []
+    lock = threading.Lock()
+
+    def download_ionosphere_archive(request_url, username, password, output_directory):
+        with lock:
+            requested_urls.append(request_url)
+        if "jplg0020" in request_url:
+            raise IonosphereFileNotFoundException(request_url)
+        archive_path = os.path.join(output_directory, os.path.basename(request_url))
+        with open(archive_path, "wb") as fp:
+            fp.write(b"x" * 10)
+        return archive_path
+
+    def uncompress_ionosphere_archive(archive_path):
+        extraction_path = os.path.splitext(archive_path)[0]
+        os.rename(archive_path, extraction_path)
+        return extraction_path
+
+    monkeypatch.setattr(stage_ionosphere_file, "download_ionosphere_archive", download_ionosphere_archive)
+    monkeypatch.setattr(stage_ionosphere_file, "uncompress_ionosphere_archive", uncompress_ionosphere_archive)
+    return requested_urls
+
+
+def test_get_downloads_each_day_once(tmp_path, mock_downloads):
+    # ARRANGE
+    cache = IonosphereFileCache(tmp_path / "cache", username="user", password="pass")
+
+    # ACT
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        ionosphere_files = list(executor.map(cache.get, [SAFE_FILE_DAY_1_A, SAFE_FILE_DAY_1_B] * 4))
+
+    # ASSERT
+    assert mock_downloads == [f"{stage_ionosphere_file.DEFAULT_DOWNLOAD_ENDPOINT}/2023/001/jplg0010.23i.Z"]
+    assert {ionosphere_file.filepath for ionosphere_file in ionosphere_files} == {tmp_path / "cache" / "jplg0010.23i"}
+    assert not [name for name in os.listdir(tmp_path / "cache") if name.startswith(".download-")]
+
+
+def test_get_falls_back_to_jprg_and_remembers_missing_archives(tmp_path, mock_downloads):
+    # ARRANGE
+    cache = IonosphereFileCache(tmp_path / "cache", username="user", password="pass")
+
+    # ACT
+    cache.get(SAFE_FILE_DAY_2)
+    ionosphere_file = cache.get(SAFE_FILE_DAY_2)
+
+    # ASSERT
+    assert ionosphere_file.filepath.name == "jprg0020.23i"
+    assert ionosphere_file.url.endswith("/2023/002/jprg0020.23i.Z")
+    assert [os.path.basename(url) for url in mock_downloads] == ["jplg0020.23i.Z", "jprg0020.23i.Z"]
+
+
+def test_get_evicts_least_recently_used_files(tmp_path, mock_downloads):
+    # ARRANGE
+    cache = IonosphereFileCache(tmp_path / "cache", max_size_bytes=15, username="user", password="pass")
+    cache.get(SAFE_FILE_DAY_1_A)
+
+    # ACT
+    cache.get(SAFE_FILE_DAY_2)
+
+    # ASSERT
+    assert sorted(os.listdir(tmp_path / "cache")) == ["jprg0020.23i"]
+
+
+def test_place_links_cached_file_into_output_dir(tmp_path, mock_downloads):
+    # ARRANGE
+    cache = IonosphereFileCache(tmp_path / "cache", username="user", password="pass")
+    (tmp_path / "dataset").mkdir()
+
+    # ACT
+    ionosphere_file = cache.place(SAFE_FILE_DAY_1_A, tmp_path / "dataset")
+
+    # ASSERT
+    assert ionosphere_file.filepath == tmp_path / "dataset" / "jplg0010.23i"
+    assert os.path.samefile(ionosphere_file.filepath, tmp_path / "cache" / "jplg0010.23i")
+
+
+def test_get_ionosphere_file_cache_is_configured_by_settings(monkeypatch, tmp_path):
+    # ARRANGE
+    monkeypatch.setattr(ionosphere_file_cache, "_cache", None)
+    settings = {"IONOSPHERE_FILE_CACHE": {"DIR": str(tmp_path / "cache"), "MAX_SIZE_MB": 1}}
+
+    # ACT
+    cache = ionosphere_file_cache.get_ionosphere_file_cache(settings)
+
+    # ASSERT
+    assert cache.cache_dir == tmp_path / "cache"
+    assert cache.max_size_bytes == 1024 ** 2
+    assert ionosphere_file_cache.get_ionosphere_file_cache() is cache
+
+
+@pytest.mark.parametrize("netrc_content", [None, "machine example.com login user password pass\n"],
+                         ids=["no_netrc", "no_edl_entry"])
+def test_get_without_edl_credentials_raises_runtime_error(tmp_path, monkeypatch, mock_downloads, netrc_content):
+    # ARRANGE
+    monkeypatch.setenv("HOME", str(tmp_path))
+    if netrc_content:
+        (tmp_path / ".netrc").write_text(netrc_content)
+        (tmp_path / ".netrc").chmod(0o600)
+    cache = IonosphereFileCache(tmp_path / "cache")
+
+    # ACT/ASSERT
+    with pytest.raises(RuntimeError, match="netrc"):
+        cache.get(SAFE_FILE_DAY_1_A)
+    assert mock_downloads == []
@@ -0,0 +1,206 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from tools import orbit_catalog, stage_orbit_file
+from tools.orbit_catalog import OrbitCatalog
+
+ORBIT_FILE_LISTING = [
+    "s3://orbits/S1A_OPER_AUX_POEORB_OPOD_20220520T081912_V20220429T225942_20220501T005942.EOF",
+    "s3://orbits/S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942.EOF",
+    "s3://orbits/S1A_OPER_AUX_POEORB_OPOD_20220522T081912_V20220501T225942_20220503T005942.EOF",
+    "s3://orbits/S1B_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942.EOF",
+    "s3://orbits/S1A_OPER_AUX_RESORB_OPOD_20220501T034503_V20220501T001117_20220501T032847.EOF",
+    "s3://orbits/S1A_OPER_AUX_RESORB_OPOD_20220501T052018_V20220501T014717_20220501T050447.EOF",
+    "s3://orbits/README.md"
+]
+
+QUERY_RESULT_XML = """<?xml version="1.0" encoding="utf-8"?>
+    <feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">
+    <opensearch:totalResults>2</opensearch:totalResults>
+    <entry>
+    <id>a4c32eea-7c42-4bd7-ae4e-404151a11120</id>
+    <str name="filename">S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942.EOF</str>
+    </entry>
+    <entry>
+    <id>b5d43ffb-8d53-5ce8-bf5f-515262b22231</id>
+    <str name="filename">S1A_OPER_AUX_POEORB_OPOD_20220522T081912_V20220501T225942_20220503T005942.EOF</str>
+    </entry>
+    </feed>
+"""
+
+
+@pytest.fixture
+def catalog():
+    with OrbitCatalog() as catalog:
+        catalog.sync_from_listing(ORBIT_FILE_LISTING)
+        yield catalog
+
+
+def test_sync_from_listing_ignores_other_files(catalog):
+    # ASSERT
+    assert len(catalog) == len(ORBIT_FILE_LISTING) - 1
+
+
+def test_find_covering_poeorb(catalog):
+    # ACT
+    orbit_file = catalog.find_covering("S1A", "POEORB", datetime(2022, 5, 1, 1, 50, 35), datetime(2022, 5, 1, 1, 51, 2))
+
+    # ASSERT
+    assert orbit_file.name == "S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942.EOF"
+    assert orbit_file.url == "s3://orbits/" + orbit_file.name
+
+
+def test_find_covering_filters_by_mission(catalog):
+    # ACT
+    orbit_file = catalog.find_covering("S1B", "POEORB", datetime(2022, 5, 1, 1, 50, 35), datetime(2022, 5, 1, 1, 51, 2))
+
+    # ASSERT
+    assert orbit_file.mission_id == "S1B"
+
+
+def test_find_covering_resorb_with_margin(catalog):
+    # ARRANGE
+    start, stop = datetime(2022, 5, 1, 1, 0, 0), datetime(2022, 5, 1, 3, 20, 0)
+
+    # ACT
+    orbit_file = catalog.find_covering("S1A", "RESORB", start, stop)
+    orbit_file_with_margin = catalog.find_covering("S1A", "RESORB", start, stop, margin=timedelta(minutes=10))
+
+    # ASSERT
+    assert orbit_file.name == "S1A_OPER_AUX_RESORB_OPOD_20220501T034503_V20220501T001117_20220501T032847.EOF"
+    assert orbit_file_with_margin is None
+
+
+def test_find_covering_returns_none_when_not_covered(catalog):
+    # ACT
+    orbit_file = catalog.find_covering("S1A", "POEORB", datetime(2022, 5, 3, 0, 0, 0), datetime(2022, 5, 3, 1, 0, 0))
+
+    # ASSERT
+    assert orbit_file is None
+
+
+def test_add_keeps_known_urls(catalog):
+    # ARRANGE
+    orbit_file_name = "S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942.EOF"
+
+    # ACT
+    added = catalog.add([orbit_catalog.parse_orbit_file_name(orbit_file_name)])
+
+    # ASSERT
+    assert added == 1
+    assert len(catalog) == len(ORBIT_FILE_LISTING) - 1
+    orbit_file = catalog.find_covering("S1A", "POEORB", datetime(2022, 5, 1, 1, 50, 35), datetime(2022, 5, 1, 1, 51, 2))
+    assert orbit_file.url == "s3://orbits/" + orbit_file_name
+
+
+def test_sync_from_query_results_adds_download_urls():
+    # ARRANGE
+    entry_elems, namespace_map = stage_orbit_file.parse_orbit_file_query_xml(QUERY_RESULT_XML)
+
+    with OrbitCatalog() as catalog:
+        # ACT
+        catalog.sync_from_query_results(entry_elems, namespace_map, "https://example.com/odata/v1")
+
+        # ASSERT
+        orbit_file = catalog.find_covering("S1A", "POEORB", datetime(2022, 5, 2, 1, 0, 0), datetime(2022, 5, 2, 1, 1, 0))
+        assert orbit_file.url == "https://example.com/odata/v1/Products('b5d43ffb-8d53-5ce8-bf5f-515262b22231')/$value"
+
+
+def test_sync_from_query_results_skips_entries_without_file_name():
+    # ARRANGE
+    query_result_xml = QUERY_RESULT_XML.replace(
+        '<str name="filename">S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942.EOF</str>', ""
+    )
+    entry_elems, namespace_map = stage_orbit_file.parse_orbit_file_query_xml(query_result_xml)
+
+    with OrbitCatalog() as catalog:
+        # ACT
+        added = catalog.sync_from_query_results(entry_elems, namespace_map, "https://example.com/odata/v1")
+
+        # ASSERT
+        assert added == 1
+        assert catalog.find_covering("S1A", "POEORB", datetime(2022, 4, 30, 23, 0, 0), datetime(2022, 4, 30, 23, 30, 0)) is None
+
+
+def test_find_covering_prefers_latest_validity_start_over_query_order():
+    # ARRANGE
+    entry_elems, namespace_map = stage_orbit_file.parse_orbit_file_query_xml(QUERY_RESULT_XML)
+
+    with OrbitCatalog() as catalog:
+        catalog.sync_from_query_results(entry_elems, namespace_map, "https://example.com/odata/v1")
+
+        # ACT
+        orbit_file = catalog.find_covering("S1A", "POEORB", datetime(2022, 5, 2, 0, 0, 0), datetime(2022, 5, 2, 0, 30, 0))
+
+        # ASSERT
+        assert orbit_file.name == "S1A_OPER_AUX_POEORB_OPOD_20220522T081912_V20220501T225942_20220503T005942.EOF"
+
+
+def test_find_covering_requires_strictly_enveloping_validity(catalog):
+    # ACT
+    orbit_file = catalog.find_covering("S1B", "POEORB", datetime(2022, 4, 30, 22, 59, 42), datetime(2022, 5, 2, 0, 59, 42))
+
+    # ASSERT
+    assert orbit_file is None
+
+def test_catalog_persists_to_file(tmp_path):
+    # ARRANGE
+    with OrbitCatalog(tmp_path / "orbit_catalog.sqlite3") as catalog:
+        catalog.sync_from_listing(ORBIT_FILE_LISTING)
+
+    # ACT
+    with OrbitCatalog(tmp_path / "orbit_catalog.sqlite3") as catalog:
+        # ASSERT
+        assert len(catalog) == len(ORBIT_FILE_LISTING) - 1
+
+
+def test_stage_orbit_file_uses_catalog_without_query(tmp_path, monkeypatch, capsys):
+    # ARRANGE
+    with OrbitCatalog(tmp_path / "orbit_catalog.sqlite3") as catalog:
+        catalog.sync_from_listing(ORBIT_FILE_LISTING)
+    mock_query = MagicMock(side_effect=AssertionError("queried the orbit file service"))
+    monkeypatch.setattr(stage_orbit_file, "query_orbit_file_service", mock_query)
+    monkeypatch.chdir(tmp_path)
+    args = stage_orbit_file.get_parser().parse_args([
+        "--orbit-type=POEORB",
+        f"--catalog={tmp_path / 'orbit_catalog.sqlite3'}",
+        "--url-only",
+        "S1A_IW_SLC__1SDV_20220501T015035_20220501T015102_043011_0522A4_42CC.zip"
+    ])
+
+    # ACT
+    stage_orbit_file.main(args)
+
+    # ASSERT
+    mock_query.assert_not_called()
+    assert capsys.readouterr().out.strip() == \
+        "s3://orbits/S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942.EOF"
+
+
+def test_stage_orbit_file_adds_query_results_to_catalog(tmp_path, monkeypatch, capsys):
+    # ARRANGE
+    monkeypatch.setattr(stage_orbit_file, "query_orbit_file_service", MagicMock(return_value=QUERY_RESULT_XML))
+    monkeypatch.chdir(tmp_path)
+    args = stage_orbit_file.get_parser().parse_args([
+        "--orbit-type=POEORB",
+        f"--catalog={tmp_path / 'orbit_catalog.sqlite3'}",
+        "--download-endpoint=https://example.com/odata/v1",
+        "--url-only",
+        "S1A_IW_SLC__1SDV_20220501T015035_20220501T015102_043011_0522A4_42CC.zip"
+    ])
+
+    # ACT
+    stage_orbit_file.main(args)
+
+    # ASSERT
+    assert capsys.readouterr().out.strip() == \
+        "https://example.com/odata/v1/Products('a4c32eea-7c42-4bd7-ae4e-404151a11120')/$value"
+    with OrbitCatalog(tmp_path / "orbit_catalog.sqlite3") as catalog:
+        assert len(catalog) == 2
+
+
+def test_parse_orbit_file_name_rejects_other_names():
+    # ACT/ASSERT
+    assert orbit_catalog.parse_orbit_file_name("S1A_OPER_AUX_POEORB_OPOD_20220521T081912.EOF") is None
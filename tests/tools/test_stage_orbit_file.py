@@ -117,37 +117,13 @@ class TestStageOrbitFile(unittest.TestCase):
             </feed>
         """
 
-        safe_start_time = '20220430T230000'
-        safe_stop_time = '20220430T233000'
-
         entry_elems, namespace_map = tools.stage_orbit_file.parse_orbit_file_query_xml(valid_xml_response)
 
-        # Select an appropriate orbit file from the list returned from the query
-        orbit_file_name, orbit_file_request_id = tools.stage_orbit_file.select_orbit_file(
-            entry_elems, namespace_map, safe_start_time, safe_stop_time
-        )
-
         # Make sure we parsed the results as expected
+        self.assertEquals(len(entry_elems), 1)
         self.assertEquals(
-            orbit_file_name, "S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942.EOF"
+            entry_elems[0].findtext('id', namespaces=namespace_map), "a4c32eea-7c42-4bd7-ae4e-404151a11120"
         )
-        self.assertEquals(
-            orbit_file_request_id, "a4c32eea-7c42-4bd7-ae4e-404151a11120"
-        )
-
-        # Test with valid XML, but no suitable orbit file that covers SAFE time range
-        safe_start_time = '20220430T225942'
-        safe_stop_time = '20220502T005942'
-
-        with self.assertRaises(RuntimeError) as err:
-            entry_elems, namespace_map = tools.stage_orbit_file.parse_orbit_file_query_xml(valid_xml_response)
-
-            tools.stage_orbit_file.select_orbit_file(
-                entry_elems, namespace_map, safe_start_time, safe_stop_time
-            )
-
-        self.assertIn('No suitable orbit file could be found within the results of the query',
-                      str(err.exception))
 
         # Test with invalid XML (missing totalResults)
         invalid_xml_response = """<?xml version="1.0" encoding="utf-8"?>
@@ -207,44 +183,3 @@ class TestStageOrbitFile(unittest.TestCase):
 
         self.assertIn('Could not find any "entry" tags within parsed query results',
                       str(err.exception))
-
-        # Test with invalid XML ("entry" tag missing filename)
-        invalid_xml_response = """<?xml version="1.0" encoding="utf-8"?>
-            <feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">
-            <subtitle>Displaying 1 results. Request done in 0.012 seconds.</subtitle>
-            <updated>2022-09-27T18:13:43.726Z</updated>
-            <author>
-            <name>Sentinels GNSS RINEX Hub</name>
-            </author>
-            <opensearch:totalResults>1</opensearch:totalResults>
-            <opensearch:startIndex>0</opensearch:startIndex>
-            <opensearch:itemsPerPage>10</opensearch:itemsPerPage>
-            <entry>
-            <title>S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942</title>
-            <id>a4c32eea-7c42-4bd7-ae4e-404151a11120</id>
-            <str name="format">EOF</str>
-            <str name="size">4.2 MB</str>
-            <str name="platformname">Sentinel-1</str>
-            <str name="platformshortname">S1</str>
-            <str name="platformnumber">A</str>
-            <str name="platformserialidentifier">1A</str>
-            <str name="producttype">AUX_POEORB</str>
-            <str name="filedescription">Precise Orbit Ephemerides (POE) Orbit File</str>
-            <str name="fileclass">OPER</str>
-            <str name="creator">OPOD</str>
-            <str name="creatorversion">1.11.6</str>
-            <str name="identifier">S1A_OPER_AUX_POEORB_OPOD_20220521T081912_V20220430T225942_20220502T005942</str>
-            <str name="uuid">a4c32eea-7c42-4bd7-ae4e-404151a11120</str>
-            </entry>
-            </feed>
-        """
-
-        with self.assertRaises(RuntimeError) as err:
-            entry_elems, namespace_map = tools.stage_orbit_file.parse_orbit_file_query_xml(invalid_xml_response)
-
-            tools.stage_orbit_file.select_orbit_file(
-                entry_elems, namespace_map, safe_start_time, safe_stop_time
-            )
-
-        self.assertIn('No suitable orbit file could be found within the results of the query',
-                      str(err.exception))
@@ -0,0 +1,70 @@
+import hashlib
+import os
+
+import pytest
+
+from util import checksum_util
+
+
+@pytest.fixture(autouse=True)
+def clear_cached_checksums():
+    checksum_util.clear_cached_checksums()
+    yield
+    checksum_util.clear_cached_checksums()
+
+
+def test_create_dataset_checksums_reuses_cached_checksums(tmp_path):
+    # ARRANGE
+    cached_file = tmp_path / "granule.B01.tif"
+    cached_file.write_bytes(b"band 1")
+    checksum_util.cache_checksums(cached_file, {"sha256": "cached"}, sidecar=True)
+    uncached_file = tmp_path / "granule.B02.tif"
+    uncached_file.write_bytes(b"band 2")
+    checksum_util.clear_cached_checksums()  # only the sidecar file remains
+
+    # ACT
+    checksum_util.create_dataset_checksums(str(tmp_path), "sha256", globs=["*.tif"], regex=[r".*\.B0\d\.tif"])
+
+    # ASSERT
+    assert (tmp_path / "granule.B01.tif.sha256").read_text() == "cached"
+    assert (tmp_path / "granule.B02.tif.sha256").read_text() == hashlib.sha256(b"band 2").hexdigest()
+    assert not list(tmp_path.glob(f".*{checksum_util.SIDECAR_SUFFIX}.sha256"))
+
+
+def test_get_file_checksums_ignores_stale_sidecar(tmp_path):
+    # ARRANGE
+    filepath = tmp_path / "granule.zip"
+    filepath.write_bytes(b"original")
+    checksum_util.cache_checksums(filepath, {"md5": "stale"}, sidecar=True)
+    checksum_util.clear_cached_checksums()
+    filepath.write_bytes(b"modified contents")
+
+    # ACT
+    checksums = checksum_util.get_file_checksums(filepath, ["md5", "sha256"])
+
+    # ASSERT
+    assert checksums == {
+        "md5": hashlib.md5(b"modified contents").hexdigest(),
+        "sha256": hashlib.sha256(b"modified contents").hexdigest()
+    }
+
+
+def test_checksum_stream_checksums_bytes_read_and_written(tmp_path):
+    # ARRANGE
+    source = tmp_path / "source"
+    source.write_bytes(os.urandom(100_000))
+    read_checksums = checksum_util.Checksums(["md5", "sha256"])
+    written_checksums = checksum_util.Checksums(["md5", "sha256"])
+
+    # ACT
+    with checksum_util.ChecksumStream(open(source, "rb"), read_checksums) as reader, \
+            checksum_util.ChecksumStream(open(tmp_path / "target", "wb"), written_checksums) as writer:
+        while chunk := reader.read(30_000):
+            writer.write(chunk)
+
+    # ASSERT
+    expected_checksums = {"md5": hashlib.md5(source.read_bytes()).hexdigest(),
+                          "sha256": hashlib.sha256(source.read_bytes()).hexdigest()}
+    assert read_checksums.hexdigests() == expected_checksums
+    assert written_checksums.hexdigests() == expected_checksums
+    assert written_checksums.size_in_bytes == 100_000
@@ -0,0 +1,51 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from elasticsearch.serializer import JSONSerializer
+
+from util import grq_client
+
+
+def test_get_slc_datasets_without_ionosphere_data_filters_source(monkeypatch):
+    # ARRANGE
+    monkeypatch.setattr(grq_client.es_conn_util, "get_es_connection", MagicMock())
+    mock_scan = MagicMock(return_value=iter([{"_id": "S1A_0"}]))
+    monkeypatch.setattr(grq_client.helpers, "scan", mock_scan)
+
+    # ACT
+    slc_datasets = grq_client.get_slc_datasets_without_ionosphere_data(datetime(2023, 1, 1), datetime(2023, 1, 2))
+
+    # ASSERT
+    assert slc_datasets == [{"_id": "S1A_0"}]
+    body = mock_scan.call_args.args[1]
+    assert body["_source"]["includes"] == grq_client.SLC_DATASET_SOURCE_INCLUDES
+
+
+def test_update_slc_datasets_with_ionosphere_metadata_returns_failed_updates(monkeypatch):
+    # ARRANGE
+    mock_es = MagicMock()
+    mock_es.transport.serializer = JSONSerializer()
+    mock_es.bulk.return_value = {
+        "errors": True,
+        "items": [
+            {"update": {"_index": "grq_1", "_id": "S1A_0", "status": 200}},
+            {"update": {"_index": "grq_1", "_id": "S1A_1", "status": 404, "error": {"type": "document_missing_exception"}}}
+        ]
+    }
+    monkeypatch.setattr(grq_client.es_conn_util, "get_es_connection", MagicMock(return_value=MagicMock(es=mock_es)))
+
+    # ACT
+    failed_updates = grq_client.update_slc_datasets_with_ionosphere_metadata([
+        ("grq_1", "S1A_0", {"ionosphere": {"FileName": "jplg0010.23i"}}),
+        ("grq_1", "S1A_1", {"ionosphere": {"FileName": "jplg0010.23i"}})
+    ])
+
+    # ASSERT
+    mock_es.bulk.assert_called_once()
+    call_args = mock_es.bulk.call_args
+    bulk_body = call_args.kwargs["body"] if "body" in call_args.kwargs else call_args.args[0]  # positional in older 7.x clients
+    bulk_lines = bulk_body.splitlines()
+    assert len(bulk_lines) == 4  # an action and a doc line per update
+    assert '"retry_on_conflict":3' in bulk_lines[0]
+    assert list(failed_updates) == ["S1A_1"]
+    assert failed_updates["S1A_1"]["status"] == 404
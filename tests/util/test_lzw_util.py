@@ -0,0 +1,88 @@
+import random
+import shutil
+import subprocess
+
+import pytest
+
+from util import lzw_util
+
+RANDOM_DATA = random.Random(0).randbytes(100_000)
+TEC_LIKE_DATA = "\n".join(
+    " ".join(f"{(row * 31 + col * 7) % 400:5d}" for col in range(16)) for row in range(5_000)
+).encode()
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"a",
+    b"TOBEORNOTTOBEORTOBEORNOT#",
+    b"a" * 100_000,  # codes defined by the code being read
+    RANDOM_DATA,  # fills the code table
+    TEC_LIKE_DATA
+], ids=["empty", "byte", "text", "run", "random", "tec"])
+@pytest.mark.parametrize("max_bits", [9, 12, 16])
+def test_decompress_round_trips(data, max_bits):
+    # ARRANGE
+    compressed = lzw_util.compress(data, max_bits=max_bits)
+
+    # ACT
+    decompressed = lzw_util.decompress(compressed)
+
+    # ASSERT
+    assert decompressed == data
+
+
+@pytest.mark.skipif(not shutil.which("gzip"), reason="requires gzip, which decompresses the compress format")
+@pytest.mark.parametrize("data", [RANDOM_DATA, TEC_LIKE_DATA], ids=["random", "tec"])
+@pytest.mark.parametrize("max_bits", [9, 12, 16])
+def test_compress_fixtures_are_readable_by_gzip(data, max_bits):
+    # ACT
+    result = subprocess.run(["gzip", "-dc"], input=lzw_util.compress(data, max_bits=max_bits), capture_output=True)
+
+    # ASSERT
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == data
+
+
+def test_decompressor_accepts_chunks_of_any_size():
+    # ARRANGE
+    compressed = lzw_util.compress(RANDOM_DATA[:50_000] + TEC_LIKE_DATA, max_bits=12)
+    chunk_sizes = random.Random(0)
+    decompressor = lzw_util.LZWDecompressor()
+    decompressed = bytearray()
+
+    # ACT
+    pos = 0
+    while pos < len(compressed):
+        chunk_size = chunk_sizes.randint(1, 40)
+        decompressed += decompressor.decompress(compressed[pos:pos + chunk_size])
+        pos += chunk_size
+    decompressed += decompressor.flush()
+
+    # ASSERT
+    assert decompressed == RANDOM_DATA[:50_000] + TEC_LIKE_DATA
+
+
+def test_decompress_file(tmp_path):
+    # ARRANGE
+    (tmp_path / "jplg0010.23i.Z").write_bytes(lzw_util.compress(TEC_LIKE_DATA))
+
+    # ACT
+    size = lzw_util.decompress_file(tmp_path / "jplg0010.23i.Z", tmp_path / "jplg0010.23i", chunk_size=1024)
+
+    # ASSERT
+    assert size == len(TEC_LIKE_DATA)
+    assert (tmp_path / "jplg0010.23i").read_bytes() == TEC_LIKE_DATA
+
+
+@pytest.mark.parametrize("compressed", [
+    b"",
+    b"\x1f\x8b\x08",  # gzip
+    b"\x1f\x9d\x91",  # 17 bit codes
+    lzw_util.MAGIC + bytes([16 | lzw_util.BLOCK_MODE]) + (300).to_bytes(2, "little"),  # first code not a byte
+    lzw_util.compress(b"abcabc")[:-1] + b"\xff"  # code not yet defined
+], ids=["empty", "gzip", "max_bits", "first_code", "undefined_code"])
+def test_decompress_rejects_invalid_streams(compressed):
+    # ACT/ASSERT
+    with pytest.raises(ValueError):
+        lzw_util.decompress(compressed)
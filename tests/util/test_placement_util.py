@@ -0,0 +1,63 @@
+import errno
+import hashlib
+import os
+
+import pytest
+
+from util import checksum_util, placement_util
+
+
+def raise_cross_device_error(*args):
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+
+@pytest.fixture(autouse=True)
+def reset_stats(monkeypatch):
+    monkeypatch.setattr(placement_util, "stats", placement_util.PlacementStats())
+    checksum_util.clear_cached_checksums()
+
+
+def test_place_file_hardlinks_on_same_filesystem(tmp_path):
+    # ARRANGE
+    source = tmp_path / "granule.B01.tif"
+    source.write_bytes(b"band")
+    target = tmp_path / "dataset" / "granule.B01.tif"
+    target.parent.mkdir()
+    target.write_bytes(b"stale")
+
+    # ACT
+    method = placement_util.place_file(source, target)
+
+    # ASSERT
+    assert method == placement_util.LINK
+    assert os.path.samefile(source, target)
+    assert placement_util.stats.linked_bytes == 4
+    assert placement_util.stats.copied_bytes == 0
+
+
+@pytest.mark.parametrize("allow_rename,checksum_algos,expected_method,expected_checksums", [
+    (True, ["md5"], placement_util.RENAME, {}),
+    (False, [], placement_util.COPY, {}),
+    (False, ["md5"], placement_util.COPY, {"md5": hashlib.md5(b"band").hexdigest()}),
+    (False, ["md5", "sha256"], placement_util.COPY,
+     {"md5": hashlib.md5(b"band").hexdigest(), "sha256": hashlib.sha256(b"band").hexdigest()})
+])
+def test_place_file_falls_back_when_links_are_not_possible(monkeypatch, tmp_path, allow_rename, checksum_algos,
+                                                           expected_method, expected_checksums):
+    # ARRANGE
+    monkeypatch.setattr(placement_util.os, "link", raise_cross_device_error)
+    monkeypatch.setattr(placement_util, "_reflink", raise_cross_device_error)
+    source = tmp_path / "granule.B01.tif"
+    source.write_bytes(b"band")
+    (tmp_path / "dataset").mkdir()
+
+    # ACT
+    method = placement_util.place_file_in_dir(source, tmp_path / "dataset", allow_rename=allow_rename,
+                                              checksum_algos=checksum_algos)
+
+    # ASSERT
+    assert method == expected_method
+    assert (tmp_path / "dataset" / "granule.B01.tif").read_bytes() == b"band"
+    assert source.exists() == (not allow_rename)
+    assert placement_util.stats.file_counts[expected_method] == 1
+    assert checksum_util.get_cached_checksums(tmp_path / "dataset" / "granule.B01.tif") == expected_checksums
@@ -0,0 +1,27 @@
+from util import s3_util
+
+
+def test_get_s3_client_is_shared_per_credentials():
+    # ARRANGE
+    s3_util.clear_s3_clients()
+    creds = {"aws_access_key_id": "a", "aws_secret_access_key": "b", "aws_session_token": "c", "region_name": "us-west-2"}
+
+    # ACT
+    s3 = s3_util.get_s3_client(**creds)
+    same_s3 = s3_util.get_s3_client(**creds)
+    other_s3 = s3_util.get_s3_client(**{**creds, "aws_session_token": "d"})
+
+    # ASSERT
+    assert s3 is same_s3
+    assert s3 is not other_s3
+    assert s3.meta.config.max_pool_connections == s3_util.DEFAULT_MAX_POOL_CONNECTIONS
+
+
+def test_create_transfer_config():
+    # ACT
+    transfer_config = s3_util.create_transfer_config({"MULTIPART_CHUNKSIZE_BYTES": 8 * 1024 ** 2, "MAX_CONCURRENCY": 4})
+
+    # ASSERT
+    assert transfer_config.multipart_threshold == s3_util.DEFAULT_MULTIPART_THRESHOLD_BYTES
+    assert transfer_config.multipart_chunksize == 8 * 1024 ** 2
+    assert transfer_config.max_concurrency == 4
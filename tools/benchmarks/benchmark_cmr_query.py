@@ -0,0 +1,116 @@
+"""
+======================
+benchmark_cmr_query.py
+======================
+
+Benchmarks the data subscriber's CMR search engine against a local fake CMR server, comparing a sequential
+single-cursor walk (the previous behavior) with concurrent, windowed paging.
+
+The fake server runs in a separate process so that server-side serialization does not compete with the client for
+the event loop.
+
+Example:
+    python -m tools.benchmarks.benchmark_cmr_query --granules 50000 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import logging
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+import aiohttp
+
+from data_subscriber import cmr_client
+from tools.benchmarks.fake_cmr_server import SEARCH_PATH, FAKE_CMR_END
+
+logger = logging.getLogger(__name__)
+
+
+async def run_benchmark(request_url: str, days: int, concurrency_levels: list[int], max_pages_per_window: int):
+    start = FAKE_CMR_END - timedelta(days=days)
+    params = {"page_size": 2000, "revision_date": cmr_client._format_range(start, FAKE_CMR_END)}
+
+    await _wait_for_server(request_url)
+
+    # sequential baseline. 1 connection, never split the window
+    await _measure("sequential", request_url, params, max_concurrency=1, max_pages_per_window=10**9)
+
+    for max_concurrency in concurrency_levels:
+        await _measure(f"concurrent ({max_concurrency=})", request_url, params,
+                       max_concurrency=max_concurrency, max_pages_per_window=max_pages_per_window)
+
+
+async def _measure(label, request_url, params, max_concurrency, max_pages_per_window):
+    requests = 0
+
+    async def on_request_start(*_):
+        nonlocal requests
+        requests += 1
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+
+    t0 = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, trace_configs=[trace_config]) as session:
+        granules = await cmr_client.async_search(
+            request_url, params, range_param="revision_date",
+            max_concurrency=max_concurrency, max_pages_per_window=max_pages_per_window, session=session
+        )
+    elapsed = time.perf_counter() - t0
+
+    print(f"{label:<32} granules={len(granules):>7,} requests={requests:>4} "
+          f"elapsed={elapsed:7.2f}s pages/sec={requests / elapsed:7.1f} granules/sec={len(granules) / elapsed:10,.0f}")
+
+
+async def _wait_for_server(request_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(request_url, params={"page_size": "0"}) as response:
+                    response.raise_for_status()
+                    return
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.5)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--granules", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=1, help="Number of days the generated granules span.")
+    parser.add_argument("--latency", type=float, default=0.1, help="Simulated latency in seconds per request.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[2, 3, 5])
+    parser.add_argument("--max-pages-per-window", type=int, default=cmr_client.DEFAULT_MAX_PAGES_PER_WINDOW)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "tools.benchmarks.fake_cmr_server",
+         f"--port={port}", f"--granules={args.granules}", f"--days={args.days}", f"--latency={args.latency}"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        request_url = f"http://127.0.0.1:{port}{SEARCH_PATH}"
+        asyncio.run(run_benchmark(request_url, args.days, args.concurrency, args.max_pages_per_window))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
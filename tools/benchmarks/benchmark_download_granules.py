@@ -0,0 +1,144 @@
+"""
+=============================
+benchmark_download_granules.py
+=============================
+
+Benchmarks `data_subscriber.download.download_granules` against local stand-ins for the DAAC: a moto S3 server and
+a local HTTP server, both adding a fixed latency to each request to mimic time-to-first-byte of the DAAC.
+
+Granule extraction is replaced by a sleep of a configurable duration, so that the overlap of extraction and
+transfers is measured independently of the metadata extractors. Each run is measured with at most 1 transfer in
+flight (i.e. sequential band downloads) and with the configured transfer caps.
+
+Requires the `moto[server]` package.
+
+Example:
+    python -m tools.benchmarks.benchmark_download_granules --granules 10 --bands 13 --latency 0.2
+"""
+
+import argparse
+import functools
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import boto3
+import requests
+from moto.server import ThreadedMotoServer
+
+from data_subscriber import download, transfer_scheduler
+
+BUCKET = "benchmark-hls"
+
+
+def start_http_server(files: dict[str, bytes], latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = files.get(self.path.lstrip("/"))
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_s3_server(files: dict[str, bytes], latency: float) -> ThreadedMotoServer:
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    endpoint_url = f"http://127.0.0.1:{server._server.server_port}"
+    os.environ["AWS_ENDPOINT_URL_S3"] = endpoint_url
+
+    s3 = boto3.client("s3", region_name="us-west-2", aws_access_key_id="x", aws_secret_access_key="x")
+    s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": "us-west-2"})
+    for key, body in files.items():
+        s3.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+    # delay each request made by boto3 to mimic the DAAC's time-to-first-byte
+    boto3.DEFAULT_SESSION = None
+    _create_client = boto3.Session.client
+
+    def client(self, *args, **kwargs):
+        c = _create_client(self, *args, **kwargs)
+        c.meta.events.register("before-send.s3.*", lambda **_: time.sleep(latency))
+        return c
+
+    boto3.Session.client = client
+    return server
+
+
+def run(granule_id_to_urls: dict[str, list[str]], transfer_protocol: str, max_transfers: int, extract_seconds: float):
+    download.SettingsConf = lambda: SimpleNamespace(cfg={
+        "DOWNLOAD_TRANSFERS": {"MAX_S3_TRANSFERS": max_transfers, "MAX_HTTPS_TRANSFERS": max_transfers}
+    })
+    download.extract_many_to_one = lambda *args, **kwargs: time.sleep(extract_seconds)
+    download._get_aws_creds = functools.lru_cache(
+        lambda *args: {"accessKeyId": "x", "secretAccessKey": "x", "sessionToken": "x"})
+    es_conn = SimpleNamespace(mark_product_as_downloaded=lambda *args: None)
+    args = SimpleNamespace(dry_run=False, smoke_run=False, transfer_protocol=transfer_protocol, provider="LPCLOUD")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            t0 = time.perf_counter()
+            downloaded_bytes = download.download_granules(
+                requests.Session(), es_conn, granule_id_to_urls, args, token=None, job_id=None)
+            elapsed = time.perf_counter() - t0
+        finally:
+            os.chdir(cwd)
+    return elapsed, downloaded_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--granules", type=int, default=10)
+    parser.add_argument("--bands", type=int, default=13)
+    parser.add_argument("--band-size", type=int, default=2 * 1024 ** 2, help="Size of each band file in bytes.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latency (in seconds) added to each request.")
+    parser.add_argument("--extract-seconds", type=float, default=1.0, help="Duration of each granule extraction.")
+    parser.add_argument("--max-transfers", type=int, default=transfer_scheduler.DEFAULT_MAX_S3_TRANSFERS)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    body = os.urandom(args.band_size)
+    granule_ids = [f"HLS.S30.T{i:05d}.2023001T000000.v2.0" for i in range(args.granules)]
+    files = {f"{granule_id}.B{band:02d}.tif": body for granule_id in granule_ids for band in range(1, args.bands + 1)}
+
+    http_server = start_http_server(files, args.latency)
+    s3_server = start_s3_server(files, args.latency)
+    try:
+        for transfer_protocol, base_url in (("https", f"http://127.0.0.1:{http_server.server_port}"),
+                                            ("s3", f"s3://{BUCKET}")):
+            granule_id_to_urls = {
+                granule_id: [f"{base_url}/{granule_id}.B{band:02d}.tif" for band in range(1, args.bands + 1)]
+                for granule_id in granule_ids
+            }
+            for max_transfers in (1, args.max_transfers):
+                elapsed, downloaded_bytes = run(granule_id_to_urls, transfer_protocol, max_transfers,
+                                                args.extract_seconds)
+                print(f"{transfer_protocol:<6} max_transfers={max_transfers:>3} elapsed={elapsed:7.2f}s "
+                      f"MB/s={downloaded_bytes / 1024 ** 2 / elapsed:8.1f}")
+    finally:
+        http_server.shutdown()
+        s3_server.stop()
+        shutil.rmtree("downloads", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+===============================
+benchmark_lzw_decompression.py
+===============================
+
+Benchmarks the decompression of ionosphere correction archives (Unix `compress`, .Z), comparing a `gunzip -c`
+subprocess whose output is captured in memory and then written out (the previous behavior) with the in-process,
+streaming decompression of `util.lzw_util`.
+
+Each method runs in a fresh process so that the reported peak RSS growth is not skewed by the other method.
+
+Archives are either real ones (e.g. downloaded with `tools/stage_ionosphere_file.py`, then recompressed with
+`compress`), or synthesized from TEC-like text and compressed with `lzw_util.compress`.
+
+Example:
+    python -m tools.benchmarks.benchmark_lzw_decompression --mb 8
+    python -m tools.benchmarks.benchmark_lzw_decompression --archive ~/jplg0010.23i.Z
+"""
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from util import lzw_util
+
+
+def synthesize_archive(archive: Path, mb: float):
+    """Writes an archive of text laid out like the TEC maps of an IONEX file, i.e. rows of 16 5-digit values."""
+    rng = random.Random(0)
+    lines = []
+    size = 0
+    while size < mb * 1024 ** 2:
+        line = "".join(f"{rng.randint(0, 400):5d}" for _ in range(16))
+        lines.append(line)
+        size += len(line) + 1
+    archive.write_bytes(lzw_util.compress("\n".join(lines).encode()))
+
+
+def decompress_gunzip(archive: Path, target: Path):
+    result = subprocess.run(["gunzip", "-c", str(archive)], check=True, capture_output=True)
+    with open(target, "wb") as outfile:
+        outfile.write(result.stdout)
+
+
+def decompress_lzw_util(archive: Path, target: Path):
+    lzw_util.decompress_file(archive, target)
+
+
+METHODS = {"gunzip": decompress_gunzip, "lzw_util": decompress_lzw_util}
+
+
+def run_method(args):
+    """Decompresses the archive with a single method, printing the measurements as JSON."""
+    archive = Path(args.archive).expanduser()
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        target = Path(tmp_dir) / archive.stem
+        t0 = time.perf_counter()
+        METHODS[args.method](archive, target)
+        elapsed = time.perf_counter() - t0
+        mb = target.stat().st_size / 1024 ** 2
+
+    rss_after_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "mb": mb,
+        "elapsed": elapsed,
+        "rss_growth_mb": (rss_after_kb - rss_before_kb) / 1024,
+        "child_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=8, help="Decompressed size of the synthesized archive.")
+    parser.add_argument("--archive", help="A .Z archive to decompress. Overrides --mb.")
+    parser.add_argument("--method", choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("--synthesize-to", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.method:
+        run_method(args)
+        return
+
+    if args.synthesize_to:
+        synthesize_archive(Path(args.synthesize_to), args.mb)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive = args.archive
+        if not archive:
+            # synthesize the archive in a separate process, as the peak RSS of a process is inherited by the
+            # processes it spawns
+            archive = str(Path(tmp_dir) / "jplg0010.23i.Z")
+            _run_module("--mb", str(args.mb), "--synthesize-to", archive)
+
+        for method in METHODS:
+            result = json.loads(_run_module("--archive", archive, "--method", method))
+            print(f"{method:<10} output={result['mb']:6.1f}MB elapsed={result['elapsed']:6.2f}s "
+                  f"MB/sec={result['mb'] / result['elapsed']:8.1f} rss_growth={result['rss_growth_mb']:7.1f}MB "
+                  f"child_rss={result['child_rss_mb']:7.1f}MB")
+
+
+def _run_module(*args: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-m", "tools.benchmarks.benchmark_lzw_decompression", *args],
+        check=True, capture_output=True, text=True
+    ).stdout
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+===========================
+benchmark_north_america.py
+===========================
+
+Benchmarks the North America (OPERA) intersection checks in `geo.geo_util`, comparing the per-bbox OGR path
+(`does_bbox_intersect_north_america`) with the vectorized batch path (`intersects_north_america_many`).
+
+Bounding boxes are random, Sentinel-1 SLC sized (~2.5 x 2 degree) rectangles spread over the globe.
+
+Example:
+    python -m tools.benchmarks.benchmark_north_america --bboxes 200000
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from geo.geo_util import (
+    Coordinate,
+    does_bbox_intersect_north_america,
+    intersects_north_america_many,
+    _load_north_america_opera_geometry_collection,
+    _load_north_america_opera_shapely
+)
+
+
+def generate_bboxes(count: int, seed=0) -> list[list[Coordinate]]:
+    rng = np.random.default_rng(seed)
+    lons = rng.uniform(-180, 177.5, count)
+    lats = rng.uniform(-60, 83, count)
+    return [
+        [
+            {"lon": lon, "lat": lat},
+            {"lon": lon + 2.5, "lat": lat},
+            {"lon": lon + 2.5, "lat": lat + 2.0},
+            {"lon": lon, "lat": lat + 2.0},
+            {"lon": lon, "lat": lat}
+        ]
+        for lon, lat in zip(lons.tolist(), lats.tolist())
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bboxes", type=int, default=200_000, help="Number of bboxes checked by the batch path.")
+    parser.add_argument("--ogr-bboxes", type=int, default=5_000, help="Number of bboxes checked by the OGR path.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    # exclude one-time geometry loading from the measurements
+    _load_north_america_opera_geometry_collection()
+    _load_north_america_opera_shapely()
+
+    bboxes = generate_bboxes(args.bboxes)
+
+    ogr_bboxes = bboxes[:args.ogr_bboxes]
+    t0 = time.perf_counter()
+    ogr_results = [does_bbox_intersect_north_america(bbox) for bbox in ogr_bboxes]
+    ogr_elapsed = time.perf_counter() - t0
+    print(f"{'OGR (per bbox)':<24} bboxes={len(ogr_bboxes):>9,} elapsed={ogr_elapsed:7.2f}s "
+          f"bboxes/sec={len(ogr_bboxes) / ogr_elapsed:12,.0f}")
+
+    t0 = time.perf_counter()
+    results = intersects_north_america_many(bboxes)
+    elapsed = time.perf_counter() - t0
+    print(f"{'shapely (batch)':<24} bboxes={len(bboxes):>9,} elapsed={elapsed:7.2f}s "
+          f"bboxes/sec={len(bboxes) / elapsed:12,.0f} hits={results.sum():,}")
+
+    mismatches = int(np.count_nonzero(results[:len(ogr_results)] != np.array(ogr_results, dtype=bool)))
+    print(f"{mismatches=}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+=========================
+benchmark_s3_transfers.py
+=========================
+
+Benchmarks S3 downloads against a local moto S3 server, comparing a new boto3 session and client per object (the
+previous behavior of `download_product_using_s3`) with the shared clients and managed transfer configuration of
+`util.s3_util`.
+
+Small objects stand in for HLS bands (reported in objects/sec), large objects for SLC SAFE zips (reported in GB/s).
+
+Requires the `moto[server]` package.
+
+Example:
+    python -m tools.benchmarks.benchmark_s3_transfers --small-objects 500 --large-objects 2 --large-size 536870912
+"""
+
+import argparse
+import io
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from moto.server import ThreadedMotoServer
+
+from util import s3_util
+
+BUCKET = "benchmark-transfers"
+CREDS = {"aws_access_key_id": "x", "aws_secret_access_key": "x", "aws_session_token": "x", "region_name": "us-west-2"}
+
+
+def new_client_per_object(bucket, key, filepath, transfer_config):
+    s3 = boto3.Session(**CREDS).client("s3")
+    s3.download_file(bucket, key, filepath)
+
+
+def shared_client(bucket, key, filepath, transfer_config):
+    s3_util.get_s3_client(**CREDS).download_file(bucket, key, filepath, Config=transfer_config)
+
+
+def run(download, keys: list[str], max_transfers: int, transfer_config) -> float:
+    with tempfile.TemporaryDirectory() as tmp_dir, ThreadPoolExecutor(max_workers=max_transfers) as executor:
+        t0 = time.perf_counter()
+        futures = [executor.submit(download, BUCKET, key, os.path.join(tmp_dir, key), transfer_config) for key in keys]
+        for future in futures:
+            future.result()
+        return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small-objects", type=int, default=500)
+    parser.add_argument("--small-size", type=int, default=256 * 1024, help="Size of each small object in bytes.")
+    parser.add_argument("--large-objects", type=int, default=2)
+    parser.add_argument("--large-size", type=int, default=512 * 1024 ** 2, help="Size of each large object in bytes.")
+    parser.add_argument("--max-transfers", type=int, default=8, help="Number of objects transferred concurrently.")
+    parser.add_argument("--multipart-chunksize", type=int, default=s3_util.DEFAULT_MULTIPART_CHUNKSIZE_BYTES)
+    parser.add_argument("--max-concurrency", type=int, default=s3_util.DEFAULT_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    os.environ["AWS_ENDPOINT_URL_S3"] = f"http://127.0.0.1:{server._server.server_port}"
+    try:
+        s3 = boto3.Session(**CREDS).client("s3")
+        s3.create_bucket(Bucket=BUCKET, CreateBucketConfiguration={"LocationConstraint": CREDS["region_name"]})
+        small_keys = [f"HLS.S30.T{i:05d}.2023001T000000.v2.0.B01.tif" for i in range(args.small_objects)]
+        large_keys = [f"S1A_IW_SLC__1SDV_{i:05d}.zip" for i in range(args.large_objects)]
+        small_body = os.urandom(args.small_size)
+        for key in small_keys:
+            s3.put_object(Bucket=BUCKET, Key=key, Body=small_body)
+        large_body = os.urandom(args.large_size)
+        for key in large_keys:
+            s3.upload_fileobj(io.BytesIO(large_body), BUCKET, key)
+        del large_body
+
+        transfer_config = s3_util.create_transfer_config({
+            "MULTIPART_CHUNKSIZE_BYTES": args.multipart_chunksize,
+            "MAX_CONCURRENCY": args.max_concurrency
+        })
+        for name, download in (("new_client_per_object", new_client_per_object), ("shared_client", shared_client)):
+            s3_util.clear_s3_clients()
+            elapsed = run(download, small_keys, args.max_transfers, transfer_config)
+            print(f"{name:<22} small objects: {len(small_keys) / elapsed:8.1f} objects/s")
+            elapsed = run(download, large_keys, 1, transfer_config)
+            print(f"{name:<22} large objects: {len(large_keys) * args.large_size / 1024 ** 3 / elapsed:8.2f} GB/s")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
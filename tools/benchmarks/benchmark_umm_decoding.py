@@ -0,0 +1,172 @@
+"""
+=========================
+benchmark_umm_decoding.py
+=========================
+
+Benchmarks the decoding of CMR UMM-JSON granule search pages into granule records, comparing generic JSON decoding
+followed by a walk of the resulting dicts (the previous behavior) with the lean, typed decoding of
+`data_subscriber.cmr_umm`.
+
+Each method runs in a fresh process so that the reported peak RSS growth is not skewed by the other method. The
+decoded records of all pages are retained, as they are during a query.
+
+Pages are either recorded CMR responses (one `*.json` file per page, e.g. saved with
+`curl -o page1.json "https://cmr.earthdata.nasa.gov/search/granules.umm_json?..."`) or synthesized with
+`fake_cmr_server`, padded with UMM fields which are typically present in real responses but unused.
+
+Example:
+    python -m tools.benchmarks.benchmark_umm_decoding --pages 20
+    python -m tools.benchmarks.benchmark_umm_decoding --pages-dir ~/cmr_pages
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+from data_subscriber import cmr_client, cmr_umm
+from tools.benchmarks.fake_cmr_server import FAKE_CMR_END, generate_granules
+
+PAGE_SIZE = 2000
+IDENTIFIER_ATTRIBUTES = {"HLSL30": "LANDSAT_PRODUCT_ID", "HLSS30": "PRODUCT_URI"}
+
+
+def synthesize_pages(args) -> list[bytes]:
+    granules = generate_granules(args.pages * PAGE_SIZE, FAKE_CMR_END - timedelta(days=1), FAKE_CMR_END, args.collection)
+    for granule in granules:
+        _pad(granule)
+    return [
+        json.dumps({"hits": len(granules), "took": 1, "items": granules[i:i + PAGE_SIZE]}).encode()
+        for i in range(0, len(granules), PAGE_SIZE)
+    ]
+
+
+def _pad(granule: dict):
+    umm = granule["umm"]
+    umm["CollectionReference"] = {"ShortName": "SENTINEL-1A_SLC", "Version": "1"}
+    umm["ProviderDates"] = [{"Date": granule["meta"]["revision-date"], "Type": t} for t in ("Insert", "Update")]
+    umm["OrbitCalculatedSpatialDomains"] = [{"OrbitNumber": 46000, "StartOrbitNumber": 46000, "StopOrbitNumber": 46000}]
+    umm["MeasuredParameters"] = [{"ParameterName": p} for p in ("BACKSCATTER", "PHASE")]
+    umm["PGEVersionClass"] = {"PGEName": "Sentinel-1 IPF", "PGEVersion": "003.61"}
+    umm["InputGranules"] = [f"{umm['GranuleUR']}-INPUT-{i}" for i in range(3)]
+    umm["DataGranule"].update({"DayNightFlag": "Unspecified", "Identifiers": [{"Identifier": umm["GranuleUR"], "IdentifierType": "ProducerGranuleId"}]})
+    umm["AdditionalAttributes"] = umm["AdditionalAttributes"] + [
+        {"Name": f"ATTRIBUTE_{i}", "Values": [f"value {i}"]} for i in range(20)
+    ]
+    umm["RelatedUrls"] = umm["RelatedUrls"] + [
+        {"URL": f"https://example.com/browse/{umm['GranuleUR']}.{i}.png", "Type": "GET RELATED VISUALIZATION",
+         "Description": "A browse image of the granule", "MimeType": "image/png"}
+        for i in range(4)
+    ]
+
+
+def decode_json(pages: list[bytes], args) -> list:
+    granules = []
+    for page in pages:
+        items, _ = cmr_client.parse_json(page)
+        granules.extend(_to_granules_from_dicts(args, items))
+    return granules
+
+
+def _to_granules_from_dicts(args, items: list[dict]) -> list[dict]:
+    """The dict-walking decoder which `query._to_granules` replaced."""
+    identifier_attribute = IDENTIFIER_ATTRIBUTES.get(args.collection)
+    return [{"granule_id": item["umm"]["GranuleUR"],
+             "provider": item["meta"]["provider-id"],
+             "production_datetime": item["umm"]["DataGranule"]["ProductionDateTime"],
+             "temporal_extent_beginning_datetime": item["umm"]["TemporalExtent"]["RangeDateTime"]["BeginningDateTime"],
+             "revision_date": item["meta"]["revision-date"],
+             "revision_id": item["meta"].get("revision-id"),
+             "short_name": item["umm"]["Platforms"][0]["ShortName"],
+             "bounding_box": [
+                 {"lat": point["Latitude"], "lon": point["Longitude"]}
+                 for point in item["umm"]["SpatialExtent"]["HorizontalSpatialDomain"]["Geometry"]["GPolygons"][0]["Boundary"]["Points"]
+             ],
+             "related_urls": [url_item["URL"] for url_item in item["umm"]["RelatedUrls"]],
+             "identifier": next(attr["Values"][0] for attr in item["umm"]["AdditionalAttributes"]
+                                if attr["Name"] == identifier_attribute) if identifier_attribute else None}
+            for item in items]
+
+
+def decode_umm(pages: list[bytes], args) -> list:
+    granules = []
+    for page in pages:
+        items, _ = cmr_umm.parse_search_results(page)
+        identifier_attribute = IDENTIFIER_ATTRIBUTES.get(args.collection)
+        granules.extend(cmr_umm.to_cmr_granule(item, identifier_attribute) for item in items)
+    return granules
+
+
+METHODS = {"json": decode_json, "cmr_umm": decode_umm}
+
+
+def run_method(args):
+    """Decodes the pages with a single method, printing the measurements as JSON."""
+    pages = [path.read_bytes() for path in sorted(Path(args.pages_dir).expanduser().glob("*.json"))]
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    t0 = time.perf_counter()
+    granules = METHODS[args.method](pages, SimpleNamespace(collection=args.collection))
+    elapsed = time.perf_counter() - t0
+
+    rss_after_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "granules": len(granules),
+        "mb": sum(map(len, pages)) / 1024 ** 2,
+        "elapsed": elapsed,
+        "rss_growth_mb": (rss_after_kb - rss_before_kb) / 1024
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20, help=f"Number of {PAGE_SIZE:,} granule pages to synthesize.")
+    parser.add_argument("--pages-dir", help="Directory of recorded UMM-JSON search pages. Overrides --pages.")
+    parser.add_argument("--collection", default="SENTINEL-1A_SLC", help="Collection of the synthesized granules.")
+    parser.add_argument("--method", choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("--synthesize-to", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.method:
+        run_method(args)
+        return
+
+    if args.synthesize_to:
+        for i, page in enumerate(synthesize_pages(args)):
+            Path(args.synthesize_to, f"page{i:05d}.json").write_bytes(page)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pages_dir = args.pages_dir
+        if not pages_dir:
+            # synthesize pages in a separate process, as the peak RSS of a process is inherited by the processes it
+            # spawns
+            pages_dir = tmp_dir
+            _run_module("--pages", str(args.pages), "--collection", args.collection, "--synthesize-to", tmp_dir)
+
+        for method in METHODS:
+            result = _run_method_process(method, pages_dir, args.collection)
+            print(f"{method:<10} granules={result['granules']:>9,} input={result['mb']:8.1f}MB "
+                  f"elapsed={result['elapsed']:6.2f}s granules/sec={result['granules'] / result['elapsed']:10,.0f} "
+                  f"rss_growth={result['rss_growth_mb']:7.1f}MB")
+
+
+def _run_method_process(method: str, pages_dir: str, collection: str) -> dict:
+    return json.loads(_run_module("--pages-dir", pages_dir, "--collection", collection, "--method", method))
+
+
+def _run_module(*args: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-m", "tools.benchmarks.benchmark_umm_decoding", *args],
+        check=True, capture_output=True, text=True
+    ).stdout
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+==================
+fake_cmr_server.py
+==================
+
+A local stand-in for the CMR granule search endpoint (`/search/granules.umm_json`), for benchmarking and testing
+CMR clients without network access.
+
+Granules are synthesized deterministically, with revision dates and temporal extents evenly spread over a
+configurable time range. The server honors the `revision_date` and `temporal` range params, `page_size`,
+and `CMR-Search-After` paging, and reports the total number of hits in the `CMR-Hits` header.
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+from datetime import datetime, timedelta, timezone
+
+import dateutil.parser
+from aiohttp import web
+
+SEARCH_PATH = "/search/granules.umm_json"
+
+STATS = web.AppKey("stats", dict)
+"""Application key of the request/item counters"""
+
+FAKE_CMR_END = datetime(2023, 1, 1, tzinfo=timezone.utc)
+"""End of the time range covered by the granules generated when running this module as a script"""
+
+
+def generate_granules(count: int, start: datetime, end: datetime, collection="SENTINEL-1A_SLC") -> list[dict]:
+    """Generates `count` UMM-JSON granule items, evenly distributed between `start` and `end`."""
+    step = (end - start) / count
+    return [_generate_granule(i, start + step * i, collection) for i in range(count)]
+
+
+def _generate_granule(i: int, dt: datetime, collection: str) -> dict:
+    dt_str = dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    if collection.startswith("HLS"):
+        granule_ur = f"HLS.{collection[3:]}.T{i % 100000:05d}.{dt.strftime('%Y%jT%H%M%S')}.v2.0"
+        provider = "LPCLOUD"
+        urls = [f"https://example.com/{granule_ur}.{band}.tif" for band in ("B02", "B03", "B04", "Fmask")]
+        attributes = [
+            {"Name": "PRODUCT_URI", "Values": [f"S2A_MSIL1C_{i}"]},
+            {"Name": "LANDSAT_PRODUCT_ID", "Values": [f"LC08_L1TP_{i}"]}
+        ]
+    else:
+        granule_ur = f"S1A_IW_SLC__1SDV_{dt.strftime('%Y%m%dT%H%M%S')}_{dt.strftime('%Y%m%dT%H%M%S')}_{i % 1000000:06d}_000000_0000-SLC"
+        provider = "ASF"
+        urls = [f"https://example.com/{granule_ur[:-4]}.zip"]
+        attributes = [{"Name": "BEAM_MODE", "Values": ["IW"]}]
+
+    return {
+        "meta": {
+            "concept-id": f"G{i}-{provider}",
+            "native-id": granule_ur,
+            "provider-id": provider,
+            "revision-id": 1,
+            "revision-date": dt_str
+        },
+        "umm": {
+            "GranuleUR": granule_ur,
+            "DataGranule": {
+                "ProductionDateTime": dt_str,
+                "ArchiveAndDistributionInformation": [{"Name": f"{granule_ur}.zip", "SizeInBytes": 4_500_000_000}]
+            },
+            "TemporalExtent": {"RangeDateTime": {"BeginningDateTime": dt_str, "EndingDateTime": dt_str}},
+            "Platforms": [{"ShortName": "SENTINEL-1A" if provider == "ASF" else "Sentinel-2A"}],
+            "SpatialExtent": {
+                "HorizontalSpatialDomain": {
+                    "Geometry": {
+                        "GPolygons": [{
+                            "Boundary": {
+                                "Points": [
+                                    {"Longitude": -109.06, "Latitude": 36.99},
+                                    {"Longitude": -102.04, "Latitude": 36.99},
+                                    {"Longitude": -102.04, "Latitude": 41.00},
+                                    {"Longitude": -109.06, "Latitude": 41.00},
+                                    {"Longitude": -109.06, "Latitude": 36.99}
+                                ]
+                            }
+                        }]
+                    }
+                }
+            },
+            "RelatedUrls": [{"URL": url, "Type": "GET DATA"} for url in urls],
+            "AdditionalAttributes": attributes
+        }
+    }
+
+
+def create_app(granules: list[dict], latency: float = 0.0) -> web.Application:
+    """Creates the fake CMR application.
+
+    :param granules: the granules to serve.
+    :param latency: simulated server-side latency (in seconds) for each request.
+    """
+    granules = sorted(granules, key=lambda granule: granule["meta"]["revision-date"])
+    granule_dts = [dateutil.parser.isoparse(granule["meta"]["revision-date"]) for granule in granules]
+    app = web.Application()
+    app[STATS] = {"requests": 0, "items": 0}
+
+    async def search(request: web.Request) -> web.Response:
+        app[STATS]["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+
+        lo, hi = _range_bounds(granule_dts, request.query)
+        matches = granules[lo:hi]
+        page_size = int(request.query.get("page_size", 10))
+        offset = int(request.headers.get("CMR-Search-After", "0"))
+        page = matches[offset:offset + page_size]
+        app[STATS]["items"] += len(page)
+
+        headers = {"CMR-Hits": str(len(matches))}
+        if page:
+            headers["CMR-Search-After"] = str(offset + len(page))
+        return web.Response(
+            body=json.dumps({"hits": len(matches), "took": 1, "items": page}),
+            content_type="application/vnd.nasa.cmr.umm_results+json",
+            headers=headers
+        )
+
+    app.router.add_get(SEARCH_PATH, search)
+    return app
+
+
+def _range_bounds(granule_dts: list[datetime], query) -> tuple[int, int]:
+    """Returns the slice bounds of the (sorted) granules matching the range params of the given query."""
+    lo, hi = 0, len(granule_dts)
+    for param in ("revision_date", "temporal"):
+        if param not in query:
+            continue
+        start_str, _, end_str = query[param].partition(",")
+        lo = max(lo, bisect.bisect_left(granule_dts, dateutil.parser.isoparse(start_str)))
+        if end_str:
+            hi = min(hi, bisect.bisect_right(granule_dts, dateutil.parser.isoparse(end_str)))
+    return lo, max(lo, hi)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a local fake CMR granule search endpoint.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--granules", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=1, help="Number of days the generated granules span.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated latency in seconds per request.")
+    args = parser.parse_args()
+
+    granules = generate_granules(args.granules, FAKE_CMR_END - timedelta(days=args.days), FAKE_CMR_END)
+    web.run_app(create_app(granules, args.latency), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+========================
+ionosphere_file_cache.py
+========================
+
+Local, size-bounded cache of uncompressed Ionosphere Correction (TEC) files.
+
+There is a single TEC archive per day (and type), shared by every SLC archive starting on that day. The cache is keyed
+by archive name, so that each day is downloaded and uncompressed once per host, however many SLC datasets need it.
+"""
+import logging
+import netrc
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from tools import stage_ionosphere_file
+from tools.stage_ionosphere_file import IonosphereFileNotFoundException
+from util import placement_util
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "opera_ionosphere_file_cache"
+DEFAULT_MAX_SIZE_MB = 512
+
+
+class IonosphereFile(NamedTuple):
+    filepath: Path
+    """Path of the uncompressed file in the cache"""
+    url: str
+    """URL of the archive the file was uncompressed from"""
+
+
+class IonosphereFileCache:
+    """
+    Downloads and uncompresses TEC archives into `cache_dir`, once per archive, and serves later requests for the same
+    archive from disk. Files are evicted least recently used first once the cache exceeds `max_size_bytes`.
+
+    Archives missing from the download endpoint are remembered for the lifetime of the cache, so that each day is only
+    looked up once. Thread-safe; concurrent requests for the same archive wait for a single download.
+    """
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_size_bytes: int = DEFAULT_MAX_SIZE_MB * 1024 ** 2,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 download_endpoint: str = stage_ionosphere_file.DEFAULT_DOWNLOAD_ENDPOINT):
+        """
+        :param cache_dir: the directory holding the cached files. Created on demand.
+        :param max_size_bytes: the max total size of the cached files.
+        :param username: the EarthData Login user name. Obtained from the local .netrc file if not provided.
+        :param password: the EarthData Login password. Obtained from the local .netrc file if not provided.
+        :param download_endpoint: the download service URL endpoint of the TEC archives.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = max_size_bytes
+        self.download_endpoint = download_endpoint
+        self._credentials = (username, password) if username and password else None
+
+        self._not_found: set[str] = set()
+        """Names of the archives missing from the download endpoint"""
+        self._archive_locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    def get(self, input_safe_file) -> IonosphereFile:
+        """
+        Returns the TEC file for the start date of the given SLC archive (only its file name is used), trying each of
+        `VALID_IONOSPHERE_TYPES` in turn.
+
+        :raises IonosphereFileNotFoundException: if no TEC archive of any type is available for the date.
+        """
+        for ionosphere_type in stage_ionosphere_file.VALID_IONOSPHERE_TYPES:
+            try:
+                return self.get_archive(
+                    stage_ionosphere_file.get_archive_request_url(input_safe_file, ionosphere_type, self.download_endpoint)
+                )
+            except IonosphereFileNotFoundException:
+                logger.info(f"No {ionosphere_type} Ionosphere file available for {input_safe_file}")
+        raise IonosphereFileNotFoundException(f"Could not find an Ionosphere file for {input_safe_file}")
+
+    def get_archive(self, request_url: str) -> IonosphereFile:
+        """Returns the uncompressed TEC file of the archive at the given URL, downloading it on a cache miss."""
+        archive_name = os.path.basename(request_url)
+        filepath = self.cache_dir / os.path.splitext(archive_name)[0]
+
+        with self._archive_lock(archive_name):
+            if archive_name in self._not_found:
+                raise IonosphereFileNotFoundException(f"Could not find an Ionosphere file at {request_url}")
+
+            try:
+                os.utime(filepath)  # mark as recently used
+                logger.info(f"Ionosphere file cache hit. {archive_name=}")
+                return IonosphereFile(filepath, request_url)
+            except FileNotFoundError:
+                pass
+
+            logger.info(f"Ionosphere file cache miss. {archive_name=}")
+            try:
+                self._download(request_url, filepath)
+            except IonosphereFileNotFoundException:
+                self._not_found.add(archive_name)
+                raise
+
+        self._evict(keep=filepath)
+        return IonosphereFile(filepath, request_url)
+
+    def place(self, input_safe_file, output_dir: Path) -> IonosphereFile:
+        """
+        Places the TEC file for the given SLC archive in `output_dir` (see `get`). The file is hardlinked where
+        possible, so it must not be modified in place, but may be moved or deleted.
+        """
+        ionosphere_file = self.get(input_safe_file)
+        try:
+            placement_util.place_file_in_dir(ionosphere_file.filepath, output_dir)
+        except FileNotFoundError:  # evicted in the meantime by a concurrent download
+            ionosphere_file = self.get(input_safe_file)
+            placement_util.place_file_in_dir(ionosphere_file.filepath, output_dir)
+        return IonosphereFile(Path(output_dir) / ionosphere_file.filepath.name, ionosphere_file.url)
+
+    def _archive_lock(self, archive_name: str) -> threading.Lock:
+        with self._lock:
+            return self._archive_locks[archive_name]
+
+    def _download(self, request_url: str, filepath: Path):
+        username, password = self._get_credentials()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # stage in a private directory, so that a partial file is never visible under its cached name
+        with tempfile.TemporaryDirectory(dir=self.cache_dir, prefix=".download-") as staging_dir:
+            archive_path = stage_ionosphere_file.download_ionosphere_archive(request_url, username, password, staging_dir)
+            extraction_path = stage_ionosphere_file.uncompress_ionosphere_archive(archive_path)
+            os.replace(extraction_path, filepath)
+
+    def _get_credentials(self) -> tuple[str, str]:
+        """
+        Returns the Earthdata Login credentials to download archives with, from the local .netrc file.
+
+        :raises RuntimeError: if the .netrc file is missing, unreadable, or has no entry for Earthdata Login.
+        """
+        with self._lock:
+            if self._credentials is None:
+                edl_endpoint = stage_ionosphere_file.DEFAULT_EDL_ENDPOINT
+                try:
+                    authenticators = netrc.netrc().authenticators(edl_endpoint)
+                except (OSError, netrc.NetrcParseError) as e:
+                    raise RuntimeError(f"Could not read Earthdata Login credentials from .netrc. {e}") from e
+                if authenticators is None:
+                    raise RuntimeError(f"No .netrc entry for {edl_endpoint}, which is needed to download "
+                                       f"Ionosphere files")
+                username, _, password = authenticators
+                self._credentials = (username, password)
+            return self._credentials
+
+    def _evict(self, keep: Path):
+        """Removes the least recently used files until the cache fits `max_size_bytes`. Never removes `keep`."""
+        with self._lock:
+            cached_files = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    cached_files.append((stat.st_mtime_ns, stat.st_size, Path(entry.path)))
+
+            size = sum(file_size for _, file_size, _ in cached_files)
+            for _, file_size, filepath in sorted(cached_files):
+                if size <= self.max_size_bytes:
+                    break
+                if filepath == keep:
+                    continue
+                logger.info(f"Evicting Ionosphere file from cache. {filepath=}")
+                filepath.unlink(missing_ok=True)  # hardlinks placed elsewhere are unaffected
+                size -= file_size
+
+
+_cache: Optional[IonosphereFileCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ionosphere_file_cache(settings: Optional[dict] = None) -> IonosphereFileCache:
+    """
+    Returns the cache shared by the whole process, configured by the IONOSPHERE_FILE_CACHE settings.
+
+    :param settings: the settings.yaml config as a dict. Only used to create the cache on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cache_settings = (settings or {}).get("IONOSPHERE_FILE_CACHE", {})
+            _cache = IonosphereFileCache(
+                cache_dir=Path(cache_settings.get("DIR") or DEFAULT_CACHE_DIR),
+                max_size_bytes=cache_settings.get("MAX_SIZE_MB", DEFAULT_MAX_SIZE_MB) * 1024 ** 2
+            )
+        return _cache
@@ -153,24 +153,14 @@ def to_dsxw_metadata_small(missing_cmr_granules, cmr_granules_details, input_hls
         {
             "id": i,
             "expected-dswx-id-prefix": next(iter(input_hls_to_outputs_dswx_map[i])),
-            "revision-date": cmr_granules_details[i]["meta"]["revision-date"],
+            "revision-date": cmr_granules_details[i].revision_date,
             # TODO chrisjrd: commented out for ad-hoc request. 5/10/2023
             # "provider-date": next(iter(
             #     cmr_granules_details[i]["umm"]["ProviderDates"]
             # ))["Date"],
-            # "temporal-date": cmr_granules_details[i]["umm"]["TemporalExtent"]["RangeDateTime"]["BeginningDateTime"],
-            # "hls-processing-time": next(iter(
-            #     next(iter(
-            #         list(filter(lambda a: a["Name"] == "HLS_PROCESSING_TIME",
-            #                     cmr_granules_details[i]["umm"]["AdditionalAttributes"]))
-            #     ))["Values"]
-            # )),
-            "sensing-time": next(iter(
-                next(iter(
-                    list(filter(lambda a: a["Name"] == "SENSING_TIME",
-                                cmr_granules_details[i]["umm"]["AdditionalAttributes"]))
-                ))["Values"]
-            ))
+            # "temporal-date": cmr_granules_details[i].temporal_extent_beginning_datetime,
+            # "hls-processing-time": cmr_granules_details[i].additional_attributes["HLS_PROCESSING_TIME"][0],
+            "sensing-time": cmr_granules_details[i].additional_attributes["SENSING_TIME"][0]
         }
         for i in missing_cmr_granules
     ]
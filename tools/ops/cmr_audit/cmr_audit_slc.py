@@ -1,6 +1,5 @@
 import argparse
 import asyncio
-import concurrent.futures
 import functools
 import logging
 import os
@@ -17,7 +16,7 @@ import more_itertools
 from dotenv import dotenv_values
 from more_itertools import always_iterable
 
-from geo.geo_util import does_bbox_intersect_north_america
+from geo.geo_util import intersects_north_america_many
 from tools.ops.cmr_audit.cmr_audit_utils import async_get_cmr_granules
 from tools.ops.cmr_audit.cmr_client import async_cmr_post
 
@@ -248,21 +247,12 @@ async def run(argv: list[str]):
     logger.info("Filtering North America granules")
     cmr_granules_slc_na = set()
     cmr_granules_slc_details_na = {}
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        does_bbox_intersect_north_america([])  # DEV: optimization to force initial cache load of geojson file
-        future_to_granule_map = {}
-        for granule_id, granule_details in cmr_granules_slc_details.items():
-            bounding_box = [
-                {"lat": point["Latitude"], "lon": point["Longitude"]}
-                for point in granule_details["umm"]["SpatialExtent"]["HorizontalSpatialDomain"]["Geometry"]["GPolygons"][0]["Boundary"]["Points"]
-            ]
-            future_to_granule_map[executor.submit(does_bbox_intersect_north_america, bbox=bounding_box)] = (granule_id, granule_details)
-        for future in concurrent.futures.as_completed(future_to_granule_map):
-            is_granule_in_na = future.result()
-            if is_granule_in_na:
-                granule_id, granule_details = future_to_granule_map[future]
-                cmr_granules_slc_na.add(granule_id)
-                cmr_granules_slc_details_na[granule_id] = granule_details
+    granule_ids = list(cmr_granules_slc_details)
+    bounding_boxes = [cmr_granules_slc_details[granule_id].bounding_box for granule_id in granule_ids]
+    for granule_id, is_granule_in_na in zip(granule_ids, intersects_north_america_many(bounding_boxes)):
+        if is_granule_in_na:
+            cmr_granules_slc_na.add(granule_id)
+            cmr_granules_slc_details_na[granule_id] = cmr_granules_slc_details[granule_id]
 
     logger.info(f"Expected CSLC input (granules): {len(cmr_granules_slc_na)=:,}")
     logger.info(f"Expected RTC input (granules): {len(cmr_granules_slc)=:,}")
@@ -5,8 +5,13 @@ from math import ceil
 import aiohttp
 import backoff
 
+from data_subscriber import cmr_umm
+
 logger = logging.getLogger(__name__)
 
+ADDITIONAL_ATTRIBUTES = ("SENSING_TIME", "HLS_PROCESSING_TIME")
+"""Additional attributes retained in the granule details"""
+
 
 async def async_cmr_post(url, data: str, session: aiohttp.ClientSession):
     page_size = 2000  # default is 10, max is 2000
@@ -29,20 +34,21 @@ async def async_cmr_post(url, data: str, session: aiohttp.ClientSession):
     }
     while current_page <= max_pages:
         async with await fetch_post_url(session, url, data, headers) as response:
-            response_json = await response.json()
+            search_results = cmr_umm.decode_search_results(await response.read())
 
         if current_page == 1:
-            logger.info(f'CMR number of granules (cmr-query): {response_json["hits"]=:,}')
-        logger.debug(f'CMR number of granules (cmr-query-page {current_page} of {ceil(response_json["hits"]/page_size)}): {len(response_json["items"])=:,}')
-        cmr_granules.update({item["meta"]["native-id"] for item in response_json["items"]})
-        cmr_granules_detailed.update({item["meta"]["native-id"]: item for item in response_json["items"]})  # DEV: uncomment as needed
+            logger.info(f'CMR number of granules (cmr-query): {search_results.hits=:,}')
+        logger.debug(f'CMR number of granules (cmr-query-page {current_page} of {ceil(search_results.hits/page_size)}): {len(search_results.items)=:,}')
+        granules = [cmr_umm.to_cmr_granule(item, additional_attributes=ADDITIONAL_ATTRIBUTES) for item in search_results.items]
+        cmr_granules.update({granule.native_id for granule in granules})
+        cmr_granules_detailed.update({granule.native_id: granule for granule in granules})
 
         cmr_search_after = response.headers.get("CMR-Search-After")
         logger.debug(f"{cmr_search_after=}")
         if cmr_search_after:
             headers.update({"CMR-Search-After": response.headers["CMR-Search-After"]})
 
-        if len(response_json["items"]) < page_size:
+        if len(search_results.items) < page_size:
             logger.debug("Reached end of CMR search results. Ending query.")
             break
 
@@ -0,0 +1,163 @@
+"""
+================
+orbit_catalog.py
+================
+
+Local catalog of Sentinel-1 orbit files, indexed by mission, orbit type and validity time range, so that the orbit
+file covering an SLC SAFE archive is looked up locally, rather than with a query to the orbit file service per
+SAFE archive.
+
+The catalog is synced incrementally, from the results of orbit file queries, or from listings of orbit files (e.g.
+an S3 listing of a mirror). It is an SQLite database, either in memory or in a file shared across jobs.
+"""
+import logging
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Iterable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%S"
+"""Format of the timestamps of orbit file names, which sort chronologically as text"""
+
+ORBIT_FILE_NAME_REGEX = re.compile(
+    r'(?P<mission_id>S1A|S1B)_(?P<file_class>OPER)_(?P<category>AUX)_'
+    r'(?P<orbit_type>POEORB|RESORB)_(?P<site>OPOD)_'
+    r'(?P<creation_ts>\d{8}T\d{6})_V(?P<valid_start_ts>\d{8}T\d{6})_'
+    r'(?P<valid_stop_ts>\d{8}T\d{6})[.](?P<format>EOF)$'
+)
+
+
+class OrbitFile(NamedTuple):
+    name: str
+    mission_id: str
+    orbit_type: str
+    creation_time: str
+    validity_start: str
+    """Start of the validity time range, in TIMESTAMP_FORMAT"""
+    validity_stop: str
+    """Stop of the validity time range, in TIMESTAMP_FORMAT"""
+    url: Optional[str] = None
+    """Where the orbit file may be downloaded from, if known"""
+
+
+def parse_orbit_file_name(orbit_file_name: str, url: Optional[str] = None) -> Optional[OrbitFile]:
+    """Parses the name of an orbit file. Returns None if the name does not conform to the naming conventions."""
+    match = ORBIT_FILE_NAME_REGEX.match(orbit_file_name)
+    if not match:
+        return None
+    return OrbitFile(
+        name=orbit_file_name,
+        mission_id=match.group("mission_id"),
+        orbit_type=match.group("orbit_type"),
+        creation_time=match.group("creation_ts"),
+        validity_start=match.group("valid_start_ts"),
+        validity_stop=match.group("valid_stop_ts"),
+        url=url
+    )
+
+
+class OrbitCatalog:
+    """
+    Orbit files indexed by (mission, orbit type, validity start), answering which orbit file covers a time range with
+    an index range scan.
+    """
+    def __init__(self, db_path=":memory:"):
+        """
+        :param db_path: the SQLite database file, created if missing, or ":memory:" for a catalog private to the
+                        instance.
+        """
+        self.db_path = db_path
+        self._conn = sqlite3.connect(str(db_path), timeout=30)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS orbit_files ("
+                "name TEXT PRIMARY KEY, mission_id TEXT NOT NULL, orbit_type TEXT NOT NULL, creation_time TEXT NOT NULL,"
+                " validity_start TEXT NOT NULL, validity_stop TEXT NOT NULL, url TEXT)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS orbit_files_by_validity "
+                "ON orbit_files (mission_id, orbit_type, validity_start)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM orbit_files").fetchone()[0]
+
+    def add(self, orbit_files: Iterable[OrbitFile]) -> int:
+        """
+        Adds the given orbit files, replacing any with the same name, except that a known URL is kept when the new
+        entry has none.
+
+        :return: the number of orbit files added.
+        """
+        rows = [tuple(orbit_file) for orbit_file in orbit_files]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO orbit_files VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET url = COALESCE(excluded.url, url)",
+                rows
+            )
+        logger.debug(f"Added orbit files to catalog. {len(rows)=}")
+        return len(rows)
+
+    def sync_from_query_results(self, entry_elems, namespace_map, download_endpoint: str) -> int:
+        """
+        Adds the orbit files of the results of an orbit file query (see `stage_orbit_file.parse_orbit_file_query_xml`).
+
+        :param download_endpoint: the download service URL endpoint of the orbit files.
+        :return: the number of orbit files added.
+        """
+        orbit_files = []
+        for entry_elem in entry_elems:
+            request_id = entry_elem.findtext('id', namespaces=namespace_map)
+            orbit_file_name = next((info_elem.text for info_elem in entry_elem.findall('str', namespaces=namespace_map)
+                                    if info_elem.get('name') == 'filename'), None)
+            orbit_file = parse_orbit_file_name(orbit_file_name, url=to_download_url(download_endpoint, request_id)) \
+                if orbit_file_name else None
+            if orbit_file is None:
+                logger.warning(f"Skipping orbit query result with an unexpected file name. {orbit_file_name=}")
+                continue
+            orbit_files.append(orbit_file)
+        return self.add(orbit_files)
+
+    def sync_from_listing(self, urls: Iterable[str]) -> int:
+        """
+        Adds the orbit files of a listing of URLs (e.g. S3 URLs), named per the orbit file naming conventions. Other
+        files are ignored.
+
+        :return: the number of orbit files added.
+        """
+        return self.add(
+            orbit_file for orbit_file in (parse_orbit_file_name(os.path.basename(url), url=url) for url in urls)
+            if orbit_file
+        )
+
+    def find_covering(self, mission_id: str, orbit_type: str, start: datetime, stop: datetime,
+                      margin=timedelta(0)) -> Optional[OrbitFile]:
+        """
+        Returns the orbit file whose validity time range strictly envelops the given time range, widened by `margin`
+        on each side. Among several, the one starting the latest, then the latest created, is returned.
+        """
+        row = self._conn.execute(
+            "SELECT * FROM orbit_files "
+            "WHERE mission_id = ? AND orbit_type = ? AND validity_start < ? AND validity_stop > ? "
+            "ORDER BY validity_start DESC, creation_time DESC LIMIT 1",
+            (mission_id, orbit_type, (start - margin).strftime(TIMESTAMP_FORMAT), (stop + margin).strftime(TIMESTAMP_FORMAT))
+        ).fetchone()
+        return OrbitFile(*row) if row else None
+
+
+def to_download_url(download_endpoint: str, request_id: str) -> str:
+    """Returns the URL from which the download service serves the orbit file with the given request ID."""
+    return os.path.join(download_endpoint, f"Products('{request_id}')/$value")
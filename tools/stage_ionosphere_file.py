@@ -15,7 +15,6 @@ import datetime
 import netrc
 import os
 import re
-import subprocess
 import sys
 
 from os.path import abspath, join
@@ -24,6 +23,7 @@ import requests
 
 from commons.logger import logger
 from commons.logger import LogLevels
+from util import lzw_util
 
 DEFAULT_DOWNLOAD_ENDPOINT = "https://cddis.nasa.gov/archive/gnss/products/ionex"
 """Default URL endpoint for Ionosphere download requests"""
@@ -209,6 +209,43 @@ def safe_start_date_to_julian_day(safe_start_date):
     return str(year), str(doy)
 
 
+def get_archive_request_url(input_safe_file, ionosphere_type, download_endpoint=DEFAULT_DOWNLOAD_ENDPOINT):
+    """
+    Determines the URL of the Ionosphere archive corresponding to the start
+    date of an input SLC archive. All SLC archives starting on the same day
+    share the same Ionosphere archive.
+
+    Parameters
+    ----------
+    input_safe_file : str
+        Path or name of an SLC archive to parse the start date from.
+    ionosphere_type : str
+        The type of Ionosphere file. One of VALID_IONOSPHERE_TYPES.
+    download_endpoint : str
+        The download service URL endpoint of the Ionosphere archives.
+
+    Returns
+    -------
+    request_url : str
+        The URL to the Ionosphere archive, named according to the file type
+        and the Julian date of the SLC archive.
+
+    """
+    # Parse the relevant info from the input SAFE filename
+    safe_start_date = parse_start_date_from_safe(input_safe_file)
+
+    logger.info(f"Parsed start date {safe_start_date} from SAFE filename")
+
+    # Convert start date to Year and Day of Year (Julian date)
+    year, doy = safe_start_date_to_julian_day(safe_start_date)
+
+    # Formulate the archive name and URL location based on the file type and
+    # the Julian date of the SLC archive
+    archive_name = f"{ionosphere_type}{doy}0.{year[2:]}i.Z"
+
+    return join(download_endpoint, year, doy, archive_name)
+
+
 def download_ionosphere_archive(request_url, username, password, output_directory):
     """
     Downloads an Ionosphere Correction archive using the provided credentials
@@ -295,17 +332,11 @@ def uncompress_ionosphere_archive(output_ionosphere_archive_path):
     extraction_dir = os.path.dirname(output_ionosphere_archive_path)
     extraction_path = join(extraction_dir, unzipped_archive_name)
 
-    logger.info(f'Unzipping archive {archive_name} to {extraction_dir}...')
-
-    result = subprocess.run(
-        ['gunzip', '-c', output_ionosphere_archive_path],
-        check=True, capture_output=True
-    )
-
-    logger.info(f'Writing uncompressed Ionosphere data to {extraction_path}...')
+    logger.info(f'Unzipping archive {archive_name} to {extraction_path}...')
 
-    with open(extraction_path, 'wb') as outfile:
-        outfile.write(result.stdout)
+    # Decompress in-process and chunk by chunk, rather than holding the
+    # output of a gunzip process in memory
+    lzw_util.decompress_file(output_ionosphere_archive_path, extraction_path)
 
     return extraction_path
 
@@ -337,18 +368,7 @@ def main(args):
 
     logger.info(f"Determining Ionosphere file for input SAFE file {args.input_safe_file}")
 
-    # Parse the relevant info from the input SAFE filename
-    safe_start_date = parse_start_date_from_safe(args.input_safe_file)
-
-    logger.info(f"Parsed start date {safe_start_date} from SAFE filename")
-
-    # Convert start date to Year and Day of Year (Julian date)
-    year, doy = safe_start_date_to_julian_day(safe_start_date)
-
-    # Formulate the archive name and URL location based on the file type and
-    # the Julian date of the SLC archive
-    archive_name = f"{args.type}{doy}0.{year[2:]}i.Z"
-    request_url = join(args.download_endpoint, year, doy, archive_name)
+    request_url = get_archive_request_url(args.input_safe_file, args.type, args.download_endpoint)
 
     # If user request the URL only, print it to standard out and the log
     if args.url_only:
@@ -22,6 +22,8 @@ import lxml.etree as ET
 
 from commons.logger import logger
 from commons.logger import LogLevels
+from tools.orbit_catalog import OrbitCatalog
+from util import s3_util
 
 DEFAULT_QUERY_ENDPOINT = 'https://scihub.copernicus.eu/gnss/search'
 """Default URL endpoint for SciHub query REST service"""
@@ -37,6 +39,9 @@ DEFAULT_POE_TIME_RANGE = 1  # days
 DEFAULT_RES_TIME_RANGE = 3  # hours
 """Default query time range values for each Orbit file type"""
 
+DEFAULT_ORBIT_CATALOG_PATH = 'orbit_catalog.sqlite3'
+"""Default path of the local Orbit file catalog used by SLC download jobs"""
+
 ORBIT_TYPE_POE = 'POEORB'
 """Orbit type identifier for Precise Orbit Ephemeris"""
 
@@ -101,6 +106,17 @@ def get_parser():
                              "RESORB it is the number of hours. If not specified, "
                              f"defaults to {DEFAULT_POE_TIME_RANGE} day(s) for POEORB, "
                              f"or {DEFAULT_RES_TIME_RANGE} hour(s) for RESORB.")
+    parser.add_argument("--catalog", type=str, action='store', default=None,
+                        metavar='PATH',
+                        help="Specify a local orbit catalog (SQLite database file) "
+                             "to look up the Orbit file in before querying the query "
+                             "service. The catalog is created if missing, and the "
+                             "results of any query are added to it, so that later "
+                             "lookups for nearby SAFE files need no query.")
+    parser.add_argument("--margin", type=int, action='store', default=0,
+                        metavar='SECONDS',
+                        help="Specify a margin, in seconds, by which the selected "
+                             "Orbit file must cover the SLC time range on each side.")
     parser.add_argument("--log-level",
                         type=lambda log_level: LogLevels[log_level].value,
                         choices=LogLevels.list(),
@@ -383,104 +399,6 @@ def parse_orbit_file_query_xml(query_xml):
 
     return entry_elems, tree.nsmap
 
-def select_orbit_file(entry_elems, namespace_map, safe_start_time, safe_stop_time):
-    """
-    Iterates over the results of an orbit file query, searching for the first
-    valid orbit file to download. A valid orbit file is one whose validity
-    time range fully envelops the validity time range of the corresponding
-    SLC SAFE archive.
-
-    Parameters
-    ----------
-    entry_elems : list of etree.Element
-        The parsed XML results of the orbit file query.
-    namespace_map : dict
-        The namespace map parsed from the query result XML. Used to find
-        sub-elements within the provided element tree.
-    safe_start_time : str
-        The start time parsed from the SAFE file name in YYYYmmddTHHMMSS format.
-    safe_stop_time : str
-        The stop time parsed from the SAFE file name in YYYYmmddTHHMMSS format.
-
-    Raises
-    ------
-    RuntimeError
-        If no suitable orbit file can be found within the provided list of entries.
-
-    Returns
-    -------
-    orbit_file_name : str
-        Name of the selected orbit file.
-    orbit_file_request_id : str
-        Request ID used to perform the actual download request of the selected
-        orbit file.
-
-    """
-    orbit_regex_pattern = (
-        r'(?P<mission_id>S1A|S1B)_(?P<file_class>OPER)_(?P<category>AUX)_'
-        r'(?P<semantic_desc>POEORB|RESORB)_(?P<site>OPOD)_'
-        r'(?P<creation_ts>\d{8}T\d{6})_V(?P<valid_start_ts>\d{8}T\d{6})_'
-        r'(?P<valid_stop_ts>\d{8}T\d{6})[.](?P<format>EOF)$'
-    )
-    orbit_regex = re.compile(orbit_regex_pattern)
-
-    # Parse each result from the query, and look for a suitable orbit file
-    # candidate among the results
-    for entry_elem in entry_elems:
-        # Get the request ID from the entry element, this is the primary piece of
-        # info needed by the download service to acquire the Orbit file
-        orbit_file_request_id = entry_elem.findtext('id', namespaces=namespace_map)
-
-        logger.debug(f'orbit_file_request_id: {orbit_file_request_id}')
-
-        # Get all the info elements, as one will tell us the official file name to
-        # assign to the downloaded Orbit file
-        info_elems = entry_elem.findall('str', namespaces=namespace_map)
-
-        logger.debug(f'len(info_elems): {len(info_elems)}')
-
-        # Scan the info elements for the one that corresponds to the Orbit filename
-        for info_elem in info_elems:
-            if info_elem.get('name') == 'filename':
-                orbit_file_name = info_elem.text
-                break
-        else:
-            logger.warning(
-                f'Could not parse the Orbit file name from query results for '
-                f'request ID {orbit_file_request_id}'
-            )
-            continue
-
-        # Parse the validity time range from the orbit file name
-        match = orbit_regex.match(orbit_file_name)
-
-        if not match:
-            logger.warning(
-                f'Orbit file name {orbit_file_name} does not conform to expected format'
-            )
-            continue
-
-        orbit_start_time = match.groupdict()['valid_start_ts']
-        orbit_stop_time = match.groupdict()['valid_stop_ts']
-
-        # Check that the validity time range of the orbit file fully envelops
-        # the SAFE validity time range parsed earlier
-        safe_start_datetime = datetime.strptime(safe_start_time, "%Y%m%dT%H%M%S")
-        safe_stop_datetime = datetime.strptime(safe_stop_time, "%Y%m%dT%H%M%S")
-        orbit_start_datetime = datetime.strptime(orbit_start_time, "%Y%m%dT%H%M%S")
-        orbit_stop_datetime = datetime.strptime(orbit_stop_time, "%Y%m%dT%H%M%S")
-
-        if orbit_start_datetime < safe_start_datetime and orbit_stop_datetime > safe_stop_datetime:
-            logger.debug(f'orbit_file_name: {orbit_file_name}')
-
-            # Return the two pieces of info we need to download the file
-            return orbit_file_name, orbit_file_request_id
-    # If here, there were no valid orbit file candidates returned from the query
-    else:
-        raise RuntimeError(
-            "No suitable orbit file could be found within the results of the query"
-        )
-
 
 def download_orbit_file(request_url, output_directory, orbit_file_name, username, password):
     """
@@ -542,6 +460,83 @@ def download_orbit_file(request_url, output_directory, orbit_file_name, username
     return output_orbit_file_path
 
 
+def select_orbit_file_from_catalog(args, mission_id, safe_start_time, safe_stop_time):
+    """
+    Selects the Orbit file covering the SAFE time range from the local orbit
+    catalog given by args.catalog, and only queries the query service on a
+    miss, adding the query results to the catalog.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+        Arguments parsed from the command-line.
+    mission_id : str
+        The mission ID parsed from the SAFE file name.
+    safe_start_time : str
+        The start time parsed from the SAFE file name in YYYYmmddTHHMMSS format.
+    safe_stop_time : str
+        The stop time parsed from the SAFE file name in YYYYmmddTHHMMSS format.
+
+    Returns
+    -------
+    orbit_file : OrbitFile
+        The selected Orbit file, including the URL to download it from.
+
+    Raises
+    ------
+    NoQueryResultsException
+        If the catalog has no suitable Orbit file, and the query returns no results.
+    RuntimeError
+        If no suitable Orbit file can be found within the query results.
+
+    """
+    safe_start_date = datetime.strptime(safe_start_time, "%Y%m%dT%H%M%S")
+    safe_stop_date = datetime.strptime(safe_stop_time, "%Y%m%dT%H%M%S")
+    margin = timedelta(seconds=args.margin or 0)
+
+    with OrbitCatalog(args.catalog or ":memory:") as catalog:
+        orbit_file = catalog.find_covering(
+            mission_id, args.orbit_type, safe_start_date, safe_stop_date, margin
+        )
+
+        if orbit_file and orbit_file.url:
+            logger.info(f"Found Orbit file {orbit_file.name} in catalog {args.catalog}")
+            return orbit_file
+
+        # Construct the query based on the time range parsed from the input file
+        query = construct_orbit_file_query(
+            mission_id, args.orbit_type, safe_start_time, safe_stop_time, args.query_time_range
+        )
+
+        # Make the query to determine what Orbit files are available for the time
+        # range
+        logger.info(f"Querying for Orbit file(s) from endpoint {args.query_endpoint}")
+
+        xml_response = query_orbit_file_service(
+            args.query_endpoint, query, args.username, args.password
+        )
+
+        # Parse the XML response from the query service
+        logger.info("Parsing XML response from Orbit query service")
+
+        entry_elems, namespace_map = parse_orbit_file_query_xml(xml_response)
+
+        # Add the query results to the catalog, then select an appropriate
+        # orbit file from it
+        catalog.sync_from_query_results(entry_elems, namespace_map, args.download_endpoint)
+
+        orbit_file = catalog.find_covering(
+            mission_id, args.orbit_type, safe_start_date, safe_stop_date, margin
+        )
+
+    if not orbit_file:
+        raise RuntimeError(
+            "No suitable orbit file could be found within the results of the query"
+        )
+
+    return orbit_file
+
+
 def main(args):
     """
     Main script to execute Orbit file staging.
@@ -565,33 +560,9 @@ def main(args):
 
     logger.info(f"Parsed time range {safe_start_time} - {safe_stop_time} from SAFE filename")
 
-    # Construct the query based on the time range parsed from the input file
-    query = construct_orbit_file_query(
-        mission_id, args.orbit_type, safe_start_time, safe_stop_time, args.query_time_range
-    )
-
-    # Make the query to determine what Orbit files are available for the time
-    # range
-    logger.info(f"Querying for Orbit file(s) from endpoint {args.query_endpoint}")
-
-    xml_response = query_orbit_file_service(
-        args.query_endpoint, query, args.username, args.password
-    )
-
-    # Parse the XML response from the query service
-    logger.info("Parsing XML response from Orbit query service")
-
-    entry_elems, namespace_map = parse_orbit_file_query_xml(xml_response)
-
-    # Select an appropriate orbit file from the list returned from the query
-    orbit_file_name, orbit_file_request_id = select_orbit_file(
-        entry_elems, namespace_map, safe_start_time, safe_stop_time
-    )
-
-    # Construct the URL used to download the Orbit file
-    request_url = os.path.join(
-        args.download_endpoint, f"Products('{orbit_file_request_id}')/$value"
-    )
+    orbit_file = select_orbit_file_from_catalog(args, mission_id, safe_start_time, safe_stop_time)
+    orbit_file_name = orbit_file.name
+    request_url = orbit_file.url
 
     # If user request the URL only, print it to standard out and the log
     if args.url_only:
@@ -601,14 +572,18 @@ def main(args):
     # Otherwise, download the Orbit file using the file name parsed from the
     # query result to the directory specified by the user
     else:
-        logger.info(
-            f"Downloading Orbit file {orbit_file_name} from service endpoint "
-            f"{args.download_endpoint}"
-        )
-        output_orbit_file_path = download_orbit_file(
-            request_url, args.output_directory, orbit_file_name, args.username,
-            args.password
-        )
+        logger.info(f"Downloading Orbit file {orbit_file_name} from {request_url}")
+
+        # Catalogs synced from an S3 listing refer to Orbit files by S3 URL
+        if request_url.startswith('s3://'):
+            bucket, key = request_url[len('s3://'):].split('/', 1)
+            output_orbit_file_path = os.path.join(args.output_directory, orbit_file_name)
+            s3_util.get_s3_client().download_file(bucket, key, output_orbit_file_path)
+        else:
+            output_orbit_file_path = download_orbit_file(
+                request_url, args.output_directory, orbit_file_name, args.username,
+                args.password
+            )
 
         logger.info(f"Orbit file downloaded to {output_orbit_file_path}")
 
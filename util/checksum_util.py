@@ -1,8 +1,24 @@
-import re
-import os
 import fnmatch
 import hashlib
-from hysds.utils import calculate_checksum_from_localized_file
+import json
+import logging
+import os
+import re
+import threading
+from typing import Iterable, Optional
+
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKSUM_ALGOS = ("md5", "sha256")
+CHUNK_SIZE = 8 * 1024 ** 2
+SIDECAR_SUFFIX = ".checksums.json"
+MAX_CACHED_FILES = 4096
+
+_cache = LRUCache(maxsize=MAX_CACHED_FILES)
+"""Checksums by file identity (device, inode, size, mtime), so that hardlinks and renames of a file share them"""
+_cache_lock = threading.Lock()
 
 
 def create_dataset_checksums(dataset_dir, algo, globs=[], regex=[]):
@@ -11,6 +27,7 @@ def create_dataset_checksums(dataset_dir, algo, globs=[], regex=[]):
 
      This function creates the checksum files for the files in the directory using the specified algorithm.
      The files that are subjected to checksum are filtered using the specified globs or regular expressions.
+     Checksums computed while the files were downloaded or copied are reused rather than re-reading the files.
 
      @param dataset_dir (string) - The directory containing the files
      @param algo (string) - The algorithm used to calculate the checksum
@@ -20,87 +37,168 @@ def create_dataset_checksums(dataset_dir, algo, globs=[], regex=[]):
      @return Checksum files with the original file name with the checksum algorithm name as extension
 
      """
-    is_file = os.path.isfile(dataset_dir)
-    glob_only = False
-    regex_only = False
-    both = False
-    no_filter = False
-
-    if not globs and not regex:
-        no_filter = True
-    if not globs and regex:
-        regex_only = True
-    if globs and not regex:
-        glob_only = True
-    if globs and regex:
-        both = True
-
-    if is_file:
-        cfile = os.path.join(dataset_dir + "." + algo)
-        f = open(cfile, "w+")
-        f.write(calculate_checksum_from_localized_file(dataset_dir, algo))
-        f.close()
-    else:
-        if no_filter:
-            for dirName, subdirList, fileList in os.walk(dataset_dir):
-                for fname in fileList:
-                    cfile = os.path.join(dirName, fname + "." + algo)
-                    f = open(cfile, "w+")
-                    f.write(
-                        calculate_checksum_from_localized_file(
-                            os.path.join(dirName, fname), algo
-                        )
-                    )
-                    f.close()
-        if glob_only:
-            for dirName, subdirList, fileList in os.walk(dataset_dir):
-                for fname in fileList:
-                    for g in globs:
-                        if fnmatch.fnmatch(fname, g):
-                            cfile = os.path.join(dirName, fname + "." + algo)
-                            f = open(cfile, "w+")
-                            f.write(
-                                calculate_checksum_from_localized_file(
-                                    os.path.join(dirName, fname), algo
-                                )
-                            )
-                            f.close()
-        if regex_only:
-            for dirName, subdirList, fileList in os.walk(dataset_dir):
-                for fname in fileList:
-                    for r in regex:
-                        if re.match(r, fname):
-                            cfile = os.path.join(dirName, fname + "." + algo)
-                            f = open(cfile, "w+")
-                            f.write(
-                                calculate_checksum_from_localized_file(
-                                    os.path.join(dirName, fname), algo
-                                )
-                            )
-                            f.close()
-        if both:
-            for dirName, subdirList, fileList in os.walk(dataset_dir):
-                for fname in fileList:
-                    for g in globs:
-                        if fnmatch.fnmatch(fname, g):
-                            cfile = os.path.join(dirName, fname + "." + algo)
-                            f = open(cfile, "w+")
-                            f.write(
-                                calculate_checksum_from_localized_file(
-                                    os.path.join(dirName, fname), algo
-                                )
-                            )
-                            f.close()
-                    for r in regex:
-                        if re.match(r, fname):
-                            cfile = os.path.join(dirName, fname + "." + algo)
-                            f = open(cfile, "w+")
-                            f.write(
-                                calculate_checksum_from_localized_file(
-                                    os.path.join(dirName, fname), algo
-                                )
-                            )
-                            f.close()
+    if os.path.isfile(dataset_dir):
+        _write_checksum_file(dataset_dir, algo)
+        return
+
+    for dirName, subdirList, fileList in os.walk(dataset_dir):
+        for fname in fileList:
+            if is_sidecar(fname):
+                continue
+            if (globs or regex) \
+                    and not any(fnmatch.fnmatch(fname, g) for g in globs) \
+                    and not any(re.match(r, fname) for r in regex):
+                continue
+            _write_checksum_file(os.path.join(dirName, fname), algo)
+
+
+def _write_checksum_file(filepath, algo):
+    with open(filepath + "." + algo, "w+") as f:
+        f.write(get_file_checksums(filepath, [algo])[algo])
+
+
+class Checksums:
+    """Incrementally computes the checksums of a stream of bytes, for a set of hashlib algorithms at once."""
+    def __init__(self, algos: Iterable[str] = DEFAULT_CHECKSUM_ALGOS):
+        self.algos = tuple(dict.fromkeys(algos))
+        self.reset()
+
+    def reset(self):
+        self._hashes = {algo: hashlib.new(algo) for algo in self.algos}
+        self.size_in_bytes = 0
+
+    def update(self, data):
+        for hash_ in self._hashes.values():
+            hash_.update(data)
+        self.size_in_bytes += len(data)
+
+    def update_from_file(self, file, size: Optional[int] = None):
+        """Reads `file` (up to `size` bytes) into the checksums, `CHUNK_SIZE` bytes at a time."""
+        buffer = memoryview(bytearray(CHUNK_SIZE))
+        remaining = size
+        while remaining is None or remaining > 0:
+            n = file.readinto(buffer if remaining is None else buffer[:min(remaining, CHUNK_SIZE)])
+            if not n:
+                break
+            self.update(buffer[:n])
+            if remaining is not None:
+                remaining -= n
+
+    def hexdigests(self) -> dict[str, str]:
+        return {algo: hash_.hexdigest() for algo, hash_ in self._hashes.items()}
+
+
+class ChecksumStream:
+    """
+    Wraps a file object, updating `checksums` with the bytes read from or written to it, so that a file is checksummed
+    while it is being downloaded, uploaded or copied. Only sequential reads or writes are checksummed correctly.
+    """
+    def __init__(self, fileobj, checksums: Checksums):
+        self._fileobj = fileobj
+        self.checksums = checksums
+
+    def read(self, size=-1):
+        data = self._fileobj.read(size)
+        self.checksums.update(data)
+        return data
+
+    def readinto(self, b):
+        n = self._fileobj.readinto(b)
+        if n:
+            self.checksums.update(memoryview(b)[:n])
+        return n
+
+    def write(self, data):
+        n = self._fileobj.write(data)
+        self.checksums.update(data if n is None else memoryview(data)[:n])
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._fileobj.close()
+
+
+def get_file_checksums(filepath, algos: Iterable[str] = DEFAULT_CHECKSUM_ALGOS) -> dict[str, str]:
+    """
+    Returns the checksums of a file for the given algorithms.
+
+    Cached checksums are reused. Missing checksums are calculated together, in a single pass over the file, and cached
+    for the lifetime of the process.
+    """
+    algos = tuple(algos)
+    checksums = get_cached_checksums(filepath)
+    missing_algos = [algo for algo in algos if algo not in checksums]
+    if missing_algos:
+        logger.debug(f"Calculating {missing_algos} checksums of {filepath}")
+        calculated_checksums = Checksums(missing_algos)
+        with open(filepath, "rb") as f:
+            calculated_checksums.update_from_file(f)
+        checksums = cache_checksums(filepath, calculated_checksums.hexdigests())
+    return {algo: checksums[algo] for algo in algos}
+
+
+def get_cached_checksums(filepath) -> dict[str, str]:
+    """Returns the checksums cached for a file, from memory or its sidecar file, as long as the file is unchanged."""
+    stat = os.stat(filepath)
+    with _cache_lock:
+        checksums = _cache.get(_to_identity(stat))
+    if checksums is not None:
+        return dict(checksums)
+
+    try:
+        with open(to_sidecar_path(filepath)) as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (sidecar.get("size"), sidecar.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+        logger.debug(f"Ignoring stale checksums of {filepath}")
+        return {}
+    with _cache_lock:
+        _cache[_to_identity(stat)] = sidecar["checksums"]
+    return dict(sidecar["checksums"])
+
+
+def cache_checksums(filepath, checksums: dict[str, str], sidecar=False) -> dict[str, str]:
+    """
+    Caches the checksums of a file, merged with any already cached, and returns them.
+
+    :param filepath: the checksummed file. Its contents must not change between checksumming and caching.
+    :param checksums: checksums by algorithm name.
+    :param sidecar: whether to also persist the checksums to a sidecar file next to the file, for reuse by other
+                    processes. Avoid it in dataset directories, whose files are all published.
+    """
+    stat = os.stat(filepath)
+    with _cache_lock:
+        checksums = {**_cache.get(_to_identity(stat), {}), **checksums}
+        _cache[_to_identity(stat)] = checksums
+
+    if sidecar:
+        with open(to_sidecar_path(filepath), "w") as f:
+            json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "checksums": checksums}, f)
+    return dict(checksums)
+
+
+def to_sidecar_path(filepath) -> str:
+    dirname, basename = os.path.split(os.fspath(filepath))
+    return os.path.join(dirname, f".{basename}{SIDECAR_SUFFIX}")
+
+
+def is_sidecar(filename) -> bool:
+    return filename.startswith(".") and filename.endswith(SIDECAR_SUFFIX)
+
+
+def clear_cached_checksums():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _to_identity(stat: os.stat_result) -> tuple:
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
 
 
 def get_file_checksum(file_content, checksum_type):
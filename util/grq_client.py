@@ -1,7 +1,6 @@
 import logging
 from datetime import datetime
 
-import backoff
 from elasticsearch import Elasticsearch
 from elasticsearch import helpers
 
@@ -9,6 +8,12 @@ from data_subscriber import es_conn_util
 
 logger = logging.getLogger(__name__)
 
+SLC_DATASET_SOURCE_INCLUDES = ["dataset", "urls", "browse_urls", "metadata"]
+"""The fields of pending SLC datasets read by ionosphere_download, and by the CSLC job submitted for them (see the
+SCIFLO_L2_CSLC_S1 hysds-io)"""
+DEFAULT_BULK_UPDATE_SIZE = 500
+DEFAULT_RETRY_ON_CONFLICT = 3
+
 
 def get_slc_datasets_without_ionosphere_data(creation_timestamp_start_dt: datetime, creation_timestamp_end_dt: datetime):
     es: Elasticsearch = es_conn_util.get_es_connection(logger).es
@@ -25,15 +30,52 @@ def get_slc_datasets_without_ionosphere_data(creation_timestamp_start_dt: dateti
     body["query"]["bool"]["must_not"].append({"exists": {"field": "metadata.ionosphere.FileSize"}})
     body["query"]["bool"]["must_not"].append({"exists": {"field": "metadata.ionosphere.FileLocation"}})
 
+    body["_source"]["includes"] = SLC_DATASET_SOURCE_INCLUDES
+
     search_results = list(helpers.scan(es, body, index="grq_*_l1_s1_slc*", scroll="5m", size=10_000))
 
     return search_results
 
 
-@backoff.on_exception(backoff.expo, exception=Exception, max_tries=3, jitter=None)
-def try_update_slc_dataset_with_ionosphere_metadata(index, product_id, ionosphere_metadata):
+def update_slc_datasets_with_ionosphere_metadata(
+        updates: list[tuple[str, str, dict]],
+        chunk_size=DEFAULT_BULK_UPDATE_SIZE,
+        retry_on_conflict=DEFAULT_RETRY_ON_CONFLICT
+) -> dict[str, dict]:
+    """
+    Adds ionosphere metadata to the given SLC datasets with bulk requests, rather than a request per dataset.
+
+    Updates of a dataset modified concurrently are retried by ES (`retry_on_conflict`), and rejected requests
+    (HTTP 429) are retried with backoff. Failed updates are returned rather than raised, so that the other datasets
+    are updated.
+
+    :param updates: (index, product_id, ionosphere_metadata) of each dataset to update.
+    :param chunk_size: the max number of updates per bulk request.
+    :param retry_on_conflict: the number of retries of an update on version conflicts.
+    :return: the errors of the failed updates, by product ID.
+    """
     es: Elasticsearch = es_conn_util.get_es_connection(logger).es
-    es.update(index, product_id, body={"doc": {"metadata": ionosphere_metadata}})
+
+    actions = (
+        {
+            "_op_type": "update",
+            "_index": index,
+            "_id": product_id,
+            "retry_on_conflict": retry_on_conflict,
+            "doc": {"metadata": ionosphere_metadata}
+        }
+        for index, product_id, ionosphere_metadata in updates
+    )
+    success_count, errors = helpers.bulk(
+        es, actions, chunk_size=chunk_size, max_retries=3, raise_on_error=False, raise_on_exception=False
+    )
+
+    failed_updates = {error["update"]["_id"]: error["update"] for error in errors}
+    logger.info(f"Bulk updated SLC datasets with ionosphere metadata. {success_count=}, {len(failed_updates)=}")
+    for product_id, error in failed_updates.items():
+        logger.error(f"Failed to update SLC dataset with ionosphere metadata. {product_id=}, {error=}")
+
+    return failed_updates
 
 
 def get_body() -> dict:
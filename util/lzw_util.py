@@ -0,0 +1,242 @@
+"""
+===========
+lzw_util.py
+===========
+
+Streaming decompression of the Unix `compress` (.Z, LZW) format, e.g. for ionosphere correction archives, without
+spawning `gunzip`/`uncompress` and without holding the decompressed data in memory.
+"""
+from typing import Optional
+
+MAGIC = b"\x1f\x9d"
+BLOCK_MODE = 0x80
+"""Header flag set when the stream may contain CLEAR codes, which reset the code table"""
+MAX_BITS_MASK = 0x1f
+INIT_BITS = 9
+MAX_BITS = 16
+CLEAR = 256
+"""The code resetting the code table, in block mode"""
+CHUNK_SIZE = 64 * 1024
+"""Size of the compressed chunks read by `decompress_file`. Each decompresses to several times its size"""
+
+
+class LZWDecompressor:
+    """
+    Incremental decompressor of the Unix `compress` format, in the manner of `zlib.decompressobj`. Feed the compressed
+    data in chunks of any size to `decompress`, then call `flush` at the end of the stream.
+
+    Codes are packed LSB-first, in groups of 8 codes of equal width. The width of codes grows from 9 bits as the code
+    table fills, up to the max width given in the header. A change of width, or a CLEAR code, ends the current group
+    early, and the remainder of the group is padding. Only complete groups are decoded until `flush`.
+
+    Memory is bounded by the code table (at most 2^16 entries), whose total size is at most the size of the data
+    decompressed since the last CLEAR.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self._header_read = False
+        self.eof = False
+
+        self._block_mode = True
+        self._max_bits = MAX_BITS
+        self._n_bits = INIT_BITS
+        self._table: list[bytes] = []
+        self._prev: Optional[bytes] = None
+        """The string of the previous code"""
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompresses the given chunk of data, returning the data decompressed so far."""
+        if self.eof:
+            raise ValueError("decompress() called after flush()")
+        self._buffer += data
+        return self._decode(final=False)
+
+    def flush(self) -> bytes:
+        """Decompresses the remainder of the stream."""
+        out = self._decode(final=True)
+        self._buffer.clear()  # less than a code, i.e. padding
+        self.eof = True
+        return out
+
+    def _read_header(self):
+        if self._buffer[:2] != MAGIC:
+            raise ValueError("Not in compress (.Z) format")
+        flags = self._buffer[2]
+        max_bits = flags & MAX_BITS_MASK
+        if not INIT_BITS <= max_bits <= MAX_BITS:
+            raise ValueError(f"Unsupported max code width. {max_bits=}")
+
+        self._block_mode = bool(flags & BLOCK_MODE)
+        self._max_bits = max_bits
+        self._table = [bytes([i]) for i in range(256)]
+        if self._block_mode:
+            self._table.append(b"")  # placeholder for CLEAR
+        self._header_read = True
+        del self._buffer[:3]
+
+    def _decode(self, final: bool) -> bytes:
+        if not self._header_read:
+            if len(self._buffer) < 3:
+                if final:
+                    raise ValueError("Truncated compress (.Z) header")
+                return b""
+            self._read_header()
+
+        # local copies, as this is the inner loop
+        buffer, table, prev = self._buffer, self._table, self._prev
+        block_mode, max_bits = self._block_mode, self._max_bits
+        max_code = 1 << max_bits  # the code table size limit
+        n_bits = self._n_bits
+        group_max_code = _to_max_code(n_bits, max_bits)
+        mask = (1 << n_bits) - 1
+        table_size = len(table)
+        out = []
+        append_out, append_table = out.append, table.append
+
+        pos, size = 0, len(buffer)
+        while True:
+            remaining = size - pos
+            if remaining >= n_bits:
+                group_size, n_codes = n_bits, 8
+            elif final and remaining * 8 >= n_bits:  # the last group is incomplete
+                group_size, n_codes = remaining, remaining * 8 // n_bits
+            else:
+                break
+            group = int.from_bytes(buffer[pos:pos + group_size], "little")
+            pos += group_size
+
+            for _ in range(n_codes):
+                code = group & mask
+                group >>= n_bits
+
+                if prev is None:  # first code
+                    if code >= 256:
+                        raise ValueError(f"Invalid first code. {code=}")
+                    prev = table[code]
+                    append_out(prev)
+                    continue
+
+                if code == CLEAR and block_mode:
+                    del table[256:]
+                    table_size = 256
+                    n_bits = INIT_BITS
+                    group_max_code, mask = _to_max_code(n_bits, max_bits), (1 << n_bits) - 1
+                    break  # the rest of the group is padding
+
+                try:
+                    entry = table[code]
+                except IndexError:
+                    if code != table_size:
+                        raise ValueError(f"Invalid code. {code=}, {table_size=}")
+                    entry = prev + prev[:1]  # the code being defined, i.e. prev + its first byte
+                append_out(entry)
+
+                if table_size < max_code:
+                    append_table(prev + entry[:1])
+                    table_size += 1
+                prev = entry
+
+                if table_size > group_max_code:  # codes widen once the table outgrows them
+                    n_bits += 1
+                    group_max_code, mask = _to_max_code(n_bits, max_bits), (1 << n_bits) - 1
+                    break  # the rest of the group is padding
+
+        del buffer[:pos]
+        self._prev, self._n_bits = prev, n_bits
+        return b"".join(out)
+
+
+def _to_max_code(n_bits: int, max_bits: int) -> int:
+    """
+    The table size beyond which codes widen from `n_bits`. Codes stop widening at `max_bits`, once widened to it,
+    as in `compress` (which widens 9 bit codes to 10 bits even when `max_bits` is 9).
+    """
+    return 1 << max_bits if n_bits == max_bits and n_bits > INIT_BITS else (1 << n_bits) - 1
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompresses data in the Unix `compress` format."""
+    decompressor = LZWDecompressor()
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def decompress_file(source, target, chunk_size=CHUNK_SIZE) -> int:
+    """
+    Decompresses the `compress` (.Z) file at `source` to `target`, chunk by chunk.
+
+    :return: the size of the decompressed file.
+    """
+    decompressor = LZWDecompressor()
+    size = 0
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        while chunk := source_file.read(chunk_size):
+            size += target_file.write(decompressor.decompress(chunk))
+        size += target_file.write(decompressor.flush())
+    return size
+
+
+def compress(data: bytes, max_bits=MAX_BITS) -> bytes:
+    """
+    Compresses data in the Unix `compress` format, in block mode. The code table is cleared whenever it is full,
+    rather than when the compression ratio drops as `compress` does, which is also valid input to any decoder.
+
+    Meant for producing test data, not for speed.
+    """
+    out = bytearray(MAGIC + bytes([max_bits | BLOCK_MODE]))
+    max_code = 1 << max_bits
+    codes = []
+    """Codes of the current group"""
+    n_bits = INIT_BITS
+    decoder_table_size = 257  # the decoder defines each code a code later than the encoder
+
+    def write_group():
+        value = 0
+        for i, c in enumerate(codes):
+            value |= c << (i * n_bits)
+        out.extend(value.to_bytes(n_bits, "little"))  # padded to the full group
+        codes.clear()
+
+    def emit(code: int, first=False):
+        nonlocal n_bits, decoder_table_size
+        if decoder_table_size > _to_max_code(n_bits, max_bits):
+            if codes:
+                write_group()
+            n_bits += 1
+        codes.append(code)
+        if code == CLEAR:
+            write_group()
+            n_bits, decoder_table_size = INIT_BITS, 256
+        else:
+            if not first and decoder_table_size < max_code:
+                decoder_table_size += 1
+            if len(codes) == 8:
+                write_group()
+
+    table = {bytes([i]): i for i in range(256)}
+    next_code = 257
+    prefix = b""
+    first = True
+    for byte in data:
+        string = prefix + bytes([byte])
+        if string in table:
+            prefix = string
+            continue
+        emit(table[prefix], first)
+        first = False
+        if next_code < max_code:
+            table[string] = next_code
+            next_code += 1
+        else:
+            emit(CLEAR)
+            table = {bytes([i]): i for i in range(256)}
+            next_code = 257
+        prefix = bytes([byte])
+    if prefix:
+        emit(table[prefix], first)
+
+    if codes:  # the last group is not padded
+        value = 0
+        for i, c in enumerate(codes):
+            value |= c << (i * n_bits)
+        out.extend(value.to_bytes((len(codes) * n_bits + 7) // 8, "little"))
+    return bytes(out)
@@ -14,12 +14,11 @@ import json
 import re
 from typing import Dict, List
 
-import boto3
-
 from commons.logger import logger
 from hysds.utils import get_disk_usage
 
 from opera_chimera.constants.opera_chimera_const import OperaChimeraConstants as oc_const
+from util import s3_util
 
 DSWX_BAND_NAMES = ['WTR', 'BWTR', 'CONF', 'DIAG', 'WTR-1',
                    'WTR-2', 'LAND', 'SHAD', 'CLOUD', 'DEM']
@@ -65,7 +64,7 @@ def download_object_from_s3(s3_bucket, s3_key, output_filepath, filetype="Ancill
             f"section of the PGE config."
         )
 
-    s3 = boto3.resource('s3')
+    s3 = s3_util.get_s3_resource()
 
     pge_metrics = {"download": [], "upload": []}
 
@@ -73,7 +72,7 @@ def download_object_from_s3(s3_bucket, s3_key, output_filepath, filetype="Ancill
 
     try:
         logger.info(f'Downloading {filetype} file s3://{s3_bucket}/{s3_key} to {output_filepath}')
-        s3.Object(s3_bucket, s3_key).download_file(output_filepath)
+        s3.Object(s3_bucket, s3_key).download_file(output_filepath, Config=s3_util.create_transfer_config())
     except Exception as err:
         errmsg = f'Failed to download {filetype} file from S3, reason: {str(err)}'
         raise RuntimeError(errmsg)
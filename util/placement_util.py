@@ -0,0 +1,135 @@
+"""
+=================
+placement_util.py
+=================
+
+Places files into dataset directories without copying their data where the filesystem allows it.
+"""
+import errno
+import functools
+import logging
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from util import checksum_util
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LINK = "link"
+REFLINK = "reflink"
+RENAME = "rename"
+COPY = "copy"
+
+FICLONE = 0x40049409
+"""ioctl request number of FICLONE (Linux), which clones a file's extents on copy-on-write filesystems (XFS, Btrfs)"""
+
+
+@dataclass
+class PlacementStats:
+    """Number of files and bytes placed with each method."""
+    file_counts: dict = field(default_factory=lambda: {LINK: 0, REFLINK: 0, RENAME: 0, COPY: 0})
+    byte_counts: dict = field(default_factory=lambda: {LINK: 0, REFLINK: 0, RENAME: 0, COPY: 0})
+
+    @property
+    def copied_bytes(self) -> int:
+        return self.byte_counts[COPY]
+
+    @property
+    def linked_bytes(self) -> int:
+        """Bytes placed without copying data."""
+        return self.byte_counts[LINK] + self.byte_counts[REFLINK] + self.byte_counts[RENAME]
+
+    def __str__(self):
+        return ", ".join(f"{method}={self.file_counts[method]} file(s)/{self.byte_counts[method]:,} bytes"
+                         for method in self.file_counts)
+
+
+stats = PlacementStats()
+"""Placement stats accumulated over the lifetime of the process"""
+_stats_lock = threading.Lock()
+
+
+def place_file(source, target, allow_rename=False, checksum_algos: Iterable[str] = ()) -> str:
+    """
+    Places a copy of `source` at `target`, overwriting it, like `shutil.copyfile`, but avoiding the copy of the file's
+    data where possible.
+
+    Tries, in order, a hardlink, a reflink (FICLONE), a rename (only if `allow_rename`), and falls back to copying the
+    file (e.g. across filesystems). Hardlinked files share their data, so neither path should be modified in place
+    afterwards.
+
+    Checksums cached for `source` (see `util.checksum_util`) carry over to `target`. When the data has to be copied
+    and no checksums are cached, the file is checksummed with `checksum_algos` while it is copied.
+
+    :param source: the file to place.
+    :param target: the file path to place the file at.
+    :param allow_rename: whether `source` can be moved rather than copied, i.e. whether the caller no longer needs it.
+    :param checksum_algos: hashlib algorithms whose checksums of the file the caller needs, e.g. "md5".
+    :return: the method the file was placed with. One of LINK, REFLINK, RENAME or COPY.
+    """
+    source, target = os.fspath(source), os.fspath(target)
+    if os.path.exists(target):
+        if os.path.samefile(source, target):
+            raise shutil.SameFileError(f"{source!r} and {target!r} are the same file")
+        os.unlink(target)
+
+    size = os.path.getsize(source)
+    checksums = checksum_util.get_cached_checksums(source)
+    checksum_algos = tuple(checksum_algos)
+    if checksums or not checksum_algos:
+        copy = shutil.copyfile
+    else:
+        copy = functools.partial(_copy_with_checksums, algos=checksum_algos)
+    for method, place in ((LINK, os.link), (REFLINK, _reflink), (RENAME, os.rename), (COPY, copy)):
+        if method == RENAME and not allow_rename:
+            continue
+        try:
+            place(source, target)
+        except OSError as e:
+            if method == COPY:
+                raise
+            logger.debug(f"Could not {method} {source} to {target}. {errno.errorcode.get(e.errno, e.errno)}")
+            continue
+        break
+    if checksums and method in (REFLINK, COPY):
+        checksum_util.cache_checksums(target, checksums)
+
+    logger.debug(f"Placed {source} at {target}. {method=}, {size=:,}")
+    with _stats_lock:
+        stats.file_counts[method] += 1
+        stats.byte_counts[method] += size
+    return method
+
+
+def place_file_in_dir(source, target_dir, allow_rename=False, checksum_algos: Iterable[str] = ()) -> str:
+    """Places `source` in `target_dir`, under the same name, like `shutil.copy`. See `place_file`."""
+    return place_file(source, os.path.join(target_dir, os.path.basename(source)), allow_rename=allow_rename,
+                      checksum_algos=checksum_algos)
+
+
+def _reflink(source, target):
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        try:
+            fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+        except OSError:
+            target_file.close()
+            os.unlink(target)
+            raise
+
+
+def _copy_with_checksums(source, target, algos: Iterable[str]):
+    checksums = checksum_util.Checksums(algos)
+    with checksum_util.ChecksumStream(open(source, "rb"), checksums) as source_file, open(target, "wb") as target_file:
+        shutil.copyfileobj(source_file, target_file, length=checksum_util.CHUNK_SIZE)
+    checksum_util.cache_checksums(target, checksums.hexdigests())
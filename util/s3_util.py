@@ -0,0 +1,85 @@
+import logging
+import threading
+from typing import Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+MiB = 1024 ** 2
+
+DEFAULT_MULTIPART_THRESHOLD_BYTES = 64 * MiB
+DEFAULT_MULTIPART_CHUNKSIZE_BYTES = 64 * MiB
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_MAX_POOL_CONNECTIONS = 64
+MAX_CACHED_CLIENTS = 16
+
+_clients = LRUCache(maxsize=MAX_CACHED_CLIENTS)
+_clients_lock = threading.Lock()
+
+
+def get_s3_client(
+        aws_access_key_id: Optional[str] = None,
+        aws_secret_access_key: Optional[str] = None,
+        aws_session_token: Optional[str] = None,
+        region_name: Optional[str] = None
+):
+    """
+    Returns an S3 client for the given credentials and region, shared across the process.
+
+    Clients are thread-safe, so reusing one client per set of credentials avoids the cost of creating a session for
+    every object, and lets transfers reuse the client's pooled connections. Without explicit credentials, the client
+    uses boto3's default credential chain.
+    """
+    key = (aws_access_key_id, aws_secret_access_key, aws_session_token, region_name)
+    with _clients_lock:
+        s3 = _clients.get(key)
+        if s3 is None:
+            logger.info(f"Creating S3 client. {region_name=}, cached_clients={len(_clients)}")
+            session = boto3.Session(aws_access_key_id=aws_access_key_id,
+                                    aws_secret_access_key=aws_secret_access_key,
+                                    aws_session_token=aws_session_token,
+                                    region_name=region_name)
+            s3 = session.client("s3", config=Config(max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS))
+            _clients[key] = s3
+    return s3
+
+
+def get_s3_resource(region_name: Optional[str] = None):
+    """
+    Returns an S3 resource using boto3's default credential chain, shared across the process.
+
+    Unlike clients, resources are not thread-safe. Use `get_s3_client()` for transfers made from multiple threads.
+    """
+    key = ("resource", region_name)
+    with _clients_lock:
+        s3 = _clients.get(key)
+        if s3 is None:
+            logger.info(f"Creating S3 resource. {region_name=}")
+            s3 = boto3.Session(region_name=region_name).resource(
+                "s3", config=Config(max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS)
+            )
+            _clients[key] = s3
+    return s3
+
+
+def create_transfer_config(settings: Optional[dict] = None) -> TransferConfig:
+    """
+    Returns the configuration of boto3 managed (multipart) transfers.
+
+    :param settings: the S3_TRANSFER_CONFIG settings. e.g. `settings.get("S3_TRANSFER_CONFIG", {})`
+    """
+    settings = settings or {}
+    return TransferConfig(
+        multipart_threshold=settings.get("MULTIPART_THRESHOLD_BYTES", DEFAULT_MULTIPART_THRESHOLD_BYTES),
+        multipart_chunksize=settings.get("MULTIPART_CHUNKSIZE_BYTES", DEFAULT_MULTIPART_CHUNKSIZE_BYTES),
+        max_concurrency=settings.get("MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)
+    )
+
+
+def clear_s3_clients():
+    with _clients_lock:
+        _clients.clear()